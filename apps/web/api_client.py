@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import os
+import time
 from typing import Any
 
 import requests
@@ -11,6 +12,10 @@ API_BASE_URL = (
 ).rstrip("/")
 API_BASE_PATH = "/api/v1"
 TIMEOUT_SECONDS = 20
+# Audio goes through the resumable /uploads API in chunks of this size, each
+# retried from the offset the server reports when the connection drops.
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+UPLOAD_MAX_RETRIES = 5
 
 
 def _mime_from_image_filename(name: str) -> str:
@@ -25,6 +30,13 @@ def _mime_from_image_filename(name: str) -> str:
     return "image/jpeg"
 
 
+def _image_part(image_file: Any) -> tuple[str, bytes, str]:
+    mime = getattr(image_file, "type", None) or _mime_from_image_filename(
+        getattr(image_file, "name", "") or ""
+    )
+    return (image_file.name, image_file.getvalue(), mime)
+
+
 class ApiClientError(Exception):
     def __init__(
         self,
@@ -110,18 +122,74 @@ class APIClient:
         payload = self._handle_response(response)
         return payload if isinstance(payload, dict) else {}
 
+    def _upload_offset(self, upload_url: str) -> int:
+        response = requests.head(
+            upload_url, headers=self._headers, timeout=TIMEOUT_SECONDS
+        )
+        self._handle_response(response)
+        return int(response.headers["Upload-Offset"])
+
+    def upload_audio(self, audio_file: Any) -> str:
+        """Send ``audio_file`` as a resumable upload and return its id."""
+        payload = audio_file.getvalue()
+        response = requests.post(
+            f"{API_BASE_URL}{API_BASE_PATH}/uploads",
+            json={
+                "filename": audio_file.name,
+                "content_type": audio_file.type,
+                "length": len(payload),
+            },
+            headers=self._headers,
+            timeout=TIMEOUT_SECONDS,
+        )
+        upload = self._handle_response(response)
+        upload_id = str(upload["id"])
+        upload_url = f"{API_BASE_URL}{API_BASE_PATH}/uploads/{upload_id}"
+
+        offset = 0
+        failures = 0
+        while offset < len(payload):
+            try:
+                response = requests.patch(
+                    upload_url,
+                    data=payload[offset : offset + UPLOAD_CHUNK_BYTES],
+                    headers={
+                        **self._headers,
+                        "Upload-Offset": str(offset),
+                        "Content-Type": "application/offset+octet-stream",
+                    },
+                    timeout=TIMEOUT_SECONDS,
+                )
+                if response.status_code != 409:
+                    self._handle_response(response)
+                    offset = int(response.headers["Upload-Offset"])
+                    failures = 0
+                    continue
+            except requests.RequestException:
+                failures += 1
+                if failures > UPLOAD_MAX_RETRIES:
+                    raise ApiClientError("Envoi de l'audio interrompu")
+                time.sleep(min(2**failures, 10))
+            # Resume from what the server actually stored.
+            offset = self._upload_offset(upload_url)
+        return upload_id
+
     def create_entry(
-        self, question_id: int, text_content: str, audio_file: Any | None
+        self,
+        question_id: int,
+        text_content: str,
+        audio_file: Any | None,
+        image_files: list[Any] | None = None,
     ) -> dict[str, Any]:
+        """Create the entry with its images in one request (all or nothing)."""
         data = {"question_id": str(question_id)}
         if text_content.strip():
             data["text_content"] = text_content.strip()
-
-        files = None
         if audio_file is not None:
-            files = {
-                "audio_file": (audio_file.name, audio_file.getvalue(), audio_file.type)
-            }
+            data["upload_id"] = self.upload_audio(audio_file)
+        files = [
+            ("image_files", _image_part(image)) for image in image_files or []
+        ] or None
 
         response = requests.post(
             f"{API_BASE_URL}{API_BASE_PATH}/entries",
@@ -134,10 +202,7 @@ class APIClient:
         return payload if isinstance(payload, dict) else {}
 
     def upload_image(self, entry_id: str, image_file: Any) -> dict[str, Any]:
-        mime = getattr(image_file, "type", None) or _mime_from_image_filename(
-            getattr(image_file, "name", "") or ""
-        )
-        files = {"file": (image_file.name, image_file.getvalue(), mime)}
+        files = {"file": _image_part(image_file)}
         response = requests.post(
             f"{API_BASE_URL}{API_BASE_PATH}/entries/{entry_id}/assets",
             files=files,
@@ -129,29 +129,11 @@ with new_tab:
                     question_id=question["id"],
                     text_content=text_content,
                     audio_file=audio_file,
+                    image_files=image_files,
                 )
-                entry_id = entry.get("id")
-                if not entry_id:
+                if not entry.get("id"):
                     raise ApiClientError("Réponse invalide: id d'entrée manquant")
-
-                image_errors: list[str] = []
-                for image in image_files or []:
-                    try:
-                        client.upload_image(entry_id, image)
-                    except ApiClientError as image_exc:
-                        if image_exc.status_code == 422:
-                            image_errors.append(f"{image.name}: {image_exc}")
-                        elif image_exc.status_code == 413:
-                            image_errors.append(f"{image.name}: image trop volumineuse")
-                        else:
-                            image_errors.append(f"{image.name}: {image_exc}")
-
-                if image_errors:
-                    st.warning("Entrée créée, mais certaines images ont échoué :")
-                    for err in image_errors:
-                        st.write(f"- {err}")
-                else:
-                    st.success("Souvenir enregistré avec succès")
+                st.success("Souvenir enregistré avec succès")
 
                 refresh_entries_page()
             except (ApiClientError, requests.RequestException) as exc:
@@ -202,7 +184,9 @@ with list_tab:
                 st.write("Images")
                 cols = st.columns(3)
                 for idx, asset in enumerate(assets):
-                    download_url = asset.get("download_url")
+                    # The grid cells are small: prefer the server-side thumbnail.
+                    variants = asset.get("variants") or {}
+                    download_url = variants.get("thumb") or asset.get("download_url")
                     if not download_url:
                         continue
                     with cols[idx % 3]:
@@ -106,11 +106,27 @@ if command -v sqlite3 >/dev/null 2>&1; then
 else
   log "sqlite3 not found; falling back to file copy"
   cp "$db_path" "$tmp_dir/db/echo.db"
+  # The API runs SQLite in WAL mode: committed pages may still live in -wal.
+  if [[ -f "${db_path}-wal" ]]; then
+    cp "${db_path}-wal" "$tmp_dir/db/echo.db-wal"
+  fi
 fi
 
 log "Copying audio directory"
 cp -a "$audio_dir/." "$tmp_dir/audio/"
 
+# Image uploads and, with MEDIA_STORAGE_LAYOUT=content_addressed, the shared
+# blobs/ store (each file once, whatever the number of entries using it).
+media_dirs=()
+for media_dir in images blobs; do
+  if [[ -d "$data_dir/$media_dir" ]]; then
+    log "Copying $media_dir directory"
+    mkdir -p "$tmp_dir/$media_dir"
+    cp -a "$data_dir/$media_dir/." "$tmp_dir/$media_dir/"
+    media_dirs+=("$media_dir")
+  fi
+done
+
 created_at="$(date -u +%Y-%m-%dT%H:%M:%SZ)"
 sqlite_version="unavailable"
 if command -v sqlite3 >/dev/null 2>&1; then
@@ -134,9 +150,9 @@ MANIFEST
 
 log "Writing bundle: $bundle_path"
 if [[ "$compress" -eq 1 ]]; then
-  tar -C "$tmp_dir" -czf "$bundle_path" manifest.json db audio
+  tar -C "$tmp_dir" -czf "$bundle_path" manifest.json db audio ${media_dirs[@]+"${media_dirs[@]}"}
 else
-  tar -C "$tmp_dir" -cf "$bundle_path" manifest.json db audio
+  tar -C "$tmp_dir" -cf "$bundle_path" manifest.json db audio ${media_dirs[@]+"${media_dirs[@]}"}
 fi
 
 log "Backup complete"
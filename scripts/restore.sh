@@ -97,6 +97,9 @@ restored_audio_dir="$target_dir/audio"
 [[ -d "$restored_audio_dir" ]] || die "Missing audio directory in archive (expected audio/)"
 
 cp "$restored_db_snapshot" "$target_dir/echo.db"
+if [[ -f "${restored_db_snapshot}-wal" ]]; then
+  cp "${restored_db_snapshot}-wal" "$target_dir/echo.db-wal"
+fi
 
 if [[ -f "$target_dir/manifest.json" ]]; then
   log "Manifest summary:"
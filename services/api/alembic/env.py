@@ -12,15 +12,19 @@ from app.models import Entry, Question, User  # noqa: F401  (import needed for m
 config = context.config
 
 # -------------------------------------------------------------------
-# Force DB URL from DATA_DIR (works for Windows local dev + Docker)
+# DB URL: DATABASE_URL when set (e.g. PostgreSQL), otherwise the SQLite
+# file under DATA_DIR (works for Windows local dev + Docker)
 # -------------------------------------------------------------------
-repo_root = Path(__file__).resolve().parents[2]
-data_dir = Path(os.getenv("DATA_DIR") or (repo_root / "data"))
-data_dir.mkdir(parents=True, exist_ok=True)
-
-db_path = (data_dir / "echo.db").resolve()
-db_url = f"sqlite:///{db_path.as_posix()}"
-config.set_main_option("sqlalchemy.url", db_url)
+db_url = os.getenv("DATABASE_URL")
+if not db_url:
+    repo_root = Path(__file__).resolve().parents[2]
+    data_dir = Path(os.getenv("DATA_DIR") or (repo_root / "data"))
+    data_dir.mkdir(parents=True, exist_ok=True)
+
+    db_path = (data_dir / "echo.db").resolve()
+    db_url = f"sqlite:///{db_path.as_posix()}"
+# ConfigParser interpolation would choke on "%" in URL-encoded passwords.
+config.set_main_option("sqlalchemy.url", db_url.replace("%", "%%"))
 
 # Interpret the config file for Python logging.
 if config.config_file_name is not None:
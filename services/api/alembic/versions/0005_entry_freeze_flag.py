@@ -20,9 +20,7 @@ depends_on: Union[str, Sequence[str], None] = None
 def upgrade() -> None:
     op.add_column(
         "entries",
-        sa.Column(
-            "is_frozen", sa.Boolean(), nullable=False, server_default=sa.text("0")
-        ),
+        sa.Column("is_frozen", sa.Boolean(), nullable=False, server_default=sa.false()),
     )
 
 
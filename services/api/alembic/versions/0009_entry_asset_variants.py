@@ -0,0 +1,43 @@
+"""add entry asset variants table
+
+Revision ID: 0009_entry_asset_variants
+Revises: 0008_make_audio_optional
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0009_entry_asset_variants"
+down_revision: Union[str, None] = "0008_make_audio_optional"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "entry_asset_variants",
+        sa.Column("asset_id", sa.String(), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("path", sa.String(), nullable=False),
+        sa.Column("mime", sa.String(), nullable=False),
+        sa.Column("size", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(length=64), nullable=False),
+        sa.Column("width", sa.Integer(), nullable=False),
+        sa.Column("height", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(["asset_id"], ["entry_assets.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("asset_id", "name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("entry_asset_variants")
@@ -0,0 +1,80 @@
+"""add jobs table and processing status columns
+
+Revision ID: 0010_jobs
+Revises: 0009_entry_asset_variants
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0010_jobs"
+down_revision: Union[str, None] = "0009_entry_asset_variants"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("kind", sa.String(), nullable=False),
+        sa.Column("payload", sa.JSON(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=True),
+        sa.Column("status", sa.String(), server_default="queued", nullable=False),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_by", sa.String(), nullable=True),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_jobs_user_id", "jobs", ["user_id"], unique=False)
+    # Claim query: next runnable job in (status, run_after) order.
+    op.create_index(
+        "ix_jobs_status_run_after_id",
+        "jobs",
+        ["status", "run_after", "id"],
+        unique=False,
+    )
+
+    with op.batch_alter_table("entries") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "processing_status",
+                sa.String(),
+                server_default="ready",
+                nullable=False,
+            )
+        )
+    with op.batch_alter_table("entry_assets") as batch_op:
+        batch_op.add_column(
+            sa.Column(
+                "processing_status",
+                sa.String(),
+                server_default="ready",
+                nullable=False,
+            )
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("entry_assets") as batch_op:
+        batch_op.drop_column("processing_status")
+    with op.batch_alter_table("entries") as batch_op:
+        batch_op.drop_column("processing_status")
+    op.drop_index("ix_jobs_status_run_after_id", table_name="jobs")
+    op.drop_index("ix_jobs_user_id", table_name="jobs")
+    op.drop_table("jobs")
@@ -0,0 +1,26 @@
+"""index media paths for content-addressed blob reference counting
+
+Revision ID: 0011_media_path_indexes
+Revises: 0010_jobs
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0011_media_path_indexes"
+down_revision: Union[str, None] = "0010_jobs"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_entries_audio_path", "entries", ["audio_path"], unique=False)
+    op.create_index("ix_entry_assets_path", "entry_assets", ["path"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_entry_assets_path", table_name="entry_assets")
+    op.drop_index("ix_entries_audio_path", table_name="entries")
@@ -0,0 +1,54 @@
+"""add upload_sessions table for resumable uploads
+
+Revision ID: 0012_upload_sessions
+Revises: 0011_media_path_indexes
+Create Date: 2026-10-18
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0012_upload_sessions"
+down_revision: Union[str, None] = "0011_media_path_indexes"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_sessions",
+        sa.Column("id", sa.String(), nullable=False),
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("filename", sa.String(), nullable=False),
+        sa.Column("content_type", sa.String(), nullable=False),
+        sa.Column("length", sa.Integer(), nullable=False),
+        sa.Column("offset", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("chunks", sa.JSON(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_upload_sessions_user_id", "upload_sessions", ["user_id"], unique=False
+    )
+    op.create_index(
+        "ix_upload_sessions_expires_at",
+        "upload_sessions",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_upload_sessions_expires_at", table_name="upload_sessions")
+    op.drop_index("ix_upload_sessions_user_id", table_name="upload_sessions")
+    op.drop_table("upload_sessions")
@@ -0,0 +1,113 @@
+"""add FTS5 full-text index over entry text
+
+Revision ID: 0013_entries_fts
+Revises: 0012_upload_sessions
+Create Date: 2026-10-18
+
+SQLite only: ``entries_fts`` holds its own copy of each non-null
+``text_content`` with the ``entry_id`` and ``user_id`` it belongs to, kept
+in sync by triggers. ``user_id`` is indexed so that a search matches only
+the searching user's rows. It does not rely on the implicit ``entries`` rowid, which VACUUM
+or a table rebuild may renumber. ``entries_fts_rowids`` maps entry ids to
+FTS rowids so the triggers delete by key instead of scanning the index.
+A later migration that recreates ``entries`` (``batch_alter_table``) drops
+the triggers: it must recreate them.
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "0013_entries_fts"
+down_revision: Union[str, None] = "0012_upload_sessions"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE entries_fts USING fts5(
+            text_content,
+            entry_id UNINDEXED,
+            user_id,
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TABLE entries_fts_rowids (
+            entry_id VARCHAR NOT NULL PRIMARY KEY,
+            fts_rowid INTEGER NOT NULL
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER entries_fts_ai AFTER INSERT ON entries
+        WHEN new.text_content IS NOT NULL
+        BEGIN
+            INSERT INTO entries_fts(text_content, entry_id, user_id)
+            VALUES (new.text_content, new.id, new.user_id);
+            INSERT INTO entries_fts_rowids(entry_id, fts_rowid)
+            VALUES (new.id, last_insert_rowid());
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER entries_fts_ad AFTER DELETE ON entries
+        WHEN old.text_content IS NOT NULL
+        BEGIN
+            DELETE FROM entries_fts WHERE rowid = (
+                SELECT fts_rowid FROM entries_fts_rowids WHERE entry_id = old.id
+            );
+            DELETE FROM entries_fts_rowids WHERE entry_id = old.id;
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER entries_fts_au AFTER UPDATE OF text_content ON entries
+        BEGIN
+            DELETE FROM entries_fts WHERE rowid = (
+                SELECT fts_rowid FROM entries_fts_rowids WHERE entry_id = old.id
+            );
+            DELETE FROM entries_fts_rowids WHERE entry_id = old.id;
+            INSERT INTO entries_fts(text_content, entry_id, user_id)
+            SELECT new.text_content, new.id, new.user_id
+            WHERE new.text_content IS NOT NULL;
+            INSERT INTO entries_fts_rowids(entry_id, fts_rowid)
+            SELECT new.id, last_insert_rowid()
+            WHERE new.text_content IS NOT NULL;
+        END
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entries_fts(text_content, entry_id, user_id)
+        SELECT text_content, id, user_id FROM entries
+        WHERE text_content IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO entries_fts_rowids(entry_id, fts_rowid)
+        SELECT entry_id, rowid FROM entries_fts
+        """
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_au")
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_ad")
+    op.execute("DROP TRIGGER IF EXISTS entries_fts_ai")
+    op.execute("DROP TABLE IF EXISTS entries_fts_rowids")
+    op.execute("DROP TABLE IF EXISTS entries_fts")
@@ -0,0 +1,80 @@
+"""add lifeline_buckets aggregate of entries per user and month
+
+Revision ID: 0014_lifeline_buckets
+Revises: 0013_entries_fts
+Create Date: 2026-10-18
+"""
+
+from collections import Counter
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = "0014_lifeline_buckets"
+down_revision: Union[str, None] = "0013_entries_fts"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_PLACEHOLDER_SHA256 = "0" * 64
+
+
+def _year_month(created_at: datetime | str) -> tuple[int, int]:
+    # SQLite hands back the stored text ("YYYY-MM-DD HH:MM:SS...").
+    if isinstance(created_at, str):
+        return int(created_at[:4]), int(created_at[5:7])
+    return created_at.year, created_at.month
+
+
+def upgrade() -> None:
+    buckets = op.create_table(
+        "lifeline_buckets",
+        sa.Column("user_id", sa.String(), nullable=False),
+        sa.Column("year", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("entry_count", sa.Integer(), server_default="0", nullable=False),
+        sa.Column("media_count", sa.Integer(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "year", "month"),
+    )
+
+    bind = op.get_bind()
+    entries: Counter[tuple[str, int, int]] = Counter()
+    media: Counter[tuple[str, int, int]] = Counter()
+    rows = bind.execute(
+        sa.text(
+            """
+            SELECT entries.user_id, entries.created_at, entries.audio_sha256,
+                   COUNT(entry_assets.id) AS asset_count
+            FROM entries
+            LEFT JOIN entry_assets ON entry_assets.entry_id = entries.id
+            GROUP BY entries.id, entries.user_id, entries.created_at,
+                     entries.audio_sha256
+            """
+        )
+    )
+    for user_id, created_at, audio_sha256, asset_count in rows:
+        key = (user_id, *_year_month(created_at))
+        entries[key] += 1
+        has_audio = bool(audio_sha256) and audio_sha256 != _PLACEHOLDER_SHA256
+        media[key] += int(has_audio) + int(asset_count)
+    if entries:
+        op.bulk_insert(
+            buckets,
+            [
+                {
+                    "user_id": user_id,
+                    "year": year,
+                    "month": month,
+                    "entry_count": count,
+                    "media_count": media[(user_id, year, month)],
+                }
+                for (user_id, year, month), count in entries.items()
+            ],
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("lifeline_buckets")
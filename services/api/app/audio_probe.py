@@ -0,0 +1,492 @@
+"""Audio duration from container headers, without decoding.
+
+Each parser seeks to the few structures that carry timing information and
+reads only those bytes: an Xing/VBRI header or frame headers for MP3, the
+``mvhd`` box for MP4, the last page's granule position for Ogg, the Info
+element (or the last cluster) for WebM, ``COMM`` for AIFF and the chunk
+table for WAV. Anything unexpected yields ``None`` rather than a guess.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+import struct
+from typing import BinaryIO, Callable
+
+from app.binary_io import file_size, iter_chunks, read_at
+
+_ID3V2_HEADER_SIZE = 10
+# How far past the ID3 tag to look for the first MPEG/ADTS frame.
+_SYNC_SEARCH_BYTES = 64 * 1024
+# Ogg pages are at most 65307 bytes, so the last granule is within this tail.
+_OGG_TAIL_BYTES = 65_536 + 1024
+# Tail searched for the last WebM cluster when the Duration element is absent.
+_WEBM_TAIL_BYTES = 512 * 1024
+
+
+def _skip_id3v2(f: BinaryIO) -> int:
+    """Offset of the first byte after any leading ID3v2 tags."""
+    offset = 0
+    while True:
+        header = read_at(f, offset, _ID3V2_HEADER_SIZE)
+        if len(header) < _ID3V2_HEADER_SIZE or not header.startswith(b"ID3"):
+            return offset
+        size = 0
+        for byte in header[6:10]:
+            size = (size << 7) | (byte & 0x7F)
+        footer = _ID3V2_HEADER_SIZE if header[5] & 0x10 else 0
+        offset += _ID3V2_HEADER_SIZE + size + footer
+
+
+# --- MPEG audio (MP3) -------------------------------------------------------
+
+_MPEG_BITRATES_KBPS = {
+    (1, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (1, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (1, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (2, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (2, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (2, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+_MPEG_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),  # MPEG-1
+    2: (22050, 24000, 16000),  # MPEG-2
+    0: (11025, 12000, 8000),  # MPEG-2.5
+}
+
+
+def _parse_mpeg_frame(header: bytes) -> tuple[int, int, int, int, bool] | None:
+    """(frame length, samples, sample rate, version bits, mono) or ``None``."""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version_bits = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version_bits == 1 or layer == 4 or rate_index == 3:
+        return None
+    if bitrate_index in (0, 15):
+        return None
+
+    family = 1 if version_bits == 3 else 2
+    bitrate = _MPEG_BITRATES_KBPS[(family, layer)][bitrate_index] * 1000
+    sample_rate = _MPEG_SAMPLE_RATES[version_bits][rate_index]
+    padding = (header[2] >> 1) & 0x01
+    if layer == 1:
+        samples = 384
+        length = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 3 and family == 2:
+        samples = 576
+        length = 72 * bitrate // sample_rate + padding
+    else:
+        samples = 1152
+        length = 144 * bitrate // sample_rate + padding
+    mono = header[3] >> 6 == 3
+    return length, samples, sample_rate, version_bits, mono
+
+
+def _find_mpeg_sync(f: BinaryIO, start: int) -> int | None:
+    window = read_at(f, start, _SYNC_SEARCH_BYTES)
+    index = window.find(b"\xff")
+    while 0 <= index <= len(window) - 4:
+        frame = _parse_mpeg_frame(window[index : index + 4])
+        if frame is not None:
+            # Require the next header to line up, so stray 0xFF bytes in
+            # padding are not mistaken for a frame.
+            following = read_at(f, start + index + frame[0], 4)
+            if _parse_mpeg_frame(following) is not None:
+                return start + index
+        index = window.find(b"\xff", index + 1)
+    return None
+
+
+def _mp3_duration_ms(f: BinaryIO) -> int | None:
+    start = _find_mpeg_sync(f, _skip_id3v2(f))
+    if start is None:
+        return None
+    first = read_at(f, start, 4 + 32 + 18)
+    _, samples, sample_rate, version_bits, mono = _parse_mpeg_frame(first)
+
+    # Xing/Info (LAME, most VBR and CBR encoders) follows the side information.
+    if version_bits == 3:
+        xing_offset = 4 + (17 if mono else 32)
+    else:
+        xing_offset = 4 + (9 if mono else 17)
+    tag = first[xing_offset : xing_offset + 4]
+    if tag in (b"Xing", b"Info"):
+        flags = struct.unpack(">I", first[xing_offset + 4 : xing_offset + 8])[0]
+        if flags & 0x01:
+            frames = struct.unpack(">I", first[xing_offset + 8 : xing_offset + 12])[0]
+            return frames * samples * 1000 // sample_rate
+    # VBRI (Fraunhofer) always sits 32 bytes after the frame header.
+    if first[36:40] == b"VBRI":
+        frames = struct.unpack(">I", first[50:54])[0]
+        return frames * samples * 1000 // sample_rate
+
+    # No summary header: walk the frame headers, seeking from one to the next.
+    end = file_size(f)
+    if end >= 128 and read_at(f, end - 128, 3) == b"TAG":
+        end -= 128
+    position = start
+    total_samples = 0
+    while position + 4 <= end:
+        frame = _parse_mpeg_frame(read_at(f, position, 4))
+        if frame is None or frame[2] != sample_rate:
+            break
+        total_samples += frame[1]
+        position += frame[0]
+    return total_samples * 1000 // sample_rate
+
+
+# --- AAC in ADTS ------------------------------------------------------------
+
+_ADTS_SAMPLE_RATES = (
+    96000,
+    88200,
+    64000,
+    48000,
+    44100,
+    32000,
+    24000,
+    22050,
+    16000,
+    12000,
+    11025,
+    8000,
+    7350,
+)
+
+
+def _aac_duration_ms(f: BinaryIO) -> int | None:
+    position = _skip_id3v2(f)
+    end = file_size(f)
+    sample_rate = None
+    total_samples = 0
+    while position + 7 <= end:
+        header = read_at(f, position, 7)
+        if header[0] != 0xFF or header[1] & 0xF6 != 0xF0:
+            break
+        rate_index = (header[2] >> 2) & 0x0F
+        length = ((header[3] & 0x03) << 11) | (header[4] << 3) | (header[5] >> 5)
+        if rate_index >= len(_ADTS_SAMPLE_RATES) or length < 7:
+            break
+        if sample_rate is None:
+            sample_rate = _ADTS_SAMPLE_RATES[rate_index]
+        elif _ADTS_SAMPLE_RATES[rate_index] != sample_rate:
+            break
+        total_samples += ((header[6] & 0x03) + 1) * 1024
+        position += length
+    if sample_rate is None:
+        return None
+    return total_samples * 1000 // sample_rate
+
+
+# --- ISO BMFF (MP4, M4A, 3GP) -----------------------------------------------
+
+
+def _iter_boxes(f: BinaryIO, start: int, end: int):
+    position = start
+    while position + 8 <= end:
+        header = read_at(f, position, 16)
+        if len(header) < 8:
+            return
+        size, kind = struct.unpack(">I4s", header[:8])
+        header_size = 8
+        if size == 1:
+            if len(header) < 16:
+                return
+            size = struct.unpack(">Q", header[8:16])[0]
+            header_size = 16
+        elif size == 0:
+            size = end - position
+        if size < header_size:
+            return
+        yield kind, position + header_size, position + size
+        position += size
+
+
+def _find_box(f: BinaryIO, start: int, end: int, kind: bytes):
+    for box_kind, body_start, box_end in _iter_boxes(f, start, end):
+        if box_kind == kind:
+            return body_start, box_end
+    return None
+
+
+def _mp4_duration_ms(f: BinaryIO) -> int | None:
+    # moov is often written after mdat; skipping boxes is a single seek each.
+    moov = _find_box(f, 0, file_size(f), b"moov")
+    if moov is None:
+        return None
+    mvhd = _find_box(f, moov[0], moov[1], b"mvhd")
+    if mvhd is None:
+        return None
+    body = read_at(f, mvhd[0], 32)
+    if body[0] == 1:
+        timescale, duration = struct.unpack(">IQ", body[20:32])
+        unknown = 0xFFFFFFFFFFFFFFFF
+    else:
+        timescale, duration = struct.unpack(">II", body[12:20])
+        unknown = 0xFFFFFFFF
+
+    if duration in (0, unknown):
+        # Fragmented files carry the total in mvex/mehd instead.
+        mvex = _find_box(f, moov[0], moov[1], b"mvex")
+        mehd = mvex and _find_box(f, mvex[0], mvex[1], b"mehd")
+        if not mehd:
+            return None
+        body = read_at(f, mehd[0], 12)
+        if body[0] == 1:
+            duration = struct.unpack(">Q", body[4:12])[0]
+        else:
+            duration = struct.unpack(">I", body[4:8])[0]
+    if timescale == 0:
+        return None
+    return duration * 1000 // timescale
+
+
+# --- Ogg (Vorbis, Opus, FLAC) -----------------------------------------------
+
+
+def _ogg_duration_ms(f: BinaryIO) -> int | None:
+    first_page = read_at(f, 0, 27 + 255)
+    if not first_page.startswith(b"OggS") or len(first_page) < 27:
+        return None
+    serial = first_page[14:18]
+    segments = first_page[26]
+    packet = read_at(f, 27 + segments, 64)
+
+    pre_skip = 0
+    if packet.startswith(b"\x01vorbis"):
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+    elif packet.startswith(b"OpusHead"):
+        # Opus granule positions always count 48 kHz samples.
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        sample_rate = 48000
+    elif packet.startswith(b"\x7fFLAC"):
+        sample_rate = (packet[27] << 12) | (packet[28] << 4) | (packet[29] >> 4)
+    else:
+        return None
+    if sample_rate == 0:
+        return None
+
+    size = file_size(f)
+    tail_start = max(0, size - _OGG_TAIL_BYTES)
+    tail = read_at(f, tail_start, size - tail_start)
+    index = tail.rfind(b"OggS")
+    while index >= 0:
+        header = tail[index : index + 27]
+        if len(header) == 27 and header[4] == 0 and header[14:18] == serial:
+            granule = struct.unpack("<q", header[6:14])[0]
+            if granule >= 0:
+                return max(0, granule - pre_skip) * 1000 // sample_rate
+        index = tail.rfind(b"OggS", 0, index)
+    return None
+
+
+# --- Matroska / WebM --------------------------------------------------------
+
+_EBML_HEADER = 0x1A45DFA3
+_MKV_SEGMENT = 0x18538067
+_MKV_INFO = 0x1549A966
+_MKV_TIMECODE_SCALE = 0x2AD7B1
+_MKV_DURATION = 0x4489
+_MKV_CLUSTER = 0x1F43B675
+_MKV_CLUSTER_TIMECODE = 0xE7
+_MKV_SIMPLE_BLOCK = 0xA3
+_MKV_BLOCK_GROUP = 0xA0
+_MKV_BLOCK = 0xA1
+_MKV_CLUSTER_ID_BYTES = _MKV_CLUSTER.to_bytes(4, "big")
+
+
+def _ebml_vint(buf: bytes, pos: int, *, keep_marker: bool) -> tuple[int, int, bool]:
+    """Decode a variable-length integer: (value, next position, all-ones)."""
+    first = buf[pos]
+    if first == 0:
+        raise ValueError("invalid EBML variable-length integer")
+    length = 8 - first.bit_length() + 1
+    if pos + length > len(buf):
+        raise ValueError("truncated EBML variable-length integer")
+    value = first if keep_marker else first & ((0x80 >> (length - 1)) - 1)
+    for byte in buf[pos + 1 : pos + length]:
+        value = (value << 8) | byte
+    all_ones = not keep_marker and value == (1 << (7 * length)) - 1
+    return value, pos + length, all_ones
+
+
+def _ebml_element(buf: bytes, pos: int) -> tuple[int, int, int | None]:
+    """(element id, data position, data size or ``None`` when unknown)."""
+    element_id, pos, _ = _ebml_vint(buf, pos, keep_marker=True)
+    size, pos, unknown = _ebml_vint(buf, pos, keep_marker=False)
+    return element_id, pos, None if unknown else size
+
+
+def _read_element(f: BinaryIO, offset: int) -> tuple[int, int, int | None]:
+    header = read_at(f, offset, 12)
+    element_id, data, size = _ebml_element(header, 0)
+    return element_id, offset + data, size
+
+
+def _webm_info(f: BinaryIO, start: int, end: int) -> tuple[int, float | None]:
+    body = read_at(f, start, end - start)
+    scale, duration = 1_000_000, None
+    pos = 0
+    while pos < len(body):
+        element_id, data, size = _ebml_element(body, pos)
+        if size is None:
+            break
+        value = body[data : data + size]
+        if element_id == _MKV_TIMECODE_SCALE:
+            scale = int.from_bytes(value, "big")
+        elif element_id == _MKV_DURATION and size in (4, 8):
+            duration = struct.unpack(">f" if size == 4 else ">d", value)[0]
+        pos = data + size
+    return scale, duration
+
+
+def _block_timecode(buf: bytes, pos: int) -> int:
+    _, pos, _ = _ebml_vint(buf, pos, keep_marker=False)  # track number
+    return struct.unpack(">h", buf[pos : pos + 2])[0]
+
+
+def _last_cluster_end(buf: bytes, start: int) -> int | None:
+    """Latest block timecode of the cluster at ``start`` (TimecodeScale units)."""
+    element_id, pos, size = _ebml_element(buf, start)
+    end = len(buf) if size is None else min(len(buf), pos + size)
+    cluster_timecode = None
+    latest = None
+    while pos < end:
+        try:
+            element_id, data, size = _ebml_element(buf, pos)
+        except (ValueError, IndexError):
+            break
+        if size is None or data + size > len(buf):
+            break
+        if element_id == _MKV_CLUSTER_TIMECODE:
+            cluster_timecode = int.from_bytes(buf[data : data + size], "big")
+        elif element_id == _MKV_SIMPLE_BLOCK:
+            latest = max(latest or 0, _block_timecode(buf, data))
+        elif element_id == _MKV_BLOCK_GROUP:
+            inner, inner_data, _ = _ebml_element(buf, data)
+            if inner == _MKV_BLOCK:
+                latest = max(latest or 0, _block_timecode(buf, inner_data))
+        elif cluster_timecode is None:
+            # The cluster timecode comes first; otherwise this was not a
+            # cluster but a coincidental byte sequence.
+            return None
+        pos = data + size
+    if cluster_timecode is None:
+        return None
+    return cluster_timecode + (latest or 0)
+
+
+def _webm_duration_ms(f: BinaryIO) -> int | None:
+    size = file_size(f)
+    element_id, data, element_size = _read_element(f, 0)
+    if element_id != _EBML_HEADER or element_size is None:
+        return None
+    element_id, segment_start, segment_size = _read_element(f, data + element_size)
+    if element_id != _MKV_SEGMENT:
+        return None
+    segment_end = size if segment_size is None else segment_start + segment_size
+
+    scale = 1_000_000
+    position = segment_start
+    while position < segment_end:
+        element_id, data, element_size = _read_element(f, position)
+        if element_id == _MKV_INFO and element_size is not None:
+            scale, duration = _webm_info(f, data, data + element_size)
+            if duration is not None:
+                return int(duration * scale / 1_000_000)
+        if element_id == _MKV_CLUSTER or element_size is None:
+            break
+        position = data + element_size
+
+    # Live recordings (e.g. MediaRecorder) omit Duration: use the timecode of
+    # the last block in the last cluster instead.
+    tail_start = max(0, size - _WEBM_TAIL_BYTES)
+    tail = read_at(f, tail_start, size - tail_start)
+    index = tail.rfind(_MKV_CLUSTER_ID_BYTES)
+    while index >= 0:
+        try:
+            timecode = _last_cluster_end(tail, index)
+        except (ValueError, IndexError, struct.error):
+            timecode = None
+        if timecode is not None:
+            return int(timecode * scale / 1_000_000)
+        index = tail.rfind(_MKV_CLUSTER_ID_BYTES, 0, index)
+    return None
+
+
+# --- AIFF and WAV -----------------------------------------------------------
+
+
+def _extended_to_float(raw: bytes) -> float:
+    """IEEE 754 80-bit extended precision, as used for AIFF sample rates."""
+    exponent = ((raw[0] & 0x7F) << 8) | raw[1]
+    mantissa = int.from_bytes(raw[2:10], "big")
+    if exponent == 0 and mantissa == 0:
+        return 0.0
+    return mantissa * 2.0 ** (exponent - 16383 - 63)
+
+
+def _aiff_duration_ms(f: BinaryIO) -> int | None:
+    header = read_at(f, 0, 12)
+    if header[:4] != b"FORM" or header[8:12] not in (b"AIFF", b"AIFC"):
+        return None
+    for chunk_id, data, _ in iter_chunks(f, 12, file_size(f), "big"):
+        if chunk_id == b"COMM":
+            comm = read_at(f, data, 18)
+            frames = struct.unpack(">I", comm[2:6])[0]
+            sample_rate = _extended_to_float(comm[8:18])
+            if sample_rate <= 0:
+                return None
+            return int(frames * 1000 / sample_rate)
+    return None
+
+
+def _wav_duration_ms(f: BinaryIO) -> int | None:
+    header = read_at(f, 0, 12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    size = file_size(f)
+    byte_rate = None
+    for chunk_id, data, chunk_size in iter_chunks(f, 12, size, "little"):
+        if chunk_id == b"fmt ":
+            byte_rate = struct.unpack("<I", read_at(f, data + 8, 4))[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # Streaming writers leave the size at 0 or 0xFFFFFFFF.
+            if chunk_size in (0, 0xFFFFFFFF) or data + chunk_size > size:
+                chunk_size = size - data
+            return chunk_size * 1000 // byte_rate
+    return None
+
+
+_PARSERS: dict[str, Callable[[BinaryIO], int | None]] = {
+    "audio/mpeg": _mp3_duration_ms,
+    "audio/aac": _aac_duration_ms,
+    "audio/mp4": _mp4_duration_ms,
+    "audio/x-m4a": _mp4_duration_ms,
+    "audio/3gpp": _mp4_duration_ms,
+    "audio/3gpp2": _mp4_duration_ms,
+    "audio/ogg": _ogg_duration_ms,
+    "audio/webm": _webm_duration_ms,
+    "audio/aiff": _aiff_duration_ms,
+    "audio/wav": _wav_duration_ms,
+    "audio/x-wav": _wav_duration_ms,
+}
+
+
+def probe_duration_ms(path: Path, mime_type: str) -> int | None:
+    parser = _PARSERS.get(mime_type)
+    if parser is None:
+        return None
+    try:
+        with path.open("rb") as f:
+            duration = parser(f)
+    except (OSError, ValueError, IndexError, TypeError, struct.error):
+        return None
+    if duration is None or duration < 0:
+        return None
+    return int(duration)
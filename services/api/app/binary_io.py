@@ -0,0 +1,26 @@
+"""Positioned reads from seekable binary files, shared by the media parsers."""
+
+from collections.abc import Iterator
+import struct
+from typing import BinaryIO
+
+
+def file_size(f: BinaryIO) -> int:
+    return f.seek(0, 2)
+
+
+def read_at(f: BinaryIO, offset: int, size: int) -> bytes:
+    f.seek(offset)
+    return f.read(size)
+
+
+def iter_chunks(
+    f: BinaryIO, start: int, end: int, byteorder: str
+) -> Iterator[tuple[bytes, int, int]]:
+    """``(id, data offset, size)`` of the IFF/RIFF chunks in ``[start, end)``."""
+    fmt = ">4sI" if byteorder == "big" else "<4sI"
+    position = start
+    while position + 8 <= end:
+        chunk_id, size = struct.unpack(fmt, read_at(f, position, 8))
+        yield chunk_id, position + 8, size
+        position += 8 + size + (size & 1)
@@ -1,22 +1,89 @@
 from collections.abc import Generator
+import logging
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
+from app.metrics import DB_SESSIONS, DB_SESSIONS_OPEN
+import app.query_stats  # noqa: F401  (SQL statement accounting on every engine)
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
 Base = declarative_base()
 
-engine = create_engine(
-    f"sqlite:///{settings.data_dir / 'echo.db'}",
-    connect_args={"check_same_thread": False},
-)
+
+def sqlite_pragmas() -> dict[str, str | int]:
+    """Per-connection SQLite tuning profile, in the order it is applied."""
+    return {
+        # busy_timeout first so the journal_mode switch itself waits on locks.
+        "busy_timeout": settings.sqlite_busy_timeout_ms,
+        "journal_mode": settings.sqlite_journal_mode,
+        "synchronous": settings.sqlite_synchronous,
+        "mmap_size": settings.sqlite_mmap_size,
+        "cache_size": settings.sqlite_cache_size,
+        "temp_store": settings.sqlite_temp_store,
+    }
+
+
+def _apply_sqlite_pragmas(dbapi_connection: Any, _connection_record: Any) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas().items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def _pool_options() -> dict[str, Any]:
+    return {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def create_db_engine(url: str) -> Engine:
+    if make_url(url).get_backend_name() != "sqlite":
+        return create_engine(url, **_pool_options())
+
+    db_engine = create_engine(url, connect_args={"check_same_thread": False})
+    event.listen(db_engine, "connect", _apply_sqlite_pragmas)
+    return db_engine
+
+
+def log_sqlite_pragmas(db_engine: Engine) -> dict[str, Any]:
+    with db_engine.connect() as connection:
+        effective = {
+            name: connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+            for name in sqlite_pragmas()
+        }
+    logger.info("sqlite pragmas", extra={"pragmas": effective})
+    return effective
+
+
+def log_engine_profile(db_engine: Engine) -> dict[str, Any]:
+    if db_engine.dialect.name == "sqlite":
+        return log_sqlite_pragmas(db_engine)
+    profile = {"dialect": db_engine.dialect.name, **_pool_options()}
+    logger.info("database pool", extra={"pool": profile})
+    return profile
+
+
+engine = create_db_engine(settings.sqlalchemy_database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
+    DB_SESSIONS.inc()
+    DB_SESSIONS_OPEN.inc()
     try:
         yield db
     finally:
         db.close()
+        DB_SESSIONS_OPEN.dec()
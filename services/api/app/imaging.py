@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# JPEG start-of-frame markers carrying the frame dimensions (DHT, JPG and DAC
+# share the 0xC? range but are not frame headers).
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xD8)) | {0x01}
+_JPEG_SOS = 0xDA
+_JPEG_EOI = 0xD9
+
+
+class ImageDimensionProbe:
+    """Extracts image dimensions incrementally from an upload stream.
+
+    Chunks are fed in order as they are written to disk. Only the bytes needed
+    to reach the header are buffered; JPEG segments before the frame header
+    are skipped by length, so parsing cost does not depend on file size.
+    Once the dimensions are known (or the stream proves unparseable) further
+    chunks are ignored.
+    """
+
+    def __init__(self, mime: str) -> None:
+        self.mime = mime
+        self.width: int | None = None
+        self.height: int | None = None
+        self.done = mime not in {"image/png", "image/jpeg", "image/jpg", "image/webp"}
+        self._pending = b""
+        self._skip = 0
+        self._in_jpeg_segments = False
+
+    @property
+    def dimensions(self) -> tuple[int | None, int | None]:
+        return self.width, self.height
+
+    def feed(self, chunk: bytes) -> None:
+        if self.done or not chunk:
+            return
+        if self._skip:
+            if len(chunk) <= self._skip:
+                self._skip -= len(chunk)
+                return
+            chunk = chunk[self._skip :]
+            self._skip = 0
+
+        data = self._pending + chunk if self._pending else chunk
+        consumed = self._parse(data)
+        self._pending = b"" if self.done else bytes(data[consumed:])
+
+    def _finish(self, width: int | None = None, height: int | None = None) -> int:
+        self.width, self.height = width, height
+        self.done = True
+        return 0
+
+    def _parse(self, data: bytes) -> int:
+        if self.mime == "image/png":
+            return self._parse_png(data)
+        if self.mime == "image/webp":
+            return self._parse_webp(data)
+        return self._parse_jpeg(data)
+
+    def _parse_png(self, data: bytes) -> int:
+        if len(data) < 24:
+            return 0
+        if not data.startswith(PNG_SIGNATURE) or data[12:16] != b"IHDR":
+            return self._finish()
+        return self._finish(
+            int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+        )
+
+    def _parse_webp(self, data: bytes) -> int:
+        if len(data) < 30:
+            return 0
+        if not data.startswith(b"RIFF") or data[8:12] != b"WEBP":
+            return self._finish()
+
+        fourcc = data[12:16]
+        if fourcc == b"VP8 " and data[23:26] == b"\x9d\x01\x2a":
+            return self._finish(
+                int.from_bytes(data[26:28], "little") & 0x3FFF,
+                int.from_bytes(data[28:30], "little") & 0x3FFF,
+            )
+        if fourcc == b"VP8L" and data[20] == 0x2F:
+            bits = int.from_bytes(data[21:25], "little")
+            return self._finish((bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+        if fourcc == b"VP8X":
+            return self._finish(
+                int.from_bytes(data[24:27], "little") + 1,
+                int.from_bytes(data[27:30], "little") + 1,
+            )
+        return self._finish()
+
+    def _parse_jpeg(self, data: bytes) -> int:
+        idx = 0
+        if not self._in_jpeg_segments:
+            if len(data) < 2:
+                return 0
+            if data[:2] != b"\xff\xd8":
+                return self._finish()
+            self._in_jpeg_segments = True
+            idx = 2
+
+        total = len(data)
+        while idx + 2 <= total:
+            if data[idx] != 0xFF:
+                return self._finish()
+            marker = data[idx + 1]
+            if marker == 0xFF:
+                # Fill byte before the actual marker.
+                idx += 1
+                continue
+            if marker in _JPEG_STANDALONE_MARKERS:
+                idx += 2
+                continue
+            if marker in {_JPEG_SOS, _JPEG_EOI}:
+                # The frame header always precedes the scan data.
+                return self._finish()
+
+            if idx + 4 > total:
+                break
+            seg_len = int.from_bytes(data[idx + 2 : idx + 4], "big")
+            if seg_len < 2:
+                return self._finish()
+            if marker in _JPEG_SOF_MARKERS:
+                if idx + 9 > total:
+                    break
+                return self._finish(
+                    int.from_bytes(data[idx + 7 : idx + 9], "big"),
+                    int.from_bytes(data[idx + 5 : idx + 7], "big"),
+                )
+
+            next_idx = idx + 2 + seg_len
+            if next_idx > total:
+                self._skip = next_idx - total
+                return total
+            idx = next_idx
+        return idx
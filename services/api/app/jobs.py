@@ -0,0 +1,312 @@
+"""Durable job queue stored in the application database.
+
+Jobs are inserted in the same transaction as the rows they work on, claimed
+with a conditional UPDATE (so several threads or processes can poll the same
+table), and retried with exponential backoff. A claimed job holds a lease:
+if its worker dies, the job becomes claimable again once the lease expires.
+"""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+import logging
+import os
+from pathlib import Path
+import socket
+import threading
+from typing import Any, Literal
+
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models import Job
+from app.object_storage import (
+    LocalMediaStorage,
+    MediaStorage,
+    media_storage_from_settings,
+)
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+JobHandler = Callable[[Session, MediaStorage, dict[str, Any]], None]
+JobFailureHandler = Callable[[Session, dict[str, Any]], None]
+
+# Only the first entries of the runnable set are tried per claim, which keeps
+# the claim query on the (status, run_after, id) index.
+_CLAIM_BATCH = 8
+_MAX_ERROR_CHARS = 2000
+
+
+@dataclass(frozen=True)
+class JobKind:
+    run: JobHandler
+    # Called, in the failing job's transaction, once retries are exhausted.
+    on_failure: JobFailureHandler | None = None
+
+
+JOB_KINDS: dict[str, JobKind] = {}
+
+
+def job_kind(
+    name: str, *, on_failure: JobFailureHandler | None = None
+) -> Callable[[JobHandler], JobHandler]:
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_KINDS[name] = JobKind(run=handler, on_failure=on_failure)
+        return handler
+
+    return register
+
+
+@dataclass(frozen=True)
+class JobQueueConfig:
+    data_dir: Path
+    max_attempts: int = 5
+    retry_base_seconds: float = 5.0
+    lease_seconds: float = 300.0
+    poll_interval_seconds: float = 1.0
+    concurrency: int = 2
+    # Where handlers read and write media; defaults to files under data_dir.
+    storage: MediaStorage | None = None
+
+    @property
+    def media_storage(self) -> MediaStorage:
+        return self.storage or LocalMediaStorage(self.data_dir)
+
+    @classmethod
+    def from_settings(cls, settings: Any) -> "JobQueueConfig":
+        return cls(
+            data_dir=settings.data_dir,
+            max_attempts=settings.job_max_attempts,
+            retry_base_seconds=settings.job_retry_base_seconds,
+            lease_seconds=settings.job_lease_seconds,
+            poll_interval_seconds=settings.job_poll_interval_seconds,
+            concurrency=settings.job_worker_concurrency,
+            storage=media_storage_from_settings(settings),
+        )
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def enqueue_job(
+    db: Session,
+    kind: str,
+    payload: dict[str, Any],
+    *,
+    user_id: str | None = None,
+    max_attempts: int = 5,
+) -> Job:
+    """Add a job to the session; it becomes visible when the caller commits."""
+    job = Job(
+        kind=kind,
+        payload=payload,
+        user_id=user_id,
+        status="queued",
+        attempts=0,
+        max_attempts=max_attempts,
+        run_after=utcnow(),
+    )
+    db.add(job)
+    return job
+
+
+def _claimable(now: datetime, lease_seconds: float):
+    return or_(
+        and_(Job.status == "queued", Job.run_after <= now),
+        and_(
+            Job.status == "running",
+            Job.locked_at < now - timedelta(seconds=lease_seconds),
+        ),
+    )
+
+
+def claim_next_job(
+    db: Session, worker_id: str, config: JobQueueConfig, now: datetime | None = None
+) -> int | None:
+    """Lease the next runnable job to ``worker_id`` and return its id."""
+    now = now or utcnow()
+    claimable = _claimable(now, config.lease_seconds)
+    candidates = (
+        db.execute(
+            select(Job.id)
+            .where(claimable)
+            .order_by(Job.run_after, Job.id)
+            .limit(_CLAIM_BATCH)
+        )
+        .scalars()
+        .all()
+    )
+    for job_id in candidates:
+        # Another worker may have claimed it since the SELECT: only one
+        # conditional UPDATE can match.
+        claimed = db.execute(
+            update(Job)
+            .where(Job.id == job_id, claimable)
+            .values(
+                status="running",
+                locked_by=worker_id,
+                locked_at=now,
+                attempts=Job.attempts + 1,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        if claimed.rowcount == 1:
+            return job_id
+    db.rollback()
+    return None
+
+
+def _format_error(exc: BaseException) -> str:
+    return f"{type(exc).__name__}: {exc}"[:_MAX_ERROR_CHARS]
+
+
+def run_job(
+    session_factory: Callable[[], Session],
+    job_id: int,
+    config: JobQueueConfig,
+    now: datetime | None = None,
+) -> JobStatus:
+    """Execute a claimed job and record its outcome.
+
+    The handler's changes and the job's new status are committed together.
+    """
+    with session_factory() as db:
+        job = db.get(Job, job_id)
+        if job is None:
+            return "failed"
+        kind = JOB_KINDS.get(job.kind)
+        payload = dict(job.payload)
+        try:
+            if kind is None:
+                raise LookupError(f"No handler registered for job kind {job.kind!r}")
+            if job.attempts > job.max_attempts:
+                # Reclaimed after its last attempt's lease expired.
+                raise TimeoutError("Job lease expired on its final attempt")
+            kind.run(db, config.media_storage, payload)
+        except Exception as exc:
+            db.rollback()
+            job = db.get(Job, job_id)
+            now = now or utcnow()
+            job.locked_by = None
+            job.locked_at = None
+            job.last_error = _format_error(exc)
+            if kind is None or job.attempts >= job.max_attempts:
+                job.status = "failed"
+                job.finished_at = now
+                if kind is not None and kind.on_failure is not None:
+                    kind.on_failure(db, payload)
+                logger.exception(
+                    "job failed", extra={"job_id": job_id, "kind": job.kind}
+                )
+            else:
+                delay = config.retry_base_seconds * 2 ** (job.attempts - 1)
+                job.status = "queued"
+                job.run_after = now + timedelta(seconds=delay)
+                logger.warning(
+                    "job attempt failed, retrying",
+                    extra={"job_id": job_id, "kind": job.kind, "delay": delay},
+                    exc_info=True,
+                )
+            db.commit()
+            return job.status
+
+        job.status = "succeeded"
+        job.locked_by = None
+        job.locked_at = None
+        job.last_error = None
+        job.finished_at = now or utcnow()
+        db.commit()
+        return "succeeded"
+
+
+def run_pending_jobs(
+    session_factory: Callable[[], Session],
+    config: JobQueueConfig,
+    *,
+    worker_id: str = "inline",
+    now: datetime | None = None,
+) -> int:
+    """Run every currently runnable job in the calling thread.
+
+    Jobs rescheduled for a later retry are not picked up again.
+    """
+    count = 0
+    while True:
+        with session_factory() as db:
+            job_id = claim_next_job(db, worker_id, config, now)
+        if job_id is None:
+            return count
+        run_job(session_factory, job_id, config, now)
+        count += 1
+
+
+# Set after a commit that enqueued jobs so idle in-process runners skip the
+# rest of their poll interval.
+_jobs_available = threading.Event()
+
+
+def notify_job_runners() -> None:
+    _jobs_available.set()
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class JobRunner:
+    """Polling worker threads, used in-process or by ``python -m app.worker``."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        config: JobQueueConfig,
+        worker_id: str | None = None,
+    ) -> None:
+        self.session_factory = session_factory
+        self.config = config
+        self.worker_id = worker_id or default_worker_id()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+
+    def start(self) -> None:
+        self._stop.clear()
+        for index in range(max(1, self.config.concurrency)):
+            thread = threading.Thread(
+                target=self._loop,
+                args=(f"{self.worker_id}/{index}",),
+                name=f"job-runner-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def request_stop(self) -> None:
+        """Ask the threads to exit once their current job is done."""
+        self._stop.set()
+        _jobs_available.set()
+
+    def join(self, timeout: float | None = None) -> None:
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.request_stop()
+        self.join(timeout)
+        self._threads.clear()
+
+    def _loop(self, worker_id: str) -> None:
+        while not self._stop.is_set():
+            try:
+                with self.session_factory() as db:
+                    job_id = claim_next_job(db, worker_id, self.config)
+                if job_id is not None:
+                    run_job(self.session_factory, job_id, self.config)
+                    continue
+            except Exception:
+                logger.exception("job runner iteration failed")
+            _jobs_available.wait(self.config.poll_interval_seconds)
+            _jobs_available.clear()
@@ -0,0 +1,93 @@
+"""Memory density over time for the Life Line (docs/life-line-prototype-v0.md).
+
+``lifeline_buckets`` keeps, per user and calendar month of
+``Entry.created_at`` (UTC), how many entries and media files (audio plus
+images) were recorded. Handlers that create or delete entries and media
+adjust it in the same transaction, so ``GET /lifeline`` reads at most
+twelve rows per year instead of scanning every entry.
+"""
+
+from datetime import datetime
+from typing import Literal
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app.media import strong_etag
+from app.models import Entry, LifelineBucket
+
+LifelineGranularity = Literal["year", "month"]
+
+# Dialects whose INSERT supports ON CONFLICT DO UPDATE, used for the upsert.
+_UPSERT_DIALECTS = {"postgresql": postgresql, "sqlite": sqlite}
+
+
+def entry_media_count(entry: Entry) -> int:
+    """Media files of ``entry``: its audio (unless deleted) and its images."""
+    return int(strong_etag(entry.audio_sha256) is not None) + len(entry.assets)
+
+
+def adjust_lifeline(
+    db: Session,
+    user_id: str,
+    created_at: datetime,
+    *,
+    entries: int = 0,
+    media: int = 0,
+) -> None:
+    """Add ``entries`` and ``media`` (possibly negative) to a month bucket."""
+    if not entries and not media:
+        return
+    dialect_name = db.get_bind().dialect.name
+    dialect = _UPSERT_DIALECTS.get(dialect_name)
+    if dialect is None:
+        raise RuntimeError(
+            f"Life Line buckets need SQLite or PostgreSQL, not {dialect_name!r}"
+        )
+    insert = dialect.insert(LifelineBucket).values(
+        user_id=user_id,
+        year=created_at.year,
+        month=created_at.month,
+        entry_count=entries,
+        media_count=media,
+    )
+    db.execute(
+        insert.on_conflict_do_update(
+            index_elements=["user_id", "year", "month"],
+            set_={
+                "entry_count": LifelineBucket.entry_count + insert.excluded.entry_count,
+                "media_count": LifelineBucket.media_count + insert.excluded.media_count,
+            },
+        )
+    )
+
+
+def lifeline_buckets(
+    db: Session, user_id: str, granularity: LifelineGranularity
+) -> list[dict[str, int | None]]:
+    """Non-empty buckets of ``user_id`` in chronological order."""
+    if granularity == "month":
+        columns = (LifelineBucket.year, LifelineBucket.month)
+    else:
+        columns = (LifelineBucket.year,)
+    rows = db.execute(
+        select(
+            *columns,
+            func.sum(LifelineBucket.entry_count).label("entry_count"),
+            func.sum(LifelineBucket.media_count).label("media_count"),
+        )
+        .where(LifelineBucket.user_id == user_id)
+        .group_by(*columns)
+        .having(func.sum(LifelineBucket.entry_count) > 0)
+        .order_by(*columns)
+    ).all()
+    return [
+        {
+            "year": row.year,
+            "month": row.month if granularity == "month" else None,
+            "entry_count": int(row.entry_count),
+            "media_count": int(row.media_count),
+        }
+        for row in rows
+    ]
@@ -1,7 +1,12 @@
-from datetime import date
+import asyncio
+import base64
+import binascii
+from datetime import date, datetime
 from contextlib import asynccontextmanager
+import json
 import logging
 from pathlib import Path
+import time
 from typing import Literal
 import uuid
 
@@ -14,35 +19,104 @@ from fastapi import (
     HTTPException,
     Query,
     Request,
+    Response,
     UploadFile,
 )
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import FileResponse, JSONResponse
-from sqlalchemy import func, inspect, select
+from fastapi.responses import JSONResponse, RedirectResponse
+from sqlalchemy import String, func, inspect, select, tuple_, type_coerce
 from sqlalchemy.orm import Session, selectinload
 
-from app.db import engine, get_db
-from app.middleware.request_id import RequestIdMiddleware, configure_json_logging
-from app.models import Entry, EntryAsset, Question, User
+from app.db import (
+    SessionLocal,
+    engine,
+    get_db,
+    log_engine_profile,
+)
+from app.imaging import ImageDimensionProbe
+from app.jobs import JobQueueConfig, JobRunner, notify_job_runners
+from app.lifeline import adjust_lifeline, entry_media_count
+from app.middleware.request_id import (
+    RequestIdMiddleware,
+    configure_json_logging,
+    stop_json_logging,
+)
+from app.media import (
+    IMMUTABLE_CACHE_CONTROL,
+    REVALIDATE_CACHE_CONTROL,
+    SignedMedia,
+    media_file_response,
+    media_signing_key,
+    not_modified_response,
+    offloaded_media_response,
+    read_media_token,
+    sign_media_token,
+    signed_media_cache_control,
+    signed_media_expiry,
+    storage_media_response,
+    strong_etag,
+)
+from app.models import (
+    Entry,
+    EntryAsset,
+    EntryAssetVariant,
+    Question,
+    UploadSession,
+    User,
+)
+from app.media_store import commit_blob, release_media, settle_blobs, staging_key
+from app.object_storage import (
+    MediaStorage,
+    UploadSink,
+    media_storage_from_settings,
+)
+from app.processing import (
+    enqueue_asset_image_processing,
+    enqueue_entry_audio_processing,
+)
 from app.routes.auth import router as auth_router
+from app.routes.jobs import router as jobs_router
+from app.routes.lifeline import router as lifeline_router
+from app.routes.metrics import router as metrics_router
 from app.routes.system import router as system_router
+from app.routes.uploads import router as uploads_router
 from app.schemas import (
+    AssetUploadResult,
+    AudioPeaksOut,
+    EntriesBatchGetIn,
+    EntriesBatchGetResponse,
     EntriesListResponse,
+    EntryBatchError,
     EntryAssetOut,
+    EntryAssetsBatchResponse,
     EntryOut,
+    EntrySearchHitOut,
+    EntrySearchResponse,
     EntryUpdateIn,
     QuestionOut,
 )
-from app.security import get_current_user, hash_password
+from app.search import fts_match_expression, search_available, search_entries
+from app.security import AuthenticatedUser, get_current_user, hash_password
 from app.settings import settings
 from app.storage import (
     ALLOWED_IMAGE_MIME_TYPES,
     ALLOWED_MIME_TYPES,
-    stream_upload_to_disk,
+    configure_upload_executor,
+    run_upload_io,
+    shutdown_upload_executor,
+    stream_upload,
     validate_image_signature,
 )
+from app.thumbnails import ImageVariant
+from app.uploads import (
+    StoredUploadReader,
+    delete_upload_chunks,
+    ensure_upload_complete,
+    get_user_upload,
+)
+from app.waveform import PEAKS_MIME, decode_peaks, peaks_path
 
 logger = logging.getLogger(__name__)
 api_v1_router = APIRouter(prefix="/api/v1")
@@ -50,19 +124,31 @@ api_v1_router = APIRouter(prefix="/api/v1")
 
 @asynccontextmanager
 async def lifespan(_: FastAPI):
-    configure_json_logging()
+    configure_json_logging(queue_size=settings.log_queue_size)
     settings.data_dir.mkdir(parents=True, exist_ok=True)
     settings.audio_dir.mkdir(parents=True, exist_ok=True)
     settings.images_dir.mkdir(parents=True, exist_ok=True)
-    if not inspect(engine).has_table("entries"):
-        logger.warning("Database not initialized. Run: alembic upgrade head")
+    configure_upload_executor(settings.upload_io_workers)
+    job_runner: JobRunner | None = None
+    try:
+        log_engine_profile(engine)
+        if not inspect(engine).has_table("entries"):
+            logger.warning("Database not initialized. Run: alembic upgrade head")
+            yield
+            return
+
+        with Session(engine) as db:
+            _seed_admin_user(db)
+
+        if settings.job_runner_in_process:
+            job_runner = JobRunner(SessionLocal, JobQueueConfig.from_settings(settings))
+            job_runner.start()
         yield
-        return
-
-    with Session(engine) as db:
-        _seed_admin_user(db)
-
-    yield
+    finally:
+        if job_runner is not None:
+            job_runner.stop()
+        shutdown_upload_executor()
+        stop_json_logging()
 
 
 app = FastAPI(title=settings.app_name, version=settings.app_version, lifespan=lifespan)
@@ -73,6 +159,17 @@ FROZEN_ERROR = {
     "detail": "Entry is frozen and cannot be modified",
 }
 
+EntrySort = Literal["created_at_desc", "created_at_asc", "id_asc", "id_desc"]
+
+# SQLite stores ``created_at`` as text, with the precision it was written with
+# (server default vs. application-provided timestamps). Cursors there carry
+# this raw text so that keyset comparisons match rows byte-for-byte; other
+# backends compare the typed column with an aware datetime.
+_ENTRY_CREATED_AT_TEXT = type_coerce(Entry.created_at, String)
+
+# Assets and their image variants, loaded in two IN queries per page.
+_LOAD_ENTRY_ASSETS = selectinload(Entry.assets).selectinload(EntryAsset.variants)
+
 if "*" in settings.allowed_origins:
     raise RuntimeError("Wildcard origin '*' is not allowed in ALLOWED_ORIGINS")
 
@@ -80,11 +177,16 @@ app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.allowed_origins,
     allow_credentials=True,
-    allow_methods=["GET", "POST", "PATCH", "PUT", "DELETE", "OPTIONS"],
-    allow_headers=["Authorization", "Content-Type"],
+    allow_methods=["GET", "HEAD", "POST", "PATCH", "PUT", "DELETE", "OPTIONS"],
+    allow_headers=["Authorization", "Content-Type", "Upload-Offset"],
+    expose_headers=["Location", "Upload-Offset", "Upload-Length", "Server-Timing"],
 )
 app.add_middleware(TrustedHostMiddleware, allowed_hosts=settings.allowed_hosts)
-app.add_middleware(RequestIdMiddleware)
+app.add_middleware(
+    RequestIdMiddleware,
+    access_log_sample_rate=settings.access_log_sample_rate,
+    server_timing=settings.server_timing_enabled,
+)
 
 
 @app.middleware("http")
@@ -140,6 +242,7 @@ def http_exception_handler(_, exc: HTTPException) -> JSONResponse:
     return JSONResponse(
         status_code=exc.status_code,
         content={"error": error},
+        headers=exc.headers,
     )
 
 
@@ -204,20 +307,208 @@ def _get_entry_or_404(
 ) -> Entry:
     query = select(Entry).where(Entry.id == entry_id)
     if load_assets:
-        query = query.options(selectinload(Entry.assets))
+        query = query.options(_LOAD_ENTRY_ASSETS)
     entry = db.execute(query).scalar_one_or_none()
     if entry is None:
         raise HTTPException(status_code=404, detail="Entry not found")
     return entry
 
 
-def _ensure_owner(entry: Entry, current_user: User) -> None:
+def _ensure_owner(entry: Entry, current_user: AuthenticatedUser) -> None:
     if entry.user_id != current_user.id:
         raise HTTPException(
             status_code=403, detail={"code": "forbidden", "message": "Not allowed"}
         )
 
 
+def _discard_unshared_peaks(
+    db: Session, audio_sha256: str | None, entry_id: str
+) -> None:
+    """Remove the peaks sidecar once no other entry has the same audio."""
+    if strong_etag(audio_sha256) is None:
+        return
+    shared = db.scalar(
+        select(Entry.id)
+        .where(Entry.audio_sha256 == audio_sha256, Entry.id != entry_id)
+        .limit(1)
+    )
+    if shared is None:
+        _media_storage().delete(peaks_path(audio_sha256))
+
+
+def _media_storage() -> MediaStorage:
+    return media_storage_from_settings(settings)
+
+
+def _upload_destination(per_entry_path: Path) -> str:
+    if settings.media_storage_layout == "content_addressed":
+        return staging_key()
+    return str(per_entry_path)
+
+
+def _open_upload(key: str, content_type: str) -> UploadSink:
+    return _media_storage().open_upload(key, content_type)
+
+
+async def _stored_media_path(destination: str, sha256: str, owner_id: str) -> str:
+    """Key recorded on the row ``owner_id`` for an upload to ``destination``.
+
+    Call ``_settle_media`` for the row once it is committed or abandoned.
+    """
+    if settings.media_storage_layout == "content_addressed":
+        return await run_upload_io(
+            commit_blob, _media_storage(), destination, sha256, owner_id
+        )
+    return destination
+
+
+async def _settle_media(owners: list[tuple[str | None, str]]) -> None:
+    await run_upload_io(settle_blobs, _media_storage(), owners)
+
+
+async def _receive_entry_audio(
+    db: Session,
+    current_user: AuthenticatedUser,
+    entry_id: str,
+    audio_file: UploadFile | None,
+    upload_id: str | None,
+) -> tuple[dict[str, int | str], UploadSession | None]:
+    """Store entry audio sent as ``audio_file`` or as a finished ``/uploads``.
+
+    Returns the stored file (path, mime, size, sha256) and the upload session
+    to delete with the chunks once the entry is committed.
+    """
+    if (audio_file is None) == (upload_id is None):
+        raise HTTPException(
+            status_code=400,
+            detail={
+                "code": "audio_source_conflict",
+                "message": "Send either audio_file or upload_id",
+            },
+        )
+    upload: UploadSession | None = None
+    if upload_id is not None:
+        upload = get_user_upload(db, upload_id, current_user.id)
+        ensure_upload_complete(upload)
+        content_type = upload.content_type
+        source = StoredUploadReader(_media_storage(), upload)
+    else:
+        content_type = audio_file.content_type or ""
+        source = audio_file
+    if content_type not in ALLOWED_MIME_TYPES:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "unsupported_mime",
+                "message": "Unsupported audio MIME type",
+            },
+        )
+
+    ext = ALLOWED_MIME_TYPES[content_type]
+    destination = _upload_destination(Path("audio") / f"{entry_id}{ext}")
+    upload_info = await stream_upload(
+        upload=source,
+        sink=_open_upload(destination, content_type),
+        max_bytes=settings.max_upload_bytes,
+        expected_mime=content_type,
+        expected_ext=ext,
+    )
+    sha256 = str(upload_info["sha256"])
+    stored = {
+        "path": await _stored_media_path(destination, sha256, entry_id),
+        "mime": content_type,
+        "size": int(upload_info["size"]),
+        "sha256": sha256,
+    }
+    return stored, upload
+
+
+def _finish_upload(db: Session, upload: UploadSession | None) -> list[str]:
+    """Delete a consumed upload session; returns its chunks to remove."""
+    if upload is None:
+        return []
+    db.delete(upload)
+    return list(upload.chunks)
+
+
+def _ensure_image_quota(db: Session, entry_id: str, *, adding: int) -> None:
+    existing_assets_count = db.execute(
+        select(func.count())
+        .select_from(EntryAsset)
+        .where(
+            EntryAsset.entry_id == entry_id,
+            EntryAsset.asset_type == "image",
+        )
+    ).scalar_one()
+    if existing_assets_count + adding > settings.max_images_per_entry:
+        raise _too_many_assets()
+
+
+def _too_many_assets() -> HTTPException:
+    return HTTPException(
+        status_code=422,
+        detail={
+            "code": "too_many_assets",
+            "message": (
+                f"Entry reached MAX_IMAGES_PER_ENTRY ({settings.max_images_per_entry})"
+            ),
+        },
+    )
+
+
+async def _store_image_asset(entry: Entry, file: UploadFile) -> EntryAsset:
+    """Validate and store an uploaded image; returns its unsaved row."""
+    content_type = file.content_type or ""
+    if content_type not in ALLOWED_IMAGE_MIME_TYPES:
+        logger.warning(
+            "asset upload 422: unsupported_image_mime content_type=%r allowed=%s",
+            content_type,
+            list(ALLOWED_IMAGE_MIME_TYPES.keys()),
+        )
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "unsupported_image_mime",
+                "message": "Unsupported image MIME type",
+            },
+        )
+
+    asset_id = str(uuid.uuid4())
+    ext = ALLOWED_IMAGE_MIME_TYPES[content_type]
+    relative_path = Path("images") / entry.id / f"{asset_id}{ext}"
+    destination = _upload_destination(relative_path)
+
+    probe = ImageDimensionProbe(content_type)
+    upload_info = await stream_upload(
+        upload=file,
+        sink=_open_upload(destination, content_type),
+        max_bytes=settings.max_upload_image_bytes,
+        expected_mime=content_type,
+        expected_ext=ext,
+        signature_validator=validate_image_signature,
+        invalid_signature_error_code="invalid_image_signature",
+        invalid_signature_error_message="Image signature does not match MIME type",
+        payload_too_large_error_message="Image file exceeds upload size limit",
+        chunk_observer=probe.feed,
+    )
+    width, height = probe.dimensions
+    sha256 = str(upload_info["sha256"])
+    stored_path = await _stored_media_path(destination, sha256, asset_id)
+
+    return EntryAsset(
+        id=asset_id,
+        entry_id=entry.id,
+        user_id=entry.user_id,
+        asset_type="image",
+        path=stored_path,
+        mime=content_type,
+        size=int(upload_info["size"]),
+        sha256=sha256,
+        width=width,
+        height=height,
+    )
+
+
 def _ensure_not_frozen(entry: Entry) -> None:
     if entry.is_frozen:
         raise HTTPException(status_code=409, detail=FROZEN_ERROR)
@@ -239,83 +530,207 @@ def _validate_text_content(text_content: str | None) -> None:
         )
 
 
-def _parse_image_dimensions(path: Path, mime: str) -> tuple[int | None, int | None]:
+def _invalid_cursor(message: str) -> HTTPException:
+    return HTTPException(
+        status_code=422, detail={"code": "invalid_cursor", "message": message}
+    )
+
+
+def _entry_created_at_key(dialect_name: str):
+    """``created_at`` as compared by entries cursors on ``dialect_name``."""
+    if dialect_name == "sqlite":
+        return _ENTRY_CREATED_AT_TEXT
+    return Entry.created_at
+
+
+def _encode_entries_cursor(
+    sort: EntrySort, created_at_key: str | datetime, entry_id: str
+) -> str:
+    if isinstance(created_at_key, datetime):
+        created_at_key = created_at_key.isoformat()
+    payload = json.dumps(
+        {"s": sort, "c": created_at_key, "i": entry_id}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_entries_cursor(
+    cursor: str, sort: EntrySort, dialect_name: str
+) -> tuple[str | datetime, str]:
     try:
-        data = path.read_bytes()
-    except OSError:
-        return None, None
-
-    if (
-        mime == "image/png"
-        and len(data) >= 24
-        and data.startswith(b"\x89PNG\r\n\x1a\n")
-    ):
-        width = int.from_bytes(data[16:20], "big")
-        height = int.from_bytes(data[20:24], "big")
-        return width, height
-
-    if mime == "image/jpeg":
-        idx = 2
-        total = len(data)
-        while idx + 9 < total:
-            if data[idx] != 0xFF:
-                idx += 1
-                continue
-            marker = data[idx + 1]
-            idx += 2
-            while marker == 0xFF and idx < total:
-                marker = data[idx]
-                idx += 1
-            if marker in {0xD8, 0xD9} or 0xD0 <= marker <= 0xD7:
-                continue
-            if idx + 1 >= total:
-                break
-            seg_len = (data[idx] << 8) + data[idx + 1]
-            if seg_len < 2 or idx + seg_len > total:
-                break
-            if marker in {0xC0, 0xC2} and seg_len >= 7:
-                height = (data[idx + 3] << 8) + data[idx + 4]
-                width = (data[idx + 5] << 8) + data[idx + 6]
-                return width, height
-            idx += seg_len
-
-    return None, None
-
-
-def _asset_download_url(request: Request, asset_id: str) -> str:
-    return str(request.url_for("download_asset", asset_id=asset_id))
-
-
-def _entry_audio_url(request: Request, entry_id: str) -> str:
-    return str(request.url_for("get_entry_audio", entry_id=entry_id))
-
-
-def _serialize_asset(request: Request, asset: EntryAsset) -> EntryAssetOut:
-    serialized = EntryAssetOut.model_validate(asset, from_attributes=True)
-    return serialized.model_copy(
-        update={"download_url": _asset_download_url(request, asset.id)}
-    )
-
-
-def _serialize_entry(request: Request, entry: Entry) -> EntryOut:
-    serialized = EntryOut.model_validate(entry, from_attributes=True)
-    assets = list(entry.assets or [])
-    assets = [asset for asset in assets if asset.asset_type == "image"]
-    return serialized.model_copy(
-        update={
-            "assets": [_serialize_asset(request, asset) for asset in assets],
-            "audio_url": (
-                _entry_audio_url(request, entry.id)
-                if entry.audio_path is not None and entry.audio_mime is not None
-                else None
-            ),
-        }
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_sort = payload["s"]
+        created_at_key: str | datetime = str(payload["c"])
+        entry_id = str(payload["i"])
+        if dialect_name != "sqlite":
+            created_at_key = datetime.fromisoformat(created_at_key)
+    except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+        raise _invalid_cursor("Malformed pagination cursor") from exc
+    if isinstance(created_at_key, datetime) and created_at_key.tzinfo is None:
+        raise _invalid_cursor("Malformed pagination cursor")
+    if cursor_sort != sort:
+        raise _invalid_cursor("Cursor was issued for a different sort order")
+    return created_at_key, entry_id
+
+
+def _entries_after_cursor(
+    sort: EntrySort,
+    created_at_key: str | datetime,
+    entry_id: str,
+    dialect_name: str,
+):
+    key = tuple_(_entry_created_at_key(dialect_name), Entry.id)
+    if sort == "created_at_desc":
+        return key < (created_at_key, entry_id)
+    if sort == "created_at_asc":
+        return key > (created_at_key, entry_id)
+    if sort == "id_asc":
+        return Entry.id > entry_id
+    return Entry.id < entry_id
+
+
+def _encode_search_cursor(query: str, rank: float, rowid: int) -> str:
+    payload = json.dumps({"q": query, "r": rank, "o": rowid}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_search_cursor(cursor: str, query: str) -> tuple[float, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        cursor_query = payload["q"]
+        rank = float(payload["r"])
+        rowid = int(payload["o"])
+    except (ValueError, KeyError, TypeError, binascii.Error) as exc:
+        raise _invalid_cursor("Malformed pagination cursor") from exc
+    if cursor_query != query:
+        raise _invalid_cursor("Cursor was issued for a different query")
+    return rank, rowid
+
+
+_URL_PLACEHOLDER = "__echo_url_param__"
+
+
+def _media_signing_key() -> bytes | None:
+    if not settings.media_signed_urls:
+        return None
+    secret = settings.media_url_secret_key or settings.jwt_secret_key
+    return media_signing_key(secret) if secret else None
+
+
+class _MediaUrls:
+    """Media URL builder for one request.
+
+    Route lookup happens once per route name; each URL is then a plain string
+    concatenation, which matters when a page holds hundreds of assets. With
+    MEDIA_SIGNED_URLS, URLs point at download_signed_media instead and carry
+    everything needed to serve the file.
+    """
+
+    def __init__(self, request: Request) -> None:
+        self._signing_key = _media_signing_key()
+        if self._signing_key is not None:
+            self._signed = self._template(request, "download_signed_media", "token")
+            self._expires_at = signed_media_expiry(
+                time.time(), settings.media_signed_url_ttl_seconds
+            )
+        self._asset = self._template(request, "download_asset", "asset_id")
+        self._audio = self._template(request, "get_entry_audio", "entry_id")
+
+    @staticmethod
+    def _template(request: Request, name: str, param: str) -> tuple[str, str]:
+        url = str(request.url_for(name, **{param: _URL_PLACEHOLDER}))
+        prefix, _, suffix = url.partition(_URL_PLACEHOLDER)
+        return prefix, suffix
+
+    def _sign(self, *fields: str | None) -> str:
+        media = SignedMedia(*fields, expires_at=self._expires_at)
+        token = sign_media_token(self._signing_key, media)
+        return f"{self._signed[0]}{token}{self._signed[1]}"
+
+    def asset(self, asset: EntryAsset) -> str:
+        if self._signing_key is not None:
+            return self._sign(
+                "asset", asset.id, asset.user_id, asset.path, asset.mime, asset.sha256
+            )
+        return f"{self._asset[0]}{asset.id}{self._asset[1]}"
+
+    def variant(self, asset: EntryAsset, variant: EntryAssetVariant) -> str:
+        if self._signing_key is not None:
+            return self._sign(
+                "asset",
+                asset.id,
+                asset.user_id,
+                variant.path,
+                variant.mime,
+                variant.sha256,
+            )
+        return f"{self._asset[0]}{asset.id}{self._asset[1]}?variant={variant.name}"
+
+    def audio(self, entry: Entry) -> str:
+        if self._signing_key is not None:
+            return self._sign(
+                "audio",
+                entry.id,
+                entry.user_id,
+                entry.audio_path,
+                entry.audio_mime,
+                entry.audio_sha256,
+            )
+        return f"{self._audio[0]}{entry.id}{self._audio[1]}"
+
+
+# Serializers build output models with model_construct: every value comes
+# straight from mapped columns, so field validation would only repeat work.
+def _serialize_asset(urls: _MediaUrls, asset: EntryAsset) -> EntryAssetOut:
+    return EntryAssetOut.model_construct(
+        id=asset.id,
+        asset_type=asset.asset_type,
+        path=asset.path,
+        mime=asset.mime,
+        size=asset.size,
+        sha256=asset.sha256,
+        created_at=asset.created_at,
+        download_url=urls.asset(asset),
+        width=asset.width,
+        height=asset.height,
+        variants={
+            variant.name: urls.variant(asset, variant) for variant in asset.variants
+        },
+        processing_status=asset.processing_status,
     )
 
 
+def _serialize_entry(urls: _MediaUrls, entry: Entry) -> EntryOut:
+    has_audio = entry.audio_path is not None and entry.audio_mime is not None
+    return EntryOut.model_construct(
+        id=entry.id,
+        user_id=entry.user_id,
+        question_id=entry.question_id,
+        audio_mime=entry.audio_mime,
+        audio_size=entry.audio_size,
+        text_content=entry.text_content,
+        audio_url=urls.audio(entry) if has_audio else None,
+        is_frozen=entry.is_frozen,
+        processing_status=entry.processing_status,
+        created_at=entry.created_at,
+        assets=[
+            _serialize_asset(urls, asset)
+            for asset in entry.assets or ()
+            if asset.asset_type == "image"
+        ],
+    )
+
+
+def _serialize_entries(request: Request, entries: list[Entry]) -> list[EntryOut]:
+    urls = _MediaUrls(request)
+    return [_serialize_entry(urls, entry) for entry in entries]
+
+
 @api_v1_router.get("/questions/today", response_model=QuestionOut)
 def get_question_today(
-    _: User = Depends(get_current_user), db: Session = Depends(get_db)
+    _: AuthenticatedUser = Depends(get_current_user), db: Session = Depends(get_db)
 ) -> Question:
     _ensure_questions_seeded(db)
     questions = (
@@ -338,9 +753,16 @@ async def create_entry(
     text_content: str | None = Form(default=None),
     text: str | None = Form(default=None),
     audio_file: UploadFile | None = File(default=None),
-    current_user: User = Depends(get_current_user),
+    upload_id: str | None = Form(default=None),
+    image_files: list[UploadFile] | None = File(default=None),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> EntryOut:
+    """Create an entry, with its audio and images if sent, in one transaction.
+
+    Media files are stored first; if any of them is rejected, the ones
+    already stored are removed and nothing is committed.
+    """
     _ensure_questions_seeded(db)
     question = db.get(Question, question_id)
     if question is None:
@@ -356,7 +778,7 @@ async def create_entry(
             final_text = normalized
             break
 
-    if audio_file is None and final_text is None:
+    if audio_file is None and upload_id is None and final_text is None:
         raise HTTPException(
             status_code=400,
             detail={
@@ -366,57 +788,78 @@ async def create_entry(
         )
     if final_text is not None:
         _validate_text_content(final_text)
+    image_files = image_files or []
+    if len(image_files) > settings.max_images_per_entry:
+        raise _too_many_assets()
 
     entry_id = str(uuid.uuid4())
-    relative_path: Path | None = None
-    content_type: str | None = None
-    audio_size: int | None = None
-    audio_sha256: str | None = None
-    audio_duration_ms: int | None = None
-
-    if audio_file is not None:
-        content_type = audio_file.content_type or ""
-        if content_type not in ALLOWED_MIME_TYPES:
-            raise HTTPException(
-                status_code=422,
-                detail={
-                    "code": "unsupported_mime",
-                    "message": "Unsupported audio MIME type",
-                },
-            )
-
-        ext = ALLOWED_MIME_TYPES[content_type]
-        relative_path = Path("audio") / f"{entry_id}{ext}"
-        absolute_path = settings.data_dir / relative_path
-        upload_info = await stream_upload_to_disk(
-            upload=audio_file,
-            dst_path=absolute_path,
-            max_bytes=settings.max_upload_bytes,
-            expected_mime=content_type,
-            expected_ext=ext,
+    audio: dict[str, int | str | None] = dict.fromkeys(
+        ("path", "mime", "size", "sha256")
+    )
+    upload: UploadSession | None = None
+    if audio_file is not None or upload_id is not None:
+        audio, upload = await _receive_entry_audio(
+            db, current_user, entry_id, audio_file, upload_id
         )
-        audio_size = int(upload_info["size"])
-        audio_sha256 = str(upload_info["sha256"])
-        audio_duration_ms = upload_info["duration_ms"]
 
     entry = Entry(
         id=entry_id,
         user_id=current_user.id,
         question_id=question_id,
-        audio_path=str(relative_path) if relative_path is not None else None,
-        audio_mime=content_type,
-        audio_size=audio_size,
-        audio_sha256=audio_sha256,
-        audio_duration_ms=audio_duration_ms,
+        audio_path=audio["path"],
+        audio_mime=audio["mime"],
+        audio_size=audio["size"],
+        audio_sha256=audio["sha256"],
         text_content=final_text,
     )
+    outcomes = await asyncio.gather(
+        *(_store_image_asset(entry, file) for file in image_files),
+        return_exceptions=True,
+    )
+    assets = [outcome for outcome in outcomes if isinstance(outcome, EntryAsset)]
+    failure = next(
+        (outcome for outcome in outcomes if isinstance(outcome, BaseException)), None
+    )
+    stored_media = [
+        (entry.audio_path, entry.id),
+        *((asset.path, asset.id) for asset in assets),
+    ]
+    if failure is not None:
+        await _settle_media(stored_media)
+        await run_upload_io(
+            release_media, db, _media_storage(), [path for path, _ in stored_media]
+        )
+        raise failure
+
     db.add(entry)
+    if entry.audio_path is not None:
+        enqueue_entry_audio_processing(
+            db, entry, max_attempts=settings.job_max_attempts
+        )
+    for asset in assets:
+        db.add(asset)
+        enqueue_asset_image_processing(
+            db, asset, max_attempts=settings.job_max_attempts
+        )
+    upload_chunks = _finish_upload(db, upload)
+    # created_at is set by the database: flush to bucket the entry with it.
+    db.flush()
+    adjust_lifeline(
+        db,
+        entry.user_id,
+        entry.created_at,
+        entries=1,
+        media=entry_media_count(entry),
+    )
     db.commit()
+    await _settle_media(stored_media)
+    await run_upload_io(delete_upload_chunks, _media_storage(), upload_chunks)
+    notify_job_runners()
     db.refresh(entry)
     entry = db.execute(
-        select(Entry).options(selectinload(Entry.assets)).where(Entry.id == entry_id)
+        select(Entry).options(_LOAD_ENTRY_ASSETS).where(Entry.id == entry_id)
     ).scalar_one()
-    return _serialize_entry(request, entry)
+    return _serialize_entry(_MediaUrls(request), entry)
 
 
 @api_v1_router.get("/entries", response_model=EntriesListResponse)
@@ -426,10 +869,15 @@ def list_entries(
         default=50, ge=1, description="Page size. Values above 200 are clamped to 200."
     ),
     offset: int = Query(default=0, ge=0),
-    sort: Literal[
-        "created_at_desc", "created_at_asc", "id_asc", "id_desc"
-    ] = "created_at_desc",
-    current_user: User = Depends(get_current_user),
+    cursor: str | None = Query(
+        default=None,
+        description=(
+            "Opaque keyset cursor taken from a previous page's next_cursor. "
+            "Cannot be combined with a non-zero offset."
+        ),
+    ),
+    sort: EntrySort = "created_at_desc",
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> EntriesListResponse:
     order_by_map = {
@@ -439,43 +887,158 @@ def list_entries(
         "id_desc": (Entry.id.desc(),),
     }
     clamped_limit = min(limit, 200)
-    entries = (
-        db.execute(
-            select(Entry)
-            .options(selectinload(Entry.assets))
-            .where(Entry.user_id == current_user.id)
-            .order_by(*order_by_map[sort])
-            .offset(offset)
-            .limit(clamped_limit)
+    dialect_name = db.get_bind().dialect.name
+    query = (
+        select(Entry, _entry_created_at_key(dialect_name).label("created_at_key"))
+        .options(_LOAD_ENTRY_ASSETS)
+        .where(Entry.user_id == current_user.id)
+        .order_by(*order_by_map[sort])
+        .limit(clamped_limit)
+    )
+    if cursor is not None:
+        if offset:
+            raise HTTPException(
+                status_code=422,
+                detail={
+                    "code": "cursor_with_offset",
+                    "message": "cursor and offset cannot be combined",
+                },
+            )
+        query = query.where(
+            _entries_after_cursor(
+                sort, *_decode_entries_cursor(cursor, sort, dialect_name), dialect_name
+            )
         )
-        .scalars()
-        .all()
+    else:
+        query = query.offset(offset)
+
+    rows = db.execute(query).all()
+    entries = [row.Entry for row in rows]
+    page_full = len(entries) == clamped_limit
+    next_offset = offset + len(entries) if page_full and cursor is None else None
+    next_cursor = (
+        _encode_entries_cursor(sort, rows[-1].created_at_key, rows[-1].Entry.id)
+        if page_full
+        else None
     )
-    next_offset = offset + len(entries) if len(entries) == clamped_limit else None
     return EntriesListResponse(
-        items=[_serialize_entry(request, entry) for entry in entries],
+        items=_serialize_entries(request, entries),
         next_offset=next_offset,
+        next_cursor=next_cursor,
         limit=clamped_limit,
         offset=offset,
     )
 
 
+@api_v1_router.post("/entries:batchGet", response_model=EntriesBatchGetResponse)
+def batch_get_entries(
+    request: Request,
+    payload: EntriesBatchGetIn,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> EntriesBatchGetResponse:
+    """Several entries in one request; ids that cannot be read are in ``errors``."""
+    ids = list(dict.fromkeys(payload.ids))
+    entries = {
+        entry.id: entry
+        for entry in db.execute(
+            select(Entry).options(_LOAD_ENTRY_ASSETS).where(Entry.id.in_(ids))
+        ).scalars()
+    }
+    found: list[Entry] = []
+    errors: list[EntryBatchError] = []
+    for entry_id in ids:
+        entry = entries.get(entry_id)
+        if entry is None:
+            errors.append(
+                EntryBatchError(
+                    id=entry_id, status=404, code="not_found", message="Entry not found"
+                )
+            )
+        elif entry.user_id != current_user.id:
+            errors.append(
+                EntryBatchError(
+                    id=entry_id, status=403, code="forbidden", message="Not allowed"
+                )
+            )
+        else:
+            found.append(entry)
+    return EntriesBatchGetResponse(
+        items=_serialize_entries(request, found), errors=errors
+    )
+
+
+@api_v1_router.get("/entries/search", response_model=EntrySearchResponse)
+def search_entries_text(
+    request: Request,
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=20, ge=1, le=100),
+    cursor: str | None = Query(
+        default=None,
+        description="Opaque keyset cursor taken from a previous page's next_cursor.",
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> EntrySearchResponse:
+    """Entries whose text matches every word of ``q``, best matches first."""
+    if not search_available(db):
+        raise HTTPException(
+            status_code=501,
+            detail={
+                "code": "search_unavailable",
+                "message": "Full-text search requires the SQLite database",
+            },
+        )
+    match = fts_match_expression(q)
+    if match is None:
+        raise HTTPException(
+            status_code=422,
+            detail={"code": "invalid_query", "message": "Query has no searchable word"},
+        )
+    after = _decode_search_cursor(cursor, q) if cursor is not None else None
+    hits = search_entries(db, current_user.id, match, limit=limit, after=after)
+
+    entries = {
+        entry.id: entry
+        for entry in db.execute(
+            select(Entry)
+            .options(_LOAD_ENTRY_ASSETS)
+            .where(Entry.id.in_([hit.entry_id for hit in hits]))
+        ).scalars()
+    }
+    urls = _MediaUrls(request)
+    items = [
+        EntrySearchHitOut(
+            **_serialize_entry(urls, entries[hit.entry_id]).model_dump(),
+            snippet=hit.snippet,
+            rank=hit.rank,
+        )
+        for hit in hits
+    ]
+    next_cursor = (
+        _encode_search_cursor(q, hits[-1].rank, hits[-1].rowid)
+        if len(hits) == limit
+        else None
+    )
+    return EntrySearchResponse(items=items, next_cursor=next_cursor, limit=limit)
+
+
 @api_v1_router.get("/entries/{entry_id}", response_model=EntryOut)
 def get_entry(
     request: Request,
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> EntryOut:
     entry = _get_entry_or_404(db, entry_id, load_assets=True)
     _ensure_owner(entry, current_user)
-    return _serialize_entry(request, entry)
+    return _serialize_entry(_MediaUrls(request), entry)
 
 
 @api_v1_router.post("/entries/{entry_id}/freeze")
 def freeze_entry(
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> dict[str, str | bool]:
     entry = _get_entry_or_404(db, entry_id)
@@ -493,90 +1056,111 @@ async def upload_entry_asset(
     request: Request,
     entry_id: str,
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> EntryAssetOut:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     _ensure_not_frozen(entry)
+    _ensure_image_quota(db, entry_id, adding=1)
 
-    existing_assets_count = db.execute(
-        select(func.count())
-        .select_from(EntryAsset)
-        .where(
-            EntryAsset.entry_id == entry_id,
-            EntryAsset.asset_type == "image",
-        )
-    ).scalar_one()
-    if existing_assets_count >= settings.max_images_per_entry:
-        raise HTTPException(
-            status_code=422,
-            detail={
-                "code": "too_many_assets",
-                "message": (
-                    "Entry reached MAX_IMAGES_PER_ENTRY "
-                    f"({settings.max_images_per_entry})"
-                ),
-            },
-        )
-
-    content_type = file.content_type or ""
-    if content_type not in ALLOWED_IMAGE_MIME_TYPES:
-        logger.warning(
-            "asset upload 422: unsupported_image_mime content_type=%r allowed=%s",
-            content_type,
-            list(ALLOWED_IMAGE_MIME_TYPES.keys()),
-        )
-        raise HTTPException(
-            status_code=422,
-            detail={
-                "code": "unsupported_image_mime",
-                "message": "Unsupported image MIME type",
-            },
-        )
+    asset = await _store_image_asset(entry, file)
+    stored_path, asset_id = asset.path, asset.id
+    db.add(asset)
+    enqueue_asset_image_processing(db, asset, max_attempts=settings.job_max_attempts)
+    adjust_lifeline(db, entry.user_id, entry.created_at, media=1)
+    db.commit()
+    await _settle_media([(stored_path, asset_id)])
+    notify_job_runners()
+    db.refresh(asset)
+    return _serialize_asset(_MediaUrls(request), asset)
 
-    asset_id = str(uuid.uuid4())
-    ext = ALLOWED_IMAGE_MIME_TYPES[content_type]
-    relative_path = Path("images") / entry_id / f"{asset_id}{ext}"
-    absolute_path = settings.data_dir / relative_path
 
-    upload_info = await stream_upload_to_disk(
-        upload=file,
-        dst_path=absolute_path,
-        max_bytes=settings.max_upload_image_bytes,
-        expected_mime=content_type,
-        expected_ext=ext,
-        signature_validator=validate_image_signature,
-        invalid_signature_error_code="invalid_image_signature",
-        invalid_signature_error_message="Image signature does not match MIME type",
-        payload_too_large_error_message="Image file exceeds upload size limit",
-    )
+@api_v1_router.post(
+    "/entries/{entry_id}/assets:batch", response_model=EntryAssetsBatchResponse
+)
+async def upload_entry_assets_batch(
+    request: Request,
+    entry_id: str,
+    files: list[UploadFile] = File(...),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> EntryAssetsBatchResponse:
+    """Upload several images at once, with one result per file.
 
-    width, height = _parse_image_dimensions(absolute_path, content_type)
+    The quota is checked once for the whole batch. Files are stored
+    concurrently; the ones that pass validation are saved in one commit
+    and the others are reported with the error a single upload returns.
+    """
+    entry = _get_entry_or_404(db, entry_id)
+    _ensure_owner(entry, current_user)
+    _ensure_not_frozen(entry)
+    _ensure_image_quota(db, entry_id, adding=len(files))
 
-    asset = EntryAsset(
-        id=asset_id,
-        entry_id=entry.id,
-        user_id=current_user.id,
-        asset_type="image",
-        path=str(relative_path),
-        mime=content_type,
-        size=int(upload_info["size"]),
-        sha256=str(upload_info["sha256"]),
-        width=width,
-        height=height,
+    outcomes = await asyncio.gather(
+        *(_store_image_asset(entry, file) for file in files), return_exceptions=True
     )
-    db.add(asset)
+    stored = [outcome for outcome in outcomes if isinstance(outcome, EntryAsset)]
+    unexpected = next(
+        (
+            outcome
+            for outcome in outcomes
+            if isinstance(outcome, BaseException)
+            and not isinstance(outcome, HTTPException)
+        ),
+        None,
+    )
+    stored_media = [(asset.path, asset.id) for asset in stored]
+    if unexpected is not None:
+        await _settle_media(stored_media)
+        await run_upload_io(
+            release_media, db, _media_storage(), [asset.path for asset in stored]
+        )
+        raise unexpected
+
+    for asset in stored:
+        db.add(asset)
+        enqueue_asset_image_processing(
+            db, asset, max_attempts=settings.job_max_attempts
+        )
+    adjust_lifeline(db, entry.user_id, entry.created_at, media=len(stored))
     db.commit()
-    db.refresh(asset)
-    return _serialize_asset(request, asset)
+    await _settle_media(stored_media)
+    if stored:
+        notify_job_runners()
+
+    urls = _MediaUrls(request)
+    results = []
+    for file, outcome in zip(files, outcomes, strict=True):
+        filename = file.filename or ""
+        if isinstance(outcome, HTTPException):
+            detail = outcome.detail
+            if not isinstance(detail, dict):
+                detail = {"code": str(outcome.status_code), "message": str(detail)}
+            results.append(
+                AssetUploadResult(
+                    filename=filename,
+                    status=outcome.status_code,
+                    error={"code": detail["code"], "message": detail["message"]},
+                )
+            )
+        else:
+            db.refresh(outcome)
+            results.append(
+                AssetUploadResult(
+                    filename=filename,
+                    status=200,
+                    asset=_serialize_asset(urls, outcome),
+                )
+            )
+    return EntryAssetsBatchResponse(items=results)
 
 
 @api_v1_router.get("/entries/{entry_id}/assets", response_model=list[EntryAssetOut])
 def list_entry_assets(
     request: Request,
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> list[EntryAssetOut]:
     entry = _get_entry_or_404(db, entry_id)
@@ -590,15 +1174,66 @@ def list_entry_assets(
         .scalars()
         .all()
     )
-    return [_serialize_asset(request, asset) for asset in assets]
+    urls = _MediaUrls(request)
+    return [_serialize_asset(urls, asset) for asset in assets]
+
+
+def _serve_media(
+    request: Request,
+    relative_path: str,
+    media_type: str,
+    etag: str | None,
+    cache_control: str,
+    missing_detail: str,
+) -> Response:
+    storage = _media_storage()
+    path = storage.local_path(relative_path)
+    if path is None:
+        if settings.s3_delivery == "redirect":
+            # The bucket sends the bytes (ranges included) for this short-lived
+            # URL; the redirect itself must not be cached beyond it.
+            url = storage.presigned_get_url(
+                relative_path,
+                content_type=media_type,
+                expires_in=settings.s3_presigned_url_ttl_seconds,
+            )
+            return RedirectResponse(
+                url, status_code=307, headers={"Cache-Control": "private, no-store"}
+            )
+        try:
+            return storage_media_response(
+                request, storage, relative_path, media_type, etag, cache_control
+            )
+        except FileNotFoundError:
+            raise HTTPException(status_code=404, detail=missing_detail) from None
+    if settings.media_offload != "none":
+        # The proxy reports missing files itself; skip the stat here.
+        return offloaded_media_response(
+            mode=settings.media_offload,
+            relative_path=relative_path,
+            absolute_path=path,
+            internal_prefix=settings.media_offload_internal_prefix,
+            media_type=media_type,
+            etag=etag,
+            cache_control=cache_control,
+        )
+    if not path.exists():
+        raise HTTPException(status_code=404, detail=missing_detail)
+    return media_file_response(path, media_type, etag, cache_control)
 
 
 @api_v1_router.get("/assets/{asset_id}", name="download_asset")
 def download_asset(
+    request: Request,
     asset_id: str,
-    current_user: User = Depends(get_current_user),
+    variant: ImageVariant | None = Query(
+        default=None,
+        description="Downscaled WebP rendition; the original is served until "
+        "it has been generated or when the original is already smaller.",
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> FileResponse:
+) -> Response:
     asset = db.get(EntryAsset, asset_id)
     if asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
@@ -614,18 +1249,33 @@ def download_asset(
             detail={"code": "asset_not_image", "message": "Asset is not an image"},
         )
 
-    path = settings.data_dir / asset.path
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Asset file not found")
-    return FileResponse(path=path, media_type=asset.mime, filename=path.name)
+    path, mime, sha256 = asset.path, asset.mime, asset.sha256
+    cache_control = IMMUTABLE_CACHE_CONTROL
+    if variant is not None:
+        rendition = db.get(EntryAssetVariant, (asset.id, variant))
+        if rendition is not None:
+            path, mime, sha256 = rendition.path, rendition.mime, rendition.sha256
+        else:
+            # The same URL will serve the variant once it exists.
+            cache_control = REVALIDATE_CACHE_CONTROL
+
+    etag = strong_etag(sha256)
+    not_modified = not_modified_response(request, etag, cache_control)
+    if not_modified is not None:
+        return not_modified
+
+    return _serve_media(
+        request, path, mime, etag, cache_control, "Asset file not found"
+    )
 
 
 @api_v1_router.get("/entries/{entry_id}/audio", name="get_entry_audio")
 def get_entry_audio(
+    request: Request,
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> FileResponse:
+) -> Response:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     if entry.audio_path is None or entry.audio_mime is None:
@@ -634,19 +1284,111 @@ def get_entry_audio(
             detail={"code": "no_audio", "message": "Entry has no audio"},
         )
 
-    path = settings.data_dir / entry.audio_path
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Audio file not found")
-    return FileResponse(path=path, media_type=entry.audio_mime, filename=path.name)
+    etag = strong_etag(entry.audio_sha256)
+    not_modified = not_modified_response(request, etag, REVALIDATE_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+
+    return _serve_media(
+        request,
+        entry.audio_path,
+        entry.audio_mime,
+        etag,
+        REVALIDATE_CACHE_CONTROL,
+        "Audio file not found",
+    )
+
+
+@api_v1_router.get("/entries/{entry_id}/audio/peaks", name="get_entry_audio_peaks")
+def get_entry_audio_peaks(
+    request: Request,
+    entry_id: str,
+    format: Literal["binary", "json"] = "binary",
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Response:
+    entry = _get_entry_or_404(db, entry_id)
+    _ensure_owner(entry, current_user)
+    if entry.audio_path is None or entry.audio_mime is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "no_audio", "message": "Entry has no audio"},
+        )
+
+    unavailable = HTTPException(
+        status_code=404,
+        detail={
+            "code": "peaks_unavailable",
+            "message": "Waveform peaks are not available for this audio",
+        },
+    )
+    if strong_etag(entry.audio_sha256) is None:
+        raise unavailable
+    # Peaks are derived from the audio bytes, so the audio digest versions them.
+    etag = f'"{entry.audio_sha256}-peaks-{format}"'
+    not_modified = not_modified_response(request, etag, REVALIDATE_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+
+    try:
+        payload = _media_storage().read_bytes(peaks_path(entry.audio_sha256))
+    except FileNotFoundError:
+        # Not computed yet (processing pending) or undecodable format.
+        raise unavailable from None
+
+    headers = {"ETag": etag, "Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if format == "json":
+        peaks = decode_peaks(payload)
+        body = AudioPeaksOut(buckets=len(peaks), peaks=peaks)
+        return Response(
+            content=body.model_dump_json(),
+            media_type="application/json",
+            headers=headers,
+        )
+    return Response(content=payload, media_type=PEAKS_MIME, headers=headers)
+
+
+@api_v1_router.get("/media/{token}", name="download_signed_media")
+def download_signed_media(request: Request, token: str) -> Response:
+    """Serve a file from a URL signed by _MediaUrls.
+
+    The token was issued to the owner and binds path, type and digest, so
+    neither a bearer token nor a database lookup is needed here.
+    """
+    signing_key = _media_signing_key()
+    if signing_key is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+    media = read_media_token(signing_key, token)
+    if media is None:
+        raise HTTPException(
+            status_code=403,
+            detail={"code": "invalid_media_token", "message": "Invalid media link"},
+        )
+    now = time.time()
+    if media.expires_at <= now:
+        raise HTTPException(
+            status_code=403,
+            detail={"code": "media_token_expired", "message": "Media link expired"},
+        )
+
+    cache_control = signed_media_cache_control(media, now)
+    etag = strong_etag(media.sha256)
+    not_modified = not_modified_response(request, etag, cache_control)
+    if not_modified is not None:
+        return not_modified
+    return _serve_media(
+        request, media.path, media.mime, etag, cache_control, "Media file not found"
+    )
 
 
 @api_v1_router.patch("/entries/{entry_id}", response_model=EntryOut)
 def update_entry(
+    request: Request,
     payload: EntryUpdateIn,
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> Entry:
+) -> EntryOut:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     _ensure_not_frozen(entry)
@@ -671,90 +1413,103 @@ def update_entry(
         entry.text_content = payload.text_content
 
     db.commit()
-    db.refresh(entry)
-    return entry
+    entry = _get_entry_or_404(db, entry_id, load_assets=True)
+    return _serialize_entry(_MediaUrls(request), entry)
 
 
 @api_v1_router.post("/entries/{entry_id}/audio", response_model=EntryOut)
 async def upload_entry_audio(
+    request: Request,
     entry_id: str,
-    audio_file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
+    audio_file: UploadFile | None = File(default=None),
+    upload_id: str | None = Form(default=None),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
-) -> Entry:
+) -> EntryOut:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     _ensure_not_frozen(entry)
 
-    content_type = audio_file.content_type or ""
-    if content_type not in ALLOWED_MIME_TYPES:
-        raise HTTPException(
-            status_code=422,
-            detail={
-                "code": "unsupported_mime",
-                "message": "Unsupported audio MIME type",
-            },
-        )
-
-    ext = ALLOWED_MIME_TYPES[content_type]
-    relative_path = Path("audio") / f"{entry_id}{ext}"
-    absolute_path = settings.data_dir / relative_path
-    upload_info = await stream_upload_to_disk(
-        upload=audio_file,
-        dst_path=absolute_path,
-        max_bytes=settings.max_upload_bytes,
-        expected_mime=content_type,
-        expected_ext=ext,
+    audio, upload = await _receive_entry_audio(
+        db, current_user, entry_id, audio_file, upload_id
     )
-    entry.audio_path = str(relative_path)
-    entry.audio_mime = content_type
-    entry.audio_size = int(upload_info["size"])
-    entry.audio_sha256 = str(upload_info["sha256"])
-    entry.audio_duration_ms = upload_info["duration_ms"]
+    previous_path = entry.audio_path
+    previous_sha256 = entry.audio_sha256
+    entry.audio_sha256 = audio["sha256"]
+    entry.audio_path = audio["path"]
+    entry.audio_mime = audio["mime"]
+    entry.audio_size = audio["size"]
+    entry.audio_duration_ms = None
+    if previous_sha256 != entry.audio_sha256:
+        await run_upload_io(_discard_unshared_peaks, db, previous_sha256, entry_id)
+    if strong_etag(previous_sha256) is None:
+        adjust_lifeline(db, entry.user_id, entry.created_at, media=1)
+    enqueue_entry_audio_processing(db, entry, max_attempts=settings.job_max_attempts)
+    upload_chunks = _finish_upload(db, upload)
     db.commit()
-    db.refresh(entry)
-    return entry
+    await _settle_media([(audio["path"], entry_id)])
+    await run_upload_io(delete_upload_chunks, _media_storage(), upload_chunks)
+    if previous_path != entry.audio_path:
+        await run_upload_io(release_media, db, _media_storage(), [previous_path])
+    notify_job_runners()
+    entry = _get_entry_or_404(db, entry_id, load_assets=True)
+    return _serialize_entry(_MediaUrls(request), entry)
 
 
 @api_v1_router.delete("/entries/{entry_id}/audio")
 def delete_entry_audio(
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> dict[str, str]:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     _ensure_not_frozen(entry)
 
-    path = settings.data_dir / entry.audio_path
-    path.unlink(missing_ok=True)
+    previous_path = entry.audio_path
+    _discard_unshared_peaks(db, entry.audio_sha256, entry_id)
+    if strong_etag(entry.audio_sha256) is not None:
+        adjust_lifeline(db, entry.user_id, entry.created_at, media=-1)
     entry.audio_path = f"audio/deleted-{entry_id}.bin"
     entry.audio_mime = "application/octet-stream"
     entry.audio_size = 0
     entry.audio_sha256 = "0" * 64
     entry.audio_duration_ms = None
     db.commit()
+    release_media(db, _media_storage(), [previous_path])
     return {"status": "audio_deleted", "id": entry_id}
 
 
 @api_v1_router.delete("/entries/{entry_id}")
 def delete_entry(
     entry_id: str,
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
     db: Session = Depends(get_db),
 ) -> dict[str, str]:
     entry = _get_entry_or_404(db, entry_id)
     _ensure_owner(entry, current_user)
     _ensure_not_frozen(entry)
 
+    media_paths = [entry.audio_path, *(asset.path for asset in entry.assets)]
     if entry.audio_path is not None:
-        path = settings.data_dir / entry.audio_path
-        path.unlink(missing_ok=True)
+        _discard_unshared_peaks(db, entry.audio_sha256, entry_id)
+    adjust_lifeline(
+        db,
+        entry.user_id,
+        entry.created_at,
+        entries=-1,
+        media=-entry_media_count(entry),
+    )
     db.delete(entry)
     db.commit()
+    release_media(db, _media_storage(), media_paths)
     return {"status": "deleted", "id": entry_id}
 
 
 api_v1_router.include_router(auth_router)
 api_v1_router.include_router(system_router)
+api_v1_router.include_router(jobs_router)
+api_v1_router.include_router(lifeline_router)
+api_v1_router.include_router(uploads_router)
 app.include_router(api_v1_router)
+app.include_router(metrics_router)
@@ -0,0 +1,260 @@
+import base64
+import binascii
+from dataclasses import dataclass
+import hashlib
+import hmac
+import json
+from pathlib import Path, PurePosixPath
+import re
+from typing import Literal
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from app.object_storage import MediaStorage
+
+MediaOffload = Literal["none", "x-accel-redirect", "x-sendfile"]
+MediaKind = Literal["asset", "audio"]
+
+# Placeholder digest back-filled by migration 0004 (and set on audio deletion);
+# it does not identify any content, so it must never become an ETag.
+_PLACEHOLDER_SHA256 = "0" * 64
+
+# Asset ids are never reused and asset files never rewritten, so a browser may
+# keep them; entry audio can be replaced in place and must be revalidated.
+IMMUTABLE_CACHE_CONTROL = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "private, no-cache"
+
+
+def strong_etag(sha256: str | None) -> str | None:
+    if not sha256 or sha256 == _PLACEHOLDER_SHA256:
+        return None
+    return f'"{sha256}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison function (RFC 9110, 13.1.2).
+    for candidate in if_none_match.split(","):
+        if candidate.strip().removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def not_modified_response(
+    request: Request, etag: str | None, cache_control: str
+) -> Response | None:
+    """304 response when the client already holds ``etag``, else ``None``.
+
+    Only request headers and stored metadata are involved, so callers run it
+    before touching the file.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if etag is None or if_none_match is None:
+        return None
+    if not _etag_matches(if_none_match, etag):
+        return None
+    return Response(
+        status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+    )
+
+
+def media_file_response(
+    path: Path, media_type: str, etag: str | None, cache_control: str
+) -> FileResponse:
+    """File response honouring ``Range``/``If-Range`` with the stored-hash ETag."""
+    headers = {"Cache-Control": cache_control}
+    if etag is not None:
+        headers["ETag"] = etag
+    return FileResponse(
+        path=path, media_type=media_type, filename=path.name, headers=headers
+    )
+
+
+_BYTE_RANGE = re.compile(r"bytes=(\d*)-(\d*)")
+_UNSATISFIABLE = (-1, -1)
+
+
+def _single_byte_range(
+    request: Request, etag: str | None, size: int
+) -> tuple[int, int] | None:
+    """Inclusive (start, end) of a single-range request, as FileResponse reads it.
+
+    Multi-range, malformed or stale (``If-Range``) requests get the full body.
+    """
+    header = request.headers.get("range")
+    if header is None:
+        return None
+    if_range = request.headers.get("if-range")
+    if if_range is not None and if_range != etag:
+        return None
+    match = _BYTE_RANGE.fullmatch(header.strip())
+    if match is None or match.group(1) == match.group(2) == "":
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0 or size == 0:
+            return _UNSATISFIABLE
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        return _UNSATISFIABLE
+    if end < start:
+        return None
+    return start, end
+
+
+def storage_media_response(
+    request: Request,
+    storage: MediaStorage,
+    key: str,
+    media_type: str,
+    etag: str | None,
+    cache_control: str,
+) -> Response:
+    """Stream ``key`` out of ``storage`` with the same headers as FileResponse.
+
+    Raises FileNotFoundError before any byte is sent when ``key`` is missing.
+    """
+    size = storage.size(key)
+    headers = {
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'attachment; filename="{PurePosixPath(key).name}"',
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+
+    byte_range = _single_byte_range(request, etag, size)
+    if byte_range == _UNSATISFIABLE:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status_code=416, headers=headers)
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(
+            storage.iter_bytes(key), media_type=media_type, headers=headers
+        )
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.iter_bytes(key, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
+
+
+def offloaded_media_response(
+    *,
+    mode: MediaOffload,
+    relative_path: str,
+    absolute_path: Path,
+    internal_prefix: str,
+    media_type: str,
+    etag: str | None,
+    cache_control: str,
+) -> Response:
+    """Empty response telling the reverse proxy which file to send.
+
+    ``x-accel-redirect`` targets an nginx ``internal`` location mapped onto
+    DATA_DIR; ``x-sendfile`` (Apache mod_xsendfile, lighttpd) takes the
+    absolute path. The proxy then serves the bytes, ranges included.
+    """
+    headers = {
+        "Cache-Control": cache_control,
+        # Same disposition FileResponse emits for the ASCII names used on disk.
+        "Content-Disposition": f'attachment; filename="{absolute_path.name}"',
+    }
+    if etag is not None:
+        headers["ETag"] = etag
+    if mode == "x-accel-redirect":
+        internal = PurePosixPath(internal_prefix) / PurePosixPath(relative_path)
+        headers["X-Accel-Redirect"] = quote(str(internal))
+    else:
+        headers["X-Sendfile"] = str(absolute_path)
+    return Response(media_type=media_type, headers=headers)
+
+
+@dataclass(frozen=True)
+class SignedMedia:
+    """Everything needed to serve a media file, as carried by a signed URL."""
+
+    kind: MediaKind
+    object_id: str
+    owner_id: str
+    path: str
+    mime: str
+    sha256: str | None
+    expires_at: int
+
+
+def media_signing_key(secret: str) -> bytes:
+    # Derived so that a media token can never be replayed as a JWT signature.
+    return hmac.new(secret.encode(), b"echo-media-url-v1", hashlib.sha256).digest()
+
+
+def signed_media_expiry(now: float, ttl_seconds: int) -> int:
+    """Expiry shared by every URL signed during the current TTL window.
+
+    Rounding up to a window boundary keeps a URL byte-identical across list
+    calls within the window (so browsers and proxies can reuse it) while
+    guaranteeing at least ``ttl_seconds`` of validity.
+    """
+    return (int(now) // ttl_seconds + 2) * ttl_seconds
+
+
+def _b64encode(raw: bytes) -> str:
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def sign_media_token(key: bytes, media: SignedMedia) -> str:
+    payload = _b64encode(
+        json.dumps(
+            [
+                media.kind,
+                media.object_id,
+                media.owner_id,
+                media.path,
+                media.mime,
+                media.sha256,
+                media.expires_at,
+            ],
+            separators=(",", ":"),
+        ).encode()
+    )
+    signature = hmac.new(key, payload.encode("ascii"), hashlib.sha256).digest()
+    return f"{payload}.{_b64encode(signature)}"
+
+
+def read_media_token(key: bytes, token: str) -> SignedMedia | None:
+    """Decode ``token`` if its signature is valid; expiry is left to the caller."""
+    payload, _, signature = token.partition(".")
+    try:
+        expected = hmac.new(key, payload.encode("ascii"), hashlib.sha256).digest()
+        if not hmac.compare_digest(_b64decode(signature), expected):
+            return None
+        fields = json.loads(_b64decode(payload))
+        return SignedMedia(*fields)
+    except (UnicodeEncodeError, binascii.Error, ValueError, TypeError):
+        return None
+
+
+def signed_media_cache_control(media: SignedMedia, now: float) -> str:
+    """Shared-cache policy for a signed URL, bounded by the token lifetime.
+
+    The URL itself is the credential, so CDNs and proxies may keep the bytes
+    until the token expires.
+    """
+    max_age = max(0, media.expires_at - int(now))
+    if media.kind == "asset":
+        return f"public, max-age={max_age}, immutable"
+    return f"public, max-age={max_age}"
@@ -0,0 +1,250 @@
+"""Content-addressed media files.
+
+With MEDIA_STORAGE_LAYOUT=content_addressed, uploads are stored once per
+digest at ``blobs/ab/cd/<sha256>``. ``Entry.audio_path`` and
+``EntryAsset.path`` rows pointing at a blob are its references: the blob,
+and the image variants rendered next to it, are removed when the last of
+them is deleted. Files of the per-entry layout keep working and are removed
+with their row.
+
+An upload whose blob already exists cannot rely on it alone: a concurrent
+``release_media`` may count no reference (the upload's row is not committed
+yet) and delete it. The upload therefore keeps its staged copy as a held
+blob until ``settle_blobs`` runs after the commit and restores the blob if
+needed; ``release_media`` moves a blob to the trash and counts references
+again, in a new transaction, before deleting it.
+
+``python -m app.media_store migrate [--dry-run]`` moves existing per-entry
+files into blobs.
+"""
+
+import argparse
+from collections.abc import Iterable
+import hashlib
+import logging
+import uuid
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import SessionLocal
+from app.middleware.request_id import configure_json_logging
+from app.models import Entry, EntryAsset, EntryAssetVariant
+from app.object_storage import MediaStorage, media_storage_from_settings
+from app.settings import settings
+from app.thumbnails import IMAGE_VARIANTS, variant_path
+
+logger = logging.getLogger("app.media_store")
+
+BLOBS_DIR = "blobs"
+
+
+def blob_path(sha256: str) -> str:
+    return f"{BLOBS_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}"
+
+
+def is_blob_path(path: str) -> bool:
+    return path.startswith(f"{BLOBS_DIR}/")
+
+
+def staging_key() -> str:
+    """Upload destination for a file whose digest is not known yet."""
+    return f"{BLOBS_DIR}/incoming/{uuid.uuid4().hex}"
+
+
+def held_blob_key(sha256: str, owner_id: str) -> str:
+    """Staged copy kept by ``commit_blob`` for the row ``owner_id``."""
+    return f"{BLOBS_DIR}/incoming/{sha256}-{owner_id}"
+
+
+def commit_blob(
+    storage: MediaStorage, staged_key: str, sha256: str, owner_id: str
+) -> str:
+    """Move a staged upload to its blob; returns the blob key.
+
+    If the blob exists, the staged copy is kept as the held blob of
+    ``owner_id`` (the entry or asset id) until ``settle_blobs``.
+    """
+    key = blob_path(sha256)
+    if storage.exists(key):
+        storage.move(staged_key, held_blob_key(sha256, owner_id))
+    else:
+        storage.move(staged_key, key)
+    return key
+
+
+def settle_blobs(
+    storage: MediaStorage, owners: Iterable[tuple[str | None, str]]
+) -> None:
+    """Drop the held blobs of ``(path, owner_id)`` pairs.
+
+    Call once the rows are committed (or rolled back, before
+    ``release_media``). A blob removed meanwhile by ``release_media`` is
+    restored from the held copy.
+    """
+    for path, owner_id in owners:
+        if not path or not is_blob_path(path):
+            continue
+        held = held_blob_key(path.rsplit("/", 1)[-1], owner_id)
+        if not storage.exists(held):
+            continue
+        if storage.exists(path):
+            storage.delete(held)
+        else:
+            storage.move(held, path)
+
+
+def media_references(db: Session, path: str) -> int:
+    audio = db.scalar(
+        select(func.count()).select_from(Entry).where(Entry.audio_path == path)
+    )
+    assets = db.scalar(
+        select(func.count()).select_from(EntryAsset).where(EntryAsset.path == path)
+    )
+    return int(audio or 0) + int(assets or 0)
+
+
+def release_media(
+    db: Session, storage: MediaStorage, paths: Iterable[str | None]
+) -> None:
+    """Delete the files of ``paths`` that no row references any more.
+
+    Call once the rows that used them are committed away, so a failed
+    transaction never leaves a row without its file.
+    """
+    for path in set(paths):
+        if not path:
+            continue
+        if is_blob_path(path):
+            if not _collect_blob(db, storage, path):
+                continue
+        else:
+            storage.delete(path)
+        for name in IMAGE_VARIANTS:
+            storage.delete(variant_path(path, name))
+
+
+def _collect_blob(db: Session, storage: MediaStorage, path: str) -> bool:
+    """Delete an unreferenced blob; False if it is (again) referenced."""
+    if media_references(db, path) > 0:
+        return False
+    trash = f"{BLOBS_DIR}/trash/{uuid.uuid4().hex}"
+    try:
+        storage.move(path, trash)
+    except FileNotFoundError:
+        return True
+    # An upload of the same content may have committed its row since the
+    # count above; a new session sees it.
+    with Session(db.get_bind()) as fresh:
+        referenced = media_references(fresh, path) > 0
+    if not referenced:
+        storage.delete(trash)
+        return True
+    if storage.exists(path):
+        storage.delete(trash)
+    else:
+        storage.move(trash, path)
+    return False
+
+
+def _sha256(storage: MediaStorage, key: str) -> str:
+    digest = hashlib.sha256()
+    for chunk in storage.iter_bytes(key):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def migrate_to_blobs(
+    db: Session, storage: MediaStorage, *, dry_run: bool = False
+) -> dict[str, int]:
+    """Move per-entry audio and image files (with their variants) to blobs.
+
+    Each file is copied to its blob and the row committed before the old
+    file is removed, so the migration can be interrupted and run again.
+    """
+    stats = {"migrated": 0, "deduplicated": 0, "missing": 0, "bytes_freed": 0}
+    seen: set[str] = set()
+
+    def migrate(source: str) -> tuple[str, str] | None:
+        if not storage.exists(source):
+            stats["missing"] += 1
+            return None
+        sha256 = _sha256(storage, source)
+        target = blob_path(sha256)
+        already_stored = sha256 in seen or storage.exists(target)
+        if already_stored:
+            stats["deduplicated"] += 1
+            stats["bytes_freed"] += storage.size(source)
+        seen.add(sha256)
+        if not dry_run and not already_stored:
+            storage.copy(source, target)
+        stats["migrated"] += 1
+        return target, sha256
+
+    entries = (
+        db.execute(
+            select(Entry).where(
+                Entry.audio_path.is_not(None),
+                Entry.audio_path.not_like(f"{BLOBS_DIR}/%"),
+            )
+        )
+        .scalars()
+        .all()
+    )
+    for entry in entries:
+        old_path = entry.audio_path
+        moved = migrate(old_path)
+        if moved is None or dry_run:
+            continue
+        entry.audio_path, entry.audio_sha256 = moved
+        db.commit()
+        storage.delete(old_path)
+
+    assets = (
+        db.execute(select(EntryAsset).where(EntryAsset.path.not_like(f"{BLOBS_DIR}/%")))
+        .scalars()
+        .all()
+    )
+    for asset in assets:
+        old_path = asset.path
+        moved = migrate(old_path)
+        if moved is None or dry_run:
+            continue
+        asset.path, asset.sha256 = moved
+        old_variants = []
+        for variant in db.execute(
+            select(EntryAssetVariant).where(EntryAssetVariant.asset_id == asset.id)
+        ).scalars():
+            new_variant_path = variant_path(asset.path, variant.name)
+            if storage.exists(variant.path) and not storage.exists(new_variant_path):
+                storage.copy(variant.path, new_variant_path)
+            old_variants.append(variant.path)
+            variant.path = new_variant_path
+        db.commit()
+        for path in (old_path, *old_variants):
+            storage.delete(path)
+
+    return stats
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Manage Echo media files.")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Report what would be migrated without moving files.",
+    )
+    args = parser.parse_args(argv)
+
+    configure_json_logging(queue_size=settings.log_queue_size)
+    with SessionLocal() as db:
+        stats = migrate_to_blobs(
+            db, media_storage_from_settings(settings), dry_run=args.dry_run
+        )
+    logger.info("media migrated to blobs", extra={"dry_run": args.dry_run, **stats})
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,297 @@
+"""In-process Prometheus metrics, exposed in text format on ``/metrics``.
+
+Counters, gauges and histograms live in a module-level registry; every
+process (API replica or worker) exposes its own values and Prometheus
+aggregates them. HTTP metrics are labelled by route template
+(``/api/v1/entries/{entry_id}``), never by raw path, so label cardinality
+stays bounded by the number of routes.
+"""
+
+from bisect import bisect_left
+from collections.abc import Iterable
+import math
+import threading
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; the Prometheus client defaults, extended for slow uploads.
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# Route label of requests that matched no route (404s, scanners, ...).
+UNMATCHED_ROUTE = "<unmatched>"
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = [
+        f'{name}="{_escape(value)}"' for name, value in zip(names, values, strict=True)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...]):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames=()):
+        super().__init__(name, documentation, tuple(labelnames))
+        self._values: dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+            for key, value in items
+        ]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, tuple(labelnames))
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: non-cumulative bucket counts (+Inf last), sum.
+        self._values: dict[LabelValues, tuple[list[int], float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels: str) -> int:
+        counts, _ = self._values.get(self._key(labels), ([], 0))
+        return sum(counts)
+
+    def samples(self) -> list[str]:
+        with self._lock:
+            items = sorted((key, (list(c), s)) for key, (c, s) in self._values.items())
+        lines: list[str] = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(
+                (*self.buckets, math.inf), counts, strict=True
+            ):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    (*self.labelnames, "le"), (*key, _format_value(bound))
+                )
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames=(),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, extra: Iterable[str] = ()) -> str:
+        lines: list[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    "echo_http_requests_total",
+    "HTTP requests handled, by route template and status code.",
+    ("method", "route", "status"),
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "echo_http_request_duration_seconds",
+    "Time from request start to the end of the response, by route template.",
+    ("method", "route"),
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "echo_http_requests_in_flight",
+    "HTTP requests currently being handled.",
+    ("method",),
+)
+UPLOAD_BYTES = REGISTRY.counter(
+    "echo_upload_bytes_total",
+    "Media bytes accepted by app.storage.stream_upload, by media kind.",
+    ("kind",),
+)
+LOG_RECORDS_DROPPED = REGISTRY.counter(
+    "echo_log_records_dropped_total",
+    "Log records dropped because the logging queue was full.",
+)
+DB_SESSIONS_OPEN = REGISTRY.gauge(
+    "echo_db_sessions_open",
+    "Request-scoped database sessions currently open (app.db.get_db).",
+)
+DB_SESSIONS = REGISTRY.counter(
+    "echo_db_sessions_total",
+    "Request-scoped database sessions opened (app.db.get_db).",
+)
+
+
+def route_label(scope: dict) -> str:
+    """Template of the route that handled ``scope``, with its router prefix.
+
+    Depending on the FastAPI version, ``scope["route"]`` of a route from an
+    included router carries either the full template or only the router's own
+    one; the static prefix (``/api/v1``) is then taken back from the raw path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if not isinstance(template, str):
+        return UNMATCHED_ROUTE
+    convertors = getattr(route, "param_convertors", {})
+    params = scope.get("path_params", {})
+    try:
+        rendered = template.format(
+            **{name: convertors[name].to_string(params[name]) for name in convertors}
+        )
+    except (KeyError, ValueError, AssertionError):
+        return template
+    path = scope.get("path", "")
+    if not path.endswith(rendered):
+        return template
+    return path[: len(path) - len(rendered)] + template
+
+
+def pool_samples(engine: Engine) -> list[str]:
+    """Gauges of the engine's connection pool, read at scrape time."""
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return []
+    stats = {
+        "echo_db_pool_size": ("Configured connection pool size.", pool.size()),
+        "echo_db_pool_checked_out": (
+            "Connections currently checked out of the pool.",
+            pool.checkedout(),
+        ),
+        "echo_db_pool_checked_in": (
+            "Idle connections currently held by the pool.",
+            pool.checkedin(),
+        ),
+        "echo_db_pool_overflow": (
+            "Connections opened beyond the pool size (negative when unused).",
+            pool.overflow(),
+        ),
+    }
+    lines: list[str] = []
+    for name, (documentation, value) in stats.items():
+        lines.extend(scrape_samples(name, documentation, value))
+    return lines
+
+
+def scrape_samples(
+    name: str, documentation: str, value: float, kind: str = "gauge"
+) -> list[str]:
+    """Exposition lines of a value read at scrape time, outside the registry."""
+    return [
+        f"# HELP {name} {documentation}",
+        f"# TYPE {name} {kind}",
+        f"{name} {_format_value(value)}",
+    ]
+
+
+def render_metrics(engine: Engine | None = None, extra: Iterable[str] = ()) -> str:
+    lines = pool_samples(engine) if engine is not None else []
+    return REGISTRY.render([*lines, *extra])
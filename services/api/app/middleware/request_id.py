@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import atexit
+import copy
 import json
 import logging
+import logging.handlers
+import queue
+import random
 import re
 import time
 import uuid
@@ -12,6 +17,20 @@ from typing import Any, Iterable
 from starlette.datastructures import MutableHeaders
 from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
+from app.metrics import (
+    HTTP_REQUEST_DURATION,
+    HTTP_REQUESTS,
+    HTTP_REQUESTS_IN_FLIGHT,
+    LOG_RECORDS_DROPPED,
+    route_label,
+)
+from app.query_stats import QueryStats, reset_query_stats, start_query_stats
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: install the "fastlog" extra.
+    orjson = None
+
 _request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
 _REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._-]+$")
 
@@ -81,10 +100,56 @@ class JsonFormatter(logging.Formatter):
         }
         payload.update(extras)
 
+        if orjson is not None:
+            return orjson.dumps(
+                payload, default=str, option=orjson.OPT_NON_STR_KEYS
+            ).decode()
         return json.dumps(payload, ensure_ascii=False, default=str)
 
 
-def configure_json_logging(level: int = logging.INFO) -> None:
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to a ``QueueListener`` thread without ever blocking.
+
+    When the bounded queue is full the record is dropped and counted in
+    ``echo_log_records_dropped_total``, so a stalled sink costs log lines,
+    not request latency.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message here (args may be mutated once we return); the
+        # JSON formatting itself runs on the listener thread.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        record.exc_info = None
+        record.exc_text = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+
+_listener: logging.handlers.QueueListener | None = None
+
+
+def server_timing(stats: QueryStats, elapsed: float) -> str:
+    """``Server-Timing`` value: SQL time and count, and time to first byte."""
+    return (
+        f'db;dur={stats.duration_ms};desc="{stats.count} queries", '
+        f"app;dur={round(elapsed * 1000, 1)}"
+    )
+
+
+def configure_json_logging(level: int = logging.INFO, queue_size: int = 10_000) -> None:
+    """JSON logs on stderr for the ``app`` logger tree.
+
+    With ``queue_size`` > 0, callers only enqueue records and a background
+    thread formats and writes them; 0 writes synchronously.
+    """
+    global _listener
     base = logging.getLogger("app")
     base.setLevel(level)
 
@@ -93,19 +158,57 @@ def configure_json_logging(level: int = logging.INFO) -> None:
 
     handler = logging.StreamHandler()
     handler.setLevel(level)
-    handler.addFilter(RequestIdLogFilter())
     handler.setFormatter(JsonFormatter())
-
-    base.addHandler(handler)
     base.propagate = False
 
+    if queue_size <= 0:
+        handler.addFilter(RequestIdLogFilter())
+        base.addHandler(handler)
+        return
+
+    # The request id lives in a context variable: read it on the caller's side.
+    queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+    queue_handler.setLevel(level)
+    queue_handler.addFilter(RequestIdLogFilter())
+    _listener = logging.handlers.QueueListener(queue_handler.queue, handler)
+    _listener.start()
+    atexit.register(stop_json_logging)
+    base.addHandler(queue_handler)
+
+
+def stop_json_logging() -> None:
+    """Flush queued records and stop the listener thread, if any."""
+    global _listener
+    if _listener is None:
+        return
+    listener, _listener = _listener, None
+    listener.stop()
+    base = logging.getLogger("app")
+    for handler in list(base.handlers):
+        if isinstance(handler, DroppingQueueHandler):
+            base.removeHandler(handler)
+
 
 class RequestIdMiddleware:
     header_name = "X-Request-Id"
 
-    def __init__(self, app: ASGIApp) -> None:
+    def __init__(
+        self,
+        app: ASGIApp,
+        access_log_sample_rate: float = 1.0,
+        server_timing: bool = True,
+    ) -> None:
         self.app = app
         self.logger = logging.getLogger("app.http")
+        # Share of successful (< 400) requests written to the access log;
+        # errors are always logged.
+        self.access_log_sample_rate = access_log_sample_rate
+        self.server_timing = server_timing
+
+    def _should_log(self, status_code: int) -> bool:
+        if status_code >= 400 or self.access_log_sample_rate >= 1:
+            return True
+        return random.random() < self.access_log_sample_rate
 
     async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         if scope["type"] != "http":
@@ -117,8 +220,11 @@ class RequestIdMiddleware:
         rid = _normalize_request_id(incoming) or uuid.uuid4().hex
 
         token = _request_id_var.set(rid)
+        stats, stats_token = start_query_stats()
+        method = scope.get("method", "")
         start = time.perf_counter()
         status_code = 500
+        HTTP_REQUESTS_IN_FLIGHT.inc(method=method)
 
         raw_query = scope.get("query_string", b"").decode("latin-1")
         query_keys = sorted(
@@ -135,20 +241,34 @@ class RequestIdMiddleware:
                 status_code = int(message["status"])
                 mutable_headers = MutableHeaders(scope=message)
                 mutable_headers[self.header_name] = rid
+                if self.server_timing:
+                    mutable_headers.append(
+                        "Server-Timing",
+                        server_timing(stats, time.perf_counter() - start),
+                    )
             await send(message)
 
         try:
             await self.app(scope, receive, send_wrapper)
         finally:
-            duration_ms = int((time.perf_counter() - start) * 1000)
-            self.logger.info(
-                "request",
-                extra={
-                    "method": scope.get("method", ""),
-                    "path": scope.get("path", ""),
-                    "query_keys": query_keys,
-                    "status_code": status_code,
-                    "duration_ms": duration_ms,
-                },
-            )
+            elapsed = time.perf_counter() - start
+            duration_ms = int(elapsed * 1000)
+            route = route_label(scope)
+            HTTP_REQUESTS_IN_FLIGHT.dec(method=method)
+            HTTP_REQUESTS.inc(method=method, route=route, status=str(status_code))
+            HTTP_REQUEST_DURATION.observe(elapsed, method=method, route=route)
+            if self._should_log(status_code):
+                self.logger.info(
+                    "request",
+                    extra={
+                        "method": method,
+                        "path": scope.get("path", ""),
+                        "query_keys": query_keys,
+                        "status_code": status_code,
+                        "duration_ms": duration_ms,
+                        "db_queries": stats.count,
+                        "db_ms": stats.duration_ms,
+                    },
+                )
+            reset_query_stats(stats_token)
             _request_id_var.reset(token)
@@ -6,10 +6,11 @@ from sqlalchemy import (
     DateTime,
     ForeignKey,
     Integer,
+    JSON,
     String,
     Text,
+    false,
     func,
-    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import relationship
@@ -50,14 +51,19 @@ class Entry(Base):
         ForeignKey("users.id"), index=True, nullable=False
     )
     question_id: Mapped[int] = mapped_column(ForeignKey("questions.id"), nullable=False)
-    audio_path: Mapped[str | None] = mapped_column(String, nullable=True)
+    # Indexed: shared content-addressed blobs are reference-counted by path.
+    audio_path: Mapped[str | None] = mapped_column(String, index=True, nullable=True)
     audio_mime: Mapped[str | None] = mapped_column(String, nullable=True)
     audio_size: Mapped[int | None] = mapped_column(Integer, nullable=True)
     audio_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
     audio_duration_ms: Mapped[int | None] = mapped_column(Integer, nullable=True)
     text_content: Mapped[str | None] = mapped_column(Text, nullable=True)
+    # "pending" while post-upload jobs run on the audio, then "ready"/"failed".
+    processing_status: Mapped[str] = mapped_column(
+        String, nullable=False, default="ready", server_default="ready"
+    )
     is_frozen: Mapped[bool] = mapped_column(
-        Boolean, nullable=False, default=False, server_default=text("0")
+        Boolean, nullable=False, default=False, server_default=false()
     )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
@@ -78,14 +84,120 @@ class EntryAsset(Base):
     entry_id: Mapped[str] = mapped_column(ForeignKey("entries.id"), nullable=False)
     user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), nullable=False)
     asset_type: Mapped[str] = mapped_column(String, nullable=False)
-    path: Mapped[str] = mapped_column(String, nullable=False)
+    path: Mapped[str] = mapped_column(String, index=True, nullable=False)
     mime: Mapped[str] = mapped_column(String, nullable=False)
     size: Mapped[int] = mapped_column(Integer, nullable=False)
     sha256: Mapped[str] = mapped_column(String(64), nullable=False)
     width: Mapped[int | None] = mapped_column(Integer, nullable=True)
     height: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    processing_status: Mapped[str] = mapped_column(
+        String, nullable=False, default="ready", server_default="ready"
+    )
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), server_default=func.now(), nullable=False
     )
 
     entry: Mapped[Entry] = relationship(back_populates="assets")
+    variants: Mapped[list["EntryAssetVariant"]] = relationship(
+        back_populates="asset",
+        cascade="all, delete-orphan",
+        order_by=lambda: EntryAssetVariant.width,
+    )
+
+
+class EntryAssetVariant(Base):
+    """Downscaled rendition of an image asset, stored next to the original."""
+
+    __tablename__ = "entry_asset_variants"
+
+    asset_id: Mapped[str] = mapped_column(
+        ForeignKey("entry_assets.id", ondelete="CASCADE"), primary_key=True
+    )
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    path: Mapped[str] = mapped_column(String, nullable=False)
+    mime: Mapped[str] = mapped_column(String, nullable=False)
+    size: Mapped[int] = mapped_column(Integer, nullable=False)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False)
+    width: Mapped[int] = mapped_column(Integer, nullable=False)
+    height: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+    asset: Mapped[EntryAsset] = relationship(back_populates="variants")
+
+
+class Job(Base):
+    """Durable background job, claimed by workers through ``app.jobs``."""
+
+    __tablename__ = "jobs"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    kind: Mapped[str] = mapped_column(String, nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict)
+    # Owner of the entry/asset the job works on, for /jobs introspection.
+    user_id: Mapped[str | None] = mapped_column(
+        ForeignKey("users.id"), index=True, nullable=True
+    )
+    status: Mapped[str] = mapped_column(
+        String, nullable=False, default="queued", server_default="queued"
+    )
+    attempts: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False)
+    run_after: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    locked_by: Mapped[str | None] = mapped_column(String, nullable=True)
+    locked_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    finished_at: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True), nullable=True
+    )
+
+
+class UploadSession(Base):
+    """Resumable audio upload, received in chunks through ``/uploads``."""
+
+    __tablename__ = "upload_sessions"
+
+    id: Mapped[str] = mapped_column(
+        String, primary_key=True, default=lambda: str(uuid.uuid4())
+    )
+    user_id: Mapped[str] = mapped_column(
+        ForeignKey("users.id"), index=True, nullable=False
+    )
+    filename: Mapped[str] = mapped_column(String, nullable=False)
+    content_type: Mapped[str] = mapped_column(String, nullable=False)
+    length: Mapped[int] = mapped_column(Integer, nullable=False)
+    offset: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    # Storage keys of the received chunks, in offset order.
+    chunks: Mapped[list] = mapped_column(JSON, nullable=False, default=list)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), index=True, nullable=False
+    )
+
+
+class LifelineBucket(Base):
+    """Entry and media counts of one user for one month, see ``app.lifeline``."""
+
+    __tablename__ = "lifeline_buckets"
+
+    user_id: Mapped[str] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    year: Mapped[int] = mapped_column(Integer, primary_key=True)
+    month: Mapped[int] = mapped_column(Integer, primary_key=True)
+    entry_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
+    media_count: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
+    )
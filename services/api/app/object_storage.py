@@ -0,0 +1,489 @@
+"""Where media bytes live.
+
+Keys are the relative paths recorded on the rows (``audio/<entry>.mp3``,
+``blobs/ab/cd/<sha256>``, ...). ``LocalMediaStorage`` keeps them under
+DATA_DIR, as before; ``S3MediaStorage`` stores them in an S3-compatible
+bucket (AWS S3, MinIO, ...) so several API replicas and workers share the
+same media. Every backend raises FileNotFoundError for a missing key.
+"""
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import threading
+from typing import IO, Any, Literal, Protocol
+import uuid
+
+try:
+    import boto3
+    from botocore.config import Config as BotoConfig
+    from botocore.exceptions import ClientError
+except ImportError:  # boto3 is optional: install the "s3" extra.
+    boto3 = None
+    BotoConfig = None
+    ClientError = None
+
+MediaStorageBackend = Literal["local", "s3"]
+
+_READ_CHUNK_SIZE = 256 * 1024
+# S3 rejects multipart parts below 5 MiB (except the last one).
+MIN_MULTIPART_PART_SIZE = 5 * 1024 * 1024
+
+
+class UploadSink(Protocol):
+    """Destination of one streamed upload, written chunk by chunk."""
+
+    def write(self, chunk: bytes) -> None: ...
+
+    def commit(self) -> None: ...
+
+    def abort(self) -> None: ...
+
+
+class MediaStorage(Protocol):
+    def open_upload(self, key: str, content_type: str) -> UploadSink: ...
+
+    def put_bytes(self, key: str, payload: bytes, content_type: str) -> None: ...
+
+    def store_file(self, key: str, path: Path, content_type: str) -> None:
+        """Store the local file ``path`` under ``key``, consuming it."""
+        ...
+
+    def read_bytes(self, key: str) -> bytes: ...
+
+    def iter_bytes(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        """Yield the bytes ``start..end`` (inclusive) of ``key``."""
+        ...
+
+    def size(self, key: str) -> int: ...
+
+    def exists(self, key: str) -> bool: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def copy(self, src: str, dst: str) -> None: ...
+
+    def move(self, src: str, dst: str) -> None: ...
+
+    def local_path(self, key: str) -> Path | None:
+        """Filesystem path of ``key`` when the backend has one, else ``None``."""
+        ...
+
+    def local_file(self, key: str) -> Any:
+        """Context manager yielding a local file with the content of ``key``."""
+        ...
+
+    def presigned_get_url(
+        self, key: str, *, content_type: str, expires_in: int
+    ) -> str | None: ...
+
+
+# --- Local filesystem ---------------------------------------------------------
+
+
+class _LocalFileSink:
+    """Writes to a temporary sibling, renamed over the key on commit."""
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._tmp_path = path.with_name(f"{path.name}.{os.urandom(6).hex()}.tmp")
+        self._handle: IO[bytes] | None = None
+
+    def write(self, chunk: bytes) -> None:
+        if self._handle is None:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self._tmp_path.open("wb")
+        self._handle.write(chunk)
+
+    def commit(self) -> None:
+        if self._handle is None:
+            self.write(b"")
+        self._handle.close()
+        os.replace(self._tmp_path, self._path)
+
+    def abort(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+        self._tmp_path.unlink(missing_ok=True)
+
+
+class LocalMediaStorage:
+    def __init__(self, root: Path):
+        self.root = root
+
+    def _path(self, key: str) -> Path:
+        return self.root / key
+
+    def open_upload(self, key: str, content_type: str) -> UploadSink:
+        return _LocalFileSink(self._path(key))
+
+    def put_bytes(self, key: str, payload: bytes, content_type: str) -> None:
+        sink = _LocalFileSink(self._path(key))
+        try:
+            sink.write(payload)
+            sink.commit()
+        except BaseException:
+            sink.abort()
+            raise
+
+    def store_file(self, key: str, path: Path, content_type: str) -> None:
+        target = self._path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Move next to the target first so the final rename stays atomic.
+        tmp_path = target.with_name(f"{target.name}.{os.urandom(6).hex()}.tmp")
+        shutil.move(path, tmp_path)
+        os.replace(tmp_path, target)
+
+    def read_bytes(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def iter_bytes(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        with self._path(key).open("rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = _READ_CHUNK_SIZE if remaining is None else remaining
+                chunk = f.read(min(size, _READ_CHUNK_SIZE))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def exists(self, key: str) -> bool:
+        return self._path(key).is_file()
+
+    def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def copy(self, src: str, dst: str) -> None:
+        source, target = self._path(src), self._path(dst)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+        try:
+            # Same volume: a hard link costs no space and no copy.
+            os.link(source, tmp_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            shutil.copyfile(source, tmp_path)
+        os.replace(tmp_path, target)
+
+    def move(self, src: str, dst: str) -> None:
+        target = self._path(dst)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(self._path(src), target)
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
+
+    @contextmanager
+    def local_file(self, key: str) -> Iterator[Path]:
+        yield self._path(key)
+
+    def presigned_get_url(
+        self, key: str, *, content_type: str, expires_in: int
+    ) -> str | None:
+        return None
+
+
+# --- S3-compatible object storage --------------------------------------------
+
+
+@dataclass(frozen=True)
+class S3StorageConfig:
+    bucket: str
+    endpoint_url: str | None = None
+    # Endpoint clients can reach, used in presigned URLs (e.g. the public
+    # MinIO address when the API talks to it over the compose network).
+    public_endpoint_url: str | None = None
+    region: str = "us-east-1"
+    access_key_id: str | None = None
+    secret_access_key: str | None = None
+    key_prefix: str = ""
+    force_path_style: bool = True
+    multipart_part_size: int = 8 * 1024 * 1024
+
+
+def s3_supported() -> bool:
+    return boto3 is not None
+
+
+def _is_missing(exc: Exception) -> bool:
+    if ClientError is None or not isinstance(exc, ClientError):
+        return False
+    error = exc.response.get("Error", {})
+    return error.get("Code") in {"404", "NoSuchKey", "NotFound"}
+
+
+class _S3MultipartSink:
+    """Streams an upload as multipart parts; small files become one PUT."""
+
+    def __init__(
+        self, client: Any, bucket: str, key: str, content_type: str, part_size: int
+    ):
+        self._client = client
+        self._bucket = bucket
+        self._key = key
+        self._content_type = content_type
+        self._part_size = max(part_size, MIN_MULTIPART_PART_SIZE)
+        self._buffer = bytearray()
+        self._upload_id: str | None = None
+        self._parts: list[dict[str, Any]] = []
+
+    def _flush_part(self) -> None:
+        if self._upload_id is None:
+            created = self._client.create_multipart_upload(
+                Bucket=self._bucket, Key=self._key, ContentType=self._content_type
+            )
+            self._upload_id = created["UploadId"]
+        number = len(self._parts) + 1
+        uploaded = self._client.upload_part(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            PartNumber=number,
+            Body=bytes(self._buffer),
+        )
+        self._parts.append({"ETag": uploaded["ETag"], "PartNumber": number})
+        self._buffer.clear()
+
+    def write(self, chunk: bytes) -> None:
+        self._buffer += chunk
+        if len(self._buffer) >= self._part_size:
+            self._flush_part()
+
+    def commit(self) -> None:
+        if self._upload_id is None:
+            self._client.put_object(
+                Bucket=self._bucket,
+                Key=self._key,
+                Body=bytes(self._buffer),
+                ContentType=self._content_type,
+            )
+            return
+        if self._buffer:
+            self._flush_part()
+        self._client.complete_multipart_upload(
+            Bucket=self._bucket,
+            Key=self._key,
+            UploadId=self._upload_id,
+            MultipartUpload={"Parts": self._parts},
+        )
+
+    def abort(self) -> None:
+        if self._upload_id is not None:
+            self._client.abort_multipart_upload(
+                Bucket=self._bucket, Key=self._key, UploadId=self._upload_id
+            )
+            self._upload_id = None
+        self._buffer.clear()
+
+
+class S3MediaStorage:
+    def __init__(
+        self,
+        config: S3StorageConfig,
+        *,
+        client: Any = None,
+        presign_client: Any = None,
+    ):
+        self.config = config
+        if client is None:
+            client = self._make_client(config.endpoint_url)
+        if presign_client is None:
+            presign_client = (
+                self._make_client(config.public_endpoint_url)
+                if config.public_endpoint_url
+                else client
+            )
+        self._client = client
+        self._presign_client = presign_client
+
+    def _make_client(self, endpoint_url: str | None) -> Any:
+        if boto3 is None:
+            raise RuntimeError(
+                "MEDIA_STORAGE_BACKEND=s3 requires boto3 (install the 's3' extra)"
+            )
+        return boto3.client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=self.config.region,
+            aws_access_key_id=self.config.access_key_id,
+            aws_secret_access_key=self.config.secret_access_key,
+            config=BotoConfig(
+                signature_version="s3v4",
+                s3={
+                    "addressing_style": "path"
+                    if self.config.force_path_style
+                    else "auto"
+                },
+            ),
+        )
+
+    def _key(self, key: str) -> str:
+        return f"{self.config.key_prefix}{key}"
+
+    def open_upload(self, key: str, content_type: str) -> UploadSink:
+        return _S3MultipartSink(
+            self._client,
+            self.config.bucket,
+            self._key(key),
+            content_type,
+            self.config.multipart_part_size,
+        )
+
+    def put_bytes(self, key: str, payload: bytes, content_type: str) -> None:
+        self._client.put_object(
+            Bucket=self.config.bucket,
+            Key=self._key(key),
+            Body=payload,
+            ContentType=content_type,
+        )
+
+    def store_file(self, key: str, path: Path, content_type: str) -> None:
+        sink = self.open_upload(key, content_type)
+        try:
+            with path.open("rb") as f:
+                while chunk := f.read(self.config.multipart_part_size):
+                    sink.write(chunk)
+            sink.commit()
+        except BaseException:
+            sink.abort()
+            raise
+        path.unlink(missing_ok=True)
+
+    def _get(self, key: str, **kwargs: Any) -> Any:
+        try:
+            return self._client.get_object(
+                Bucket=self.config.bucket, Key=self._key(key), **kwargs
+            )
+        except Exception as exc:
+            if _is_missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+
+    def read_bytes(self, key: str) -> bytes:
+        return self._get(key)["Body"].read()
+
+    def iter_bytes(
+        self, key: str, start: int = 0, end: int | None = None
+    ) -> Iterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        body = self._get(key, Range=byte_range)["Body"]
+        try:
+            yield from body.iter_chunks(_READ_CHUNK_SIZE)
+        finally:
+            body.close()
+
+    def size(self, key: str) -> int:
+        try:
+            head = self._client.head_object(
+                Bucket=self.config.bucket, Key=self._key(key)
+            )
+        except Exception as exc:
+            if _is_missing(exc):
+                raise FileNotFoundError(key) from exc
+            raise
+        return int(head["ContentLength"])
+
+    def exists(self, key: str) -> bool:
+        try:
+            self.size(key)
+        except FileNotFoundError:
+            return False
+        return True
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.config.bucket, Key=self._key(key))
+
+    def copy(self, src: str, dst: str) -> None:
+        try:
+            self._client.copy_object(
+                Bucket=self.config.bucket,
+                Key=self._key(dst),
+                CopySource={"Bucket": self.config.bucket, "Key": self._key(src)},
+            )
+        except Exception as exc:
+            if _is_missing(exc):
+                raise FileNotFoundError(src) from exc
+            raise
+
+    def move(self, src: str, dst: str) -> None:
+        self.copy(src, dst)
+        self.delete(src)
+
+    def local_path(self, key: str) -> Path | None:
+        return None
+
+    @contextmanager
+    def local_file(self, key: str) -> Iterator[Path]:
+        """Download ``key`` to a temporary file for decoders that need a path."""
+        suffix = Path(key).suffix
+        fd, name = tempfile.mkstemp(prefix="echo-media-", suffix=suffix)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in self.iter_bytes(key):
+                    f.write(chunk)
+            yield Path(name)
+        finally:
+            Path(name).unlink(missing_ok=True)
+
+    def presigned_get_url(
+        self, key: str, *, content_type: str, expires_in: int
+    ) -> str | None:
+        return self._presign_client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.config.bucket,
+                "Key": self._key(key),
+                "ResponseContentType": content_type,
+            },
+            ExpiresIn=expires_in,
+        )
+
+
+# --- Configuration ------------------------------------------------------------
+
+_storages: dict[tuple[Any, ...], MediaStorage] = {}
+_storages_lock = threading.Lock()
+
+
+def media_storage_from_settings(settings: Any) -> MediaStorage:
+    """Storage described by ``settings``; one instance (and client) per config."""
+    if settings.media_storage_backend == "s3":
+        config = S3StorageConfig(
+            bucket=settings.s3_bucket,
+            endpoint_url=settings.s3_endpoint_url,
+            public_endpoint_url=settings.s3_public_endpoint_url,
+            region=settings.s3_region,
+            access_key_id=settings.s3_access_key_id,
+            secret_access_key=settings.s3_secret_access_key,
+            key_prefix=settings.s3_key_prefix,
+            force_path_style=settings.s3_force_path_style,
+            multipart_part_size=settings.s3_multipart_part_size_mb * 1024 * 1024,
+        )
+        cache_key: tuple[Any, ...] = ("s3", config)
+    else:
+        cache_key = ("local", settings.data_dir)
+
+    with _storages_lock:
+        storage = _storages.get(cache_key)
+        if storage is None:
+            if cache_key[0] == "s3":
+                storage = S3MediaStorage(cache_key[1])
+            else:
+                storage = LocalMediaStorage(settings.data_dir)
+            _storages[cache_key] = storage
+        return storage
@@ -0,0 +1,100 @@
+"""Post-upload media processing, run as ``app.jobs`` jobs.
+
+Upload handlers only stream bytes to disk, record the row as ``pending`` and
+enqueue one of these jobs in the same transaction.
+"""
+
+from typing import Any
+
+from sqlalchemy.orm import Session
+
+from app.jobs import enqueue_job, job_kind
+from app.models import Entry, EntryAsset
+from app.object_storage import MediaStorage
+from app.settings import settings
+from app.storage import probe_audio_duration_ms
+from app.thumbnails import generate_asset_variants
+from app.waveform import PEAKS_MIME, compute_peaks, peaks_path
+
+ENTRY_AUDIO_JOB = "entry.audio"
+ASSET_IMAGE_JOB = "asset.image"
+
+
+def enqueue_entry_audio_processing(
+    db: Session, entry: Entry, *, max_attempts: int
+) -> None:
+    entry.processing_status = "pending"
+    enqueue_job(
+        db,
+        ENTRY_AUDIO_JOB,
+        # The digest identifies the upload: a job for replaced audio is a no-op.
+        {"entry_id": entry.id, "audio_sha256": entry.audio_sha256},
+        user_id=entry.user_id,
+        max_attempts=max_attempts,
+    )
+
+
+def enqueue_asset_image_processing(
+    db: Session, asset: EntryAsset, *, max_attempts: int
+) -> None:
+    asset.processing_status = "pending"
+    enqueue_job(
+        db,
+        ASSET_IMAGE_JOB,
+        {"asset_id": asset.id},
+        user_id=asset.user_id,
+        max_attempts=max_attempts,
+    )
+
+
+def _current_entry_audio(db: Session, payload: dict[str, Any]) -> Entry | None:
+    entry = db.get(Entry, payload["entry_id"])
+    if entry is None or entry.audio_sha256 != payload["audio_sha256"]:
+        return None
+    return entry
+
+
+def _entry_audio_failed(db: Session, payload: dict[str, Any]) -> None:
+    entry = _current_entry_audio(db, payload)
+    if entry is not None:
+        entry.processing_status = "failed"
+
+
+@job_kind(ENTRY_AUDIO_JOB, on_failure=_entry_audio_failed)
+def process_entry_audio(
+    db: Session, storage: MediaStorage, payload: dict[str, Any]
+) -> None:
+    entry = _current_entry_audio(db, payload)
+    if entry is None or entry.audio_path is None or entry.audio_mime is None:
+        return
+    # Keyed by digest: re-uploads of identical audio reuse the same peaks.
+    peaks_key = peaks_path(entry.audio_sha256)
+    with storage.local_file(entry.audio_path) as audio_path:
+        entry.audio_duration_ms = probe_audio_duration_ms(audio_path, entry.audio_mime)
+        if not storage.exists(peaks_key):
+            peaks = compute_peaks(
+                audio_path,
+                entry.audio_mime,
+                buckets=settings.waveform_peaks_buckets,
+                ffmpeg=settings.ffmpeg_binary,
+            )
+            if peaks is not None:
+                storage.put_bytes(peaks_key, peaks, PEAKS_MIME)
+    entry.processing_status = "ready"
+
+
+def _asset_image_failed(db: Session, payload: dict[str, Any]) -> None:
+    asset = db.get(EntryAsset, payload["asset_id"])
+    if asset is not None:
+        asset.processing_status = "failed"
+
+
+@job_kind(ASSET_IMAGE_JOB, on_failure=_asset_image_failed)
+def process_asset_image(
+    db: Session, storage: MediaStorage, payload: dict[str, Any]
+) -> None:
+    asset = db.get(EntryAsset, payload["asset_id"])
+    if asset is None:
+        return
+    generate_asset_variants(db, storage, asset)
+    asset.processing_status = "ready"
@@ -0,0 +1,106 @@
+"""SQL statement accounting per request, and the slow-query log.
+
+Cursor-level hooks on every SQLAlchemy ``Engine`` add each statement's count
+and duration to the ``QueryStats`` of the current request (a context
+variable set by ``RequestIdMiddleware``, copied into the threadpool that
+runs sync endpoints). Statements slower than ``SLOW_QUERY_MS`` are logged
+with the shape of their bound parameters (names and types, never values).
+"""
+
+from contextvars import ContextVar, Token
+from dataclasses import dataclass
+import logging
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.settings import settings
+
+logger = logging.getLogger("app.sql")
+
+_STATEMENT_LOG_CHARS = 2000
+_START_KEY = "echo_query_start"
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    duration: float = 0.0
+
+    @property
+    def duration_ms(self) -> float:
+        return round(self.duration * 1000, 1)
+
+
+_query_stats_var: ContextVar[QueryStats | None] = ContextVar(
+    "query_stats", default=None
+)
+
+
+def start_query_stats() -> tuple[QueryStats, Token]:
+    stats = QueryStats()
+    return stats, _query_stats_var.set(stats)
+
+
+def reset_query_stats(token: Token) -> None:
+    _query_stats_var.reset(token)
+
+
+def current_query_stats() -> QueryStats | None:
+    return _query_stats_var.get()
+
+
+def _value_shape(values: Any) -> Any:
+    if isinstance(values, dict):
+        return {str(key): type(value).__name__ for key, value in values.items()}
+    if isinstance(values, (list, tuple)):
+        return [type(value).__name__ for value in values]
+    return type(values).__name__
+
+
+def parameter_shape(parameters: Any, executemany: bool) -> Any:
+    """Names and types of bound parameters, safe to log."""
+    if parameters is None:
+        return None
+    if executemany and isinstance(parameters, (list, tuple)):
+        first = _value_shape(parameters[0]) if parameters else None
+        return {"rows": len(parameters), "row": first}
+    return _value_shape(parameters)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Statements on one connection run one at a time.
+    conn.info[_START_KEY] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop(_START_KEY, None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+
+    stats = _query_stats_var.get()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += elapsed
+
+    threshold_ms = settings.slow_query_ms
+    if threshold_ms > 0 and elapsed * 1000 >= threshold_ms:
+        logger.warning(
+            "slow query",
+            extra={
+                "duration_ms": round(elapsed * 1000, 1),
+                "statement": " ".join(statement.split())[:_STATEMENT_LOG_CHARS],
+                "params": parameter_shape(parameters, executemany),
+                "executemany": executemany,
+            },
+        )
+
+
+# Registered on the Engine class so every engine is covered: the API's and
+# the ones tests build.
+if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,51 @@
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.models import Job
+from app.schemas import JobOut, JobsListResponse
+from app.security import AuthenticatedUser, get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+
+@router.get("", response_model=JobsListResponse)
+def list_jobs(
+    status: Literal["queued", "running", "succeeded", "failed"] | None = None,
+    kind: str | None = None,
+    limit: int = Query(default=50, ge=1, le=200),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> JobsListResponse:
+    query = select(Job).where(Job.user_id == current_user.id)
+    if status is not None:
+        query = query.where(Job.status == status)
+    if kind is not None:
+        query = query.where(Job.kind == kind)
+    jobs = db.execute(query.order_by(Job.id.desc()).limit(limit)).scalars().all()
+
+    counts = dict(
+        db.execute(
+            select(Job.status, func.count())
+            .where(Job.user_id == current_user.id)
+            .group_by(Job.status)
+        ).all()
+    )
+    return JobsListResponse(
+        items=[JobOut.model_validate(job) for job in jobs], counts=counts
+    )
+
+
+@router.get("/{job_id}", response_model=JobOut)
+def get_job(
+    job_id: int,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> JobOut:
+    job = db.get(Job, job_id)
+    if job is None or job.user_id != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobOut.model_validate(job)
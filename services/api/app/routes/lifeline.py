@@ -0,0 +1,30 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+
+from app.db import get_db
+from app.lifeline import LifelineGranularity, lifeline_buckets
+from app.schemas import LifelineBucketOut, LifelineOut
+from app.security import AuthenticatedUser, get_current_user
+
+router = APIRouter(prefix="/lifeline", tags=["lifeline"])
+
+
+@router.get("", response_model=LifelineOut)
+def get_lifeline(
+    granularity: LifelineGranularity = "year",
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> LifelineOut:
+    """Entry and media counts per year (or month) with a 0-1 density."""
+    buckets = lifeline_buckets(db, current_user.id, granularity)
+    max_entry_count = max((bucket["entry_count"] for bucket in buckets), default=0)
+    return LifelineOut(
+        granularity=granularity,
+        max_entry_count=max_entry_count,
+        buckets=[
+            LifelineBucketOut(
+                **bucket, density=round(bucket["entry_count"] / max_entry_count, 4)
+            )
+            for bucket in buckets
+        ],
+    )
@@ -0,0 +1,61 @@
+import hmac
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+import app.db
+from app.metrics import CONTENT_TYPE, render_metrics, scrape_samples
+from app.security import user_cache
+from app.settings import settings
+
+# Mounted at the application root: /metrics is where Prometheus scrapes.
+router = APIRouter(tags=["system"])
+
+
+def _user_cache_samples() -> list[str]:
+    stats = user_cache.stats()
+    lines = scrape_samples(
+        "echo_auth_user_cache_size", "Users held by the auth cache.", stats["size"]
+    )
+    for name in ("hits", "misses", "evictions", "invalidations"):
+        lines.extend(
+            scrape_samples(
+                f"echo_auth_user_cache_{name}_total",
+                f"Auth user cache {name}.",
+                stats[name],
+                kind="counter",
+            )
+        )
+    return lines
+
+
+def _ensure_scraper(request: Request) -> None:
+    token = settings.metrics_bearer_token
+    if not token:
+        return
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not hmac.compare_digest(
+        credentials.encode("utf-8"), token.encode("utf-8")
+    ):
+        raise HTTPException(
+            status_code=401,
+            detail={"code": "invalid_token", "message": "Invalid metrics token"},
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", include_in_schema=False)
+def metrics(request: Request) -> PlainTextResponse:
+    if not settings.metrics_enabled:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "not_found", "message": "Not Found"},
+        )
+    _ensure_scraper(request)
+    # The engine itself, not a session: a scrape must not move the session
+    # gauges it reports.
+    return PlainTextResponse(
+        render_metrics(app.db.engine, extra=_user_cache_samples()),
+        media_type=CONTENT_TYPE,
+        headers={"Cache-Control": "no-store"},
+    )
@@ -0,0 +1,212 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+from starlette.requests import ClientDisconnect
+
+from app.db import get_db
+from app.models import UploadSession
+from app.object_storage import media_storage_from_settings
+from app.schemas import UploadCreateIn, UploadOut
+from app.security import AuthenticatedUser, get_current_user
+from app.settings import settings
+from app.storage import (
+    ALLOWED_MIME_TYPES,
+    has_valid_signature,
+    run_upload_io,
+    validate_upload_extension,
+)
+from app.uploads import (
+    chunk_key,
+    delete_upload_chunks,
+    get_user_upload,
+    purge_expired_uploads,
+    upload_expiry,
+)
+
+router = APIRouter(prefix="/uploads", tags=["uploads"])
+
+# Bytes of the first chunk checked against the declared MIME type, as in
+# app.storage.stream_upload.
+_SIGNATURE_HEADER_SIZE = 512
+
+
+def _offset_headers(upload: UploadSession) -> dict[str, str]:
+    return {
+        "Upload-Offset": str(upload.offset),
+        "Upload-Length": str(upload.length),
+        "Cache-Control": "no-store",
+    }
+
+
+@router.post("", response_model=UploadOut, status_code=201)
+def create_upload(
+    payload: UploadCreateIn,
+    request: Request,
+    response: Response,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> UploadSession:
+    if payload.content_type not in ALLOWED_MIME_TYPES:
+        raise HTTPException(
+            status_code=422,
+            detail={
+                "code": "unsupported_mime",
+                "message": "Unsupported audio MIME type",
+            },
+        )
+    validate_upload_extension(
+        payload.filename,
+        payload.content_type,
+        ALLOWED_MIME_TYPES[payload.content_type],
+    )
+    if payload.length > settings.max_upload_bytes:
+        raise HTTPException(
+            status_code=413,
+            detail={
+                "code": "payload_too_large",
+                "message": "Audio file exceeds upload size limit",
+            },
+        )
+
+    purge_expired_uploads(db, media_storage_from_settings(settings))
+    upload = UploadSession(
+        user_id=current_user.id,
+        filename=payload.filename,
+        content_type=payload.content_type,
+        length=payload.length,
+        offset=0,
+        chunks=[],
+        expires_at=upload_expiry(settings.upload_session_ttl_hours),
+    )
+    db.add(upload)
+    db.commit()
+    db.refresh(upload)
+    response.headers["Location"] = str(
+        request.url_for("get_upload", upload_id=upload.id)
+    )
+    response.headers.update(_offset_headers(upload))
+    return upload
+
+
+@router.api_route("/{upload_id}", methods=["GET", "HEAD"], response_model=UploadOut)
+def get_upload(
+    upload_id: str,
+    response: Response,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> UploadSession:
+    """Current offset of an upload (also answered to ``HEAD``) to resume from."""
+    upload = get_user_upload(db, upload_id, current_user.id)
+    response.headers.update(_offset_headers(upload))
+    return upload
+
+
+@router.patch("/{upload_id}", status_code=204)
+async def append_upload_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(alias="Upload-Offset", ge=0),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> Response:
+    """Append the request body at ``Upload-Offset``.
+
+    The offset must be the one the server reports; a body cut off by the
+    network is kept up to the last byte received.
+    """
+    upload = get_user_upload(db, upload_id, current_user.id)
+    if upload_offset != upload.offset:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "offset_mismatch",
+                "message": f"Upload is at offset {upload.offset}",
+            },
+            headers=_offset_headers(upload),
+        )
+
+    length, content_type, chunks = upload.length, upload.content_type, upload.chunks
+    # Do not hold a database transaction open while the body streams in.
+    db.rollback()
+
+    storage = media_storage_from_settings(settings)
+    key = chunk_key(upload_id, upload_offset)
+    sink = storage.open_upload(key, "application/octet-stream")
+    header = b""
+    received = 0
+    try:
+        try:
+            async for chunk in request.stream():
+                if not chunk:
+                    continue
+                if upload_offset + received + len(chunk) > length:
+                    raise HTTPException(
+                        status_code=413,
+                        detail={
+                            "code": "payload_too_large",
+                            "message": "Chunk goes past the declared upload length",
+                        },
+                    )
+                if upload_offset == 0 and len(header) < _SIGNATURE_HEADER_SIZE:
+                    header += chunk[: _SIGNATURE_HEADER_SIZE - len(header)]
+                    checkable = len(header) == _SIGNATURE_HEADER_SIZE
+                    if checkable and not has_valid_signature(header, content_type):
+                        raise HTTPException(
+                            status_code=422,
+                            detail={
+                                "code": "invalid_signature",
+                                "message": "Audio signature does not match MIME type",
+                            },
+                        )
+                await run_upload_io(sink.write, chunk)
+                received += len(chunk)
+        except ClientDisconnect:
+            # Keep what arrived: the client resumes from the new offset.
+            pass
+        if received == 0:
+            await run_upload_io(sink.abort)
+        else:
+            await run_upload_io(sink.commit)
+    except Exception:
+        await run_upload_io(sink.abort)
+        raise
+
+    if received:
+        recorded = db.execute(
+            update(UploadSession)
+            .where(
+                UploadSession.id == upload_id,
+                UploadSession.offset == upload_offset,
+            )
+            .values(offset=upload_offset + received, chunks=[*chunks, key])
+        )
+        if recorded.rowcount != 1:
+            # A concurrent PATCH at the same offset won.
+            db.rollback()
+            await run_upload_io(storage.delete, key)
+            db.refresh(upload)
+            raise HTTPException(
+                status_code=409,
+                detail={
+                    "code": "offset_mismatch",
+                    "message": f"Upload is at offset {upload.offset}",
+                },
+                headers=_offset_headers(upload),
+            )
+        db.commit()
+    db.refresh(upload)
+    return Response(status_code=204, headers=_offset_headers(upload))
+
+
+@router.delete("/{upload_id}")
+def delete_upload(
+    upload_id: str,
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> dict[str, str]:
+    upload = get_user_upload(db, upload_id, current_user.id)
+    chunks = list(upload.chunks)
+    db.delete(upload)
+    db.commit()
+    delete_upload_chunks(media_storage_from_settings(settings), chunks)
+    return {"status": "deleted", "id": upload_id}
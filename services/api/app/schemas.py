@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Any, Optional
 
 import pydantic
 from pydantic import BaseModel, Field
@@ -32,6 +32,23 @@ class EntryAssetOut(ORMBaseModel):
     download_url: str = ""
     width: Optional[int] = None
     height: Optional[int] = None
+    # Variant name -> URL of the downscaled rendition, once generated.
+    variants: dict[str, str] = Field(default_factory=dict)
+    processing_status: str = "ready"
+
+
+class AssetUploadResult(ORMBaseModel):
+    filename: str
+    # Status a single-file upload of this file would have answered.
+    status: int
+    asset: Optional[EntryAssetOut] = None
+    # {"code": ..., "message": ...} when the file was rejected.
+    error: Optional[dict[str, str]] = None
+
+
+class EntryAssetsBatchResponse(ORMBaseModel):
+    # One result per uploaded file, in request order.
+    items: list[AssetUploadResult]
 
 
 class EntryOut(ORMBaseModel):
@@ -45,6 +62,7 @@ class EntryOut(ORMBaseModel):
     is_frozen: bool
     created_at: datetime
     assets: list[EntryAssetOut] = Field(default_factory=list)
+    processing_status: str = "ready"
 
 
 class EntryUpdateIn(BaseModel):
@@ -55,9 +73,99 @@ class EntryUpdateIn(BaseModel):
 class EntriesListResponse(ORMBaseModel):
     items: list[EntryOut]
     next_offset: Optional[int] = None
+    next_cursor: Optional[str] = None
     limit: int
     offset: int
 
 
+class EntriesBatchGetIn(BaseModel):
+    ids: list[str] = Field(min_length=1, max_length=100)
+
+
+class EntryBatchError(BaseModel):
+    id: str
+    # HTTP status GET /entries/{id} would have answered.
+    status: int
+    code: str
+    message: str
+
+
+class EntriesBatchGetResponse(ORMBaseModel):
+    # Found entries, in the order of the requested ids (duplicates removed).
+    items: list[EntryOut]
+    errors: list[EntryBatchError] = Field(default_factory=list)
+
+
+class EntrySearchHitOut(EntryOut):
+    # Excerpt of text_content around the matches, wrapped in <mark></mark>.
+    snippet: str
+    # bm25 score: lower is more relevant.
+    rank: float
+
+
+class EntrySearchResponse(ORMBaseModel):
+    items: list[EntrySearchHitOut]
+    next_cursor: Optional[str] = None
+    limit: int
+
+
+class AudioPeaksOut(ORMBaseModel):
+    buckets: int
+    # One [min, max] int8 pair per bucket, over the whole recording.
+    peaks: list[tuple[int, int]]
+
+
+class JobOut(ORMBaseModel):
+    id: int
+    kind: str
+    payload: dict[str, Any]
+    status: str
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    last_error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class JobsListResponse(ORMBaseModel):
+    items: list[JobOut]
+    # Number of the user's jobs in each status.
+    counts: dict[str, int]
+
+
+class UploadCreateIn(BaseModel):
+    filename: str
+    content_type: str
+    # Total size in bytes, known up front.
+    length: int = Field(gt=0)
+
+
+class UploadOut(ORMBaseModel):
+    id: str
+    filename: str
+    content_type: str
+    length: int
+    # Bytes received so far: the offset of the next PATCH.
+    offset: int
+    expires_at: datetime
+
+
+class LifelineBucketOut(ORMBaseModel):
+    year: int
+    month: Optional[int] = None
+    entry_count: int
+    media_count: int
+    # entry_count relative to the user's busiest bucket, from 0 to 1.
+    density: float
+
+
+class LifelineOut(ORMBaseModel):
+    granularity: str
+    # Only buckets with entries, oldest first; missing ones have density 0.
+    buckets: list[LifelineBucketOut]
+    max_entry_count: int
+
+
 class ErrorResponse(ORMBaseModel):
     error: dict[str, str]
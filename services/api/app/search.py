@@ -0,0 +1,135 @@
+"""Full-text search over ``Entry.text_content``.
+
+Backed by the SQLite FTS5 table ``entries_fts`` (migration 0013), which
+triggers keep in sync with ``entries`` and which carries the ``entry_id``
+and ``user_id`` of each row. The MATCH expression is scoped to the
+searching user's ``user_id``, so FTS5 only visits that user's rows.
+
+Results are ordered by bm25 rank then the FTS rowid, and pages are fetched
+by keyset on ``(rank, rowid)``. bm25 weighs terms with statistics of the
+whole index (every user's rows), so a write made between two page requests,
+by anyone, can shift ranks: a hit may then move across the cursor and be
+skipped or returned twice. While the index is unchanged, pages cover every
+hit exactly once.
+
+Snippets are HTML: the entry text is escaped, then matched terms are
+wrapped in ``<mark>``.
+"""
+
+from dataclasses import dataclass
+import html
+import re
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+FTS_TABLE = "entries_fts"
+SNIPPET_OPEN = "<mark>"
+SNIPPET_CLOSE = "</mark>"
+SNIPPET_ELLIPSIS = "…"
+SNIPPET_TOKENS = 16
+
+# Placeholders handed to snippet() (Unicode private use characters), swapped
+# for the <mark> tags once the text around them is escaped.
+_RAW_OPEN = "\ue000"
+_RAW_CLOSE = "\ue001"
+# bm25 weights of the entries_fts columns: only text_content is scored.
+_BM25_WEIGHTS = "bm25(1.0, 0.0, 0.0)"
+
+_TERM_RE = re.compile(r"\w+", re.UNICODE)
+_MAX_TERMS = 16
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    entry_id: str
+    rowid: int
+    rank: float
+    snippet: str
+
+
+def search_available(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def fts_match_expression(query: str) -> str | None:
+    """FTS5 MATCH expression for free text: every word, the last as a prefix.
+
+    Words are quoted, so FTS5 operators and column filters typed by users are
+    searched as plain text.
+    """
+    terms = _TERM_RE.findall(query)[:_MAX_TERMS]
+    if not terms:
+        return None
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def _user_match(user_id: str, match: str) -> str:
+    user_phrase = '"' + user_id.replace('"', '""') + '"'
+    return f"user_id : {user_phrase} AND text_content : ({match})"
+
+
+def _highlight(snippet: str) -> str:
+    return (
+        html.escape(snippet)
+        .replace(_RAW_OPEN, SNIPPET_OPEN)
+        .replace(_RAW_CLOSE, SNIPPET_CLOSE)
+    )
+
+
+def search_entries(
+    db: Session,
+    user_id: str,
+    match: str,
+    *,
+    limit: int,
+    after: tuple[float, int] | None = None,
+) -> list[SearchHit]:
+    keyset = ""
+    params: dict[str, object] = {
+        "match": _user_match(user_id, match),
+        "weights": _BM25_WEIGHTS,
+        "user_id": user_id,
+        "limit": limit,
+        "open": _RAW_OPEN,
+        "close": _RAW_CLOSE,
+        "ellipsis": SNIPPET_ELLIPSIS,
+        "tokens": SNIPPET_TOKENS,
+    }
+    if after is not None:
+        keyset = (
+            f"AND ({FTS_TABLE}.rank > :after_rank "
+            f"OR ({FTS_TABLE}.rank = :after_rank AND {FTS_TABLE}.rowid > :after_rowid))"
+        )
+        params["after_rank"], params["after_rowid"] = after
+    rows = db.execute(
+        text(
+            f"""
+            SELECT entries.id AS entry_id,
+                   {FTS_TABLE}.rowid AS rowid,
+                   {FTS_TABLE}.rank AS rank,
+                   snippet({FTS_TABLE}, 0, :open, :close, :ellipsis, :tokens)
+                       AS snippet
+            FROM {FTS_TABLE}
+            JOIN entries ON entries.id = {FTS_TABLE}.entry_id
+            WHERE {FTS_TABLE} MATCH :match
+              AND {FTS_TABLE}.rank MATCH :weights
+              AND entries.user_id = :user_id
+              {keyset}
+            ORDER BY {FTS_TABLE}.rank, {FTS_TABLE}.rowid
+            LIMIT :limit
+            """
+        ),
+        params,
+    ).all()
+    return [
+        SearchHit(
+            entry_id=row.entry_id,
+            rowid=int(row.rowid),
+            rank=float(row.rank),
+            snippet=_highlight(row.snippet),
+        )
+        for row in rows
+    ]
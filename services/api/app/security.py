@@ -1,10 +1,15 @@
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+import threading
+import time
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
 
 from app.db import get_db
 from app.models import User
@@ -14,6 +19,117 @@ pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/login")
 
 
+@dataclass(frozen=True)
+class AuthenticatedUser:
+    """Snapshot of the authenticated user, safe to share across sessions."""
+
+    id: str
+    email: str
+    is_active: bool
+
+
+class UserCache:
+    """Process-local TTL + LRU cache of active users keyed by user id.
+
+    A ``ttl_seconds`` of 0 disables caching. Entries are dropped on User
+    updates/deletes flushed through the ORM, and again when that transaction
+    commits (see the listeners below); other writers should call
+    ``invalidate``. The TTL bounds staleness for changes made outside this
+    process.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[float, AuthenticatedUser]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    def get(self, user_id: str) -> AuthenticatedUser | None:
+        with self._lock:
+            cached = self._entries.get(user_id)
+            if cached is None or cached[0] <= time.monotonic():
+                if cached is not None:
+                    del self._entries[user_id]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, user: AuthenticatedUser) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[user.id] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(user.id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            if self._entries.pop(user_id, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+user_cache = UserCache(
+    max_entries=settings.auth_user_cache_max_entries,
+    ttl_seconds=settings.auth_user_cache_ttl_seconds,
+)
+
+
+def invalidate_cached_user(user_id: str) -> None:
+    user_cache.invalidate(user_id)
+
+
+# Session.info key of the users changed in the session's transaction.
+_CHANGED_USERS_KEY = "changed_user_ids"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_change(_mapper, _connection, target: User) -> None:
+    invalidate_cached_user(target.id)
+    # Until the commit, concurrent requests still read (and may cache again)
+    # the previous row: invalidate once more when it becomes visible.
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(_CHANGED_USERS_KEY, set()).add(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session: Session) -> None:
+    for user_id in session.info.pop(_CHANGED_USERS_KEY, ()):
+        invalidate_cached_user(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_rolled_back_users(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS_KEY, None)
+
+
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
 
@@ -101,13 +217,22 @@ def verify_refresh_token(token: str) -> str:
 
 def get_current_user(
     token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> User:
+) -> AuthenticatedUser:
     payload = _decode_token(token, "access")
-    user = db.query(User).filter(User.id == payload["sub"]).first()
+    user_id = str(payload["sub"])
+    cached = user_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    user = db.query(User).filter(User.id == user_id).first()
     if user is None or not user.is_active:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail={"code": "invalid_user", "message": "Inactive or missing user"},
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user
+    authenticated = AuthenticatedUser(
+        id=user.id, email=user.email, is_active=user.is_active
+    )
+    user_cache.put(authenticated)
+    return authenticated
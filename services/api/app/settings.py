@@ -1,7 +1,7 @@
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Literal
 
-from pydantic import field_validator
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, NoDecode, SettingsConfigDict
 
 
@@ -13,15 +13,109 @@ class Settings(BaseSettings):
     max_upload_size_mb: int = 25
     max_upload_image_mb: int = 8
     max_images_per_entry: int = 8
+    # Let the reverse proxy send media bytes once the API has authorized the
+    # request: "none" streams from Python, "x-accel-redirect" (nginx) or
+    # "x-sendfile" (Apache/lighttpd) only return an internal-redirect header.
+    media_offload: Literal["none", "x-accel-redirect", "x-sendfile"] = "none"
+    # nginx `internal` location aliased to DATA_DIR, used by x-accel-redirect.
+    media_offload_internal_prefix: str = "/_protected_media"
+    # Emit HMAC-signed, expiring media URLs that are served without bearer
+    # token or database lookup. The key defaults to JWT_SECRET_KEY.
+    media_signed_urls: bool = False
+    media_url_secret_key: str = ""
+    media_signed_url_ttl_seconds: int = 900
+    # "local" keeps media under DATA_DIR; "s3" stores it in an S3-compatible
+    # bucket (AWS S3, MinIO, ...) shared by every API replica and worker.
+    media_storage_backend: Literal["local", "s3"] = "local"
+    s3_bucket: str = "echo-media"
+    # Endpoint the API and workers use (unset for AWS S3).
+    s3_endpoint_url: str | None = None
+    # Endpoint put in presigned URLs, when clients reach it under another name.
+    s3_public_endpoint_url: str | None = None
+    s3_region: str = "us-east-1"
+    s3_access_key_id: str | None = None
+    s3_secret_access_key: str | None = None
+    s3_key_prefix: str = ""
+    s3_force_path_style: bool = True
+    s3_multipart_part_size_mb: int = 8
+    # "redirect" answers authorized media requests with a 307 to a presigned
+    # GET (the bucket sends the bytes); "proxy" streams them through the API.
+    s3_delivery: Literal["redirect", "proxy"] = "redirect"
+    s3_presigned_url_ttl_seconds: int = 300
+    # "content_addressed" stores each upload once per SHA-256 under
+    # blobs/ab/cd/<sha256> (see app.media_store); "per_entry" keeps
+    # audio/<entry><ext> and images/<entry>/<asset><ext>.
+    media_storage_layout: Literal["per_entry", "content_addressed"] = "per_entry"
+    # Resumable uploads (/uploads) not finalized within this delay are dropped
+    # with their chunks.
+    upload_session_ttl_hours: int = 24
+    # Worker threads handling upload disk writes and hashing off the event loop.
+    upload_io_workers: int = 4
+    # Background jobs (post-upload media processing). The API runs them on
+    # in-process threads unless JOB_RUNNER_IN_PROCESS is disabled, in which
+    # case `python -m app.worker` must be running.
+    job_runner_in_process: bool = True
+    job_worker_concurrency: int = 2
+    job_poll_interval_seconds: float = 1.0
+    job_max_attempts: int = 5
+    # Retry n waits job_retry_base_seconds * 2**(n-1).
+    job_retry_base_seconds: float = 5.0
+    # A running job whose worker went silent this long is handed out again.
+    job_lease_seconds: float = 300.0
+    # Waveform peaks computed for each uploaded audio file (min/max pairs).
+    # WAV/AIFF are decoded natively; other formats need this ffmpeg binary
+    # (empty to disable) and are left without peaks when it is missing.
+    waveform_peaks_buckets: int = 2048
+    ffmpeg_binary: str = "ffmpeg"
+    # Log records are queued and written by a background thread; when the
+    # queue is full they are dropped (echo_log_records_dropped_total) rather
+    # than slowing requests down. 0 writes synchronously.
+    log_queue_size: int = 10_000
+    # Share of successful requests (status < 400) written to the access log.
+    access_log_sample_rate: float = Field(default=1.0, ge=0.0, le=1.0)
+    # SQL statements slower than this are logged ("slow query", with the
+    # names and types of their parameters); 0 disables the log.
+    slow_query_ms: float = 200.0
+    # Server-Timing response header with the request's SQL time and statement
+    # count (also in the access log as db_queries/db_ms).
+    server_timing_enabled: bool = True
+    # Prometheus text exposition on /metrics (outside /api/v1). Off by
+    # default: it shows per-route traffic, pool state and auth cache stats.
+    metrics_enabled: bool = False
+    # When set, /metrics requires "Authorization: Bearer <token>".
+    metrics_bearer_token: str = ""
     # Maximum allowed size for optional entry text content.
     max_text_chars: int = 10_000
 
+    # SQLAlchemy URL of the main database (e.g. postgresql+psycopg://...).
+    # Defaults to the SQLite file under DATA_DIR.
+    database_url: str | None = None
+    # Connection pool tuning, used for server databases (not SQLite).
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+    db_pool_timeout_seconds: int = 30
+    db_pool_recycle_seconds: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # SQLite engine profile, applied as PRAGMAs on every pooled connection.
+    sqlite_journal_mode: Literal["wal", "delete", "truncate", "persist"] = "wal"
+    sqlite_synchronous: Literal["off", "normal", "full", "extra"] = "normal"
+    sqlite_busy_timeout_ms: int = 5_000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    # Negative values are KiB, positive values are pages (SQLite semantics).
+    sqlite_cache_size: int = -64_000
+    sqlite_temp_store: Literal["default", "file", "memory"] = "memory"
+
     jwt_secret_key: str = ""
     jwt_refresh_secret_key: str = ""
     jwt_algorithm: str = "HS256"
     jwt_access_token_expire_minutes: int = 30
     jwt_refresh_token_expire_minutes: int = 60 * 24 * 7
 
+    # In-process cache of authenticated users; a TTL of 0 disables it.
+    auth_user_cache_ttl_seconds: float = 30.0
+    auth_user_cache_max_entries: int = 1024
+
     admin_email: str | None = None
     admin_password: str | None = None
 
@@ -50,6 +144,10 @@ class Settings(BaseSettings):
     def max_upload_bytes(self) -> int:
         return self.max_upload_size_mb * 1024 * 1024
 
+    @property
+    def sqlalchemy_database_url(self) -> str:
+        return self.database_url or f"sqlite:///{self.data_dir / 'echo.db'}"
+
     @property
     def audio_dir(self) -> Path:
         return self.data_dir / "audio"
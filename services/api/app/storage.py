@@ -1,12 +1,22 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import hashlib
-import os
 from pathlib import Path
-from typing import Callable, Optional
-import wave
+from typing import Any, Callable, Optional, Protocol
 
-from fastapi import HTTPException, UploadFile
+from fastapi import HTTPException
+
+from app.audio_probe import probe_duration_ms
+from app.metrics import UPLOAD_BYTES
+from app.object_storage import UploadSink
 
 CHUNK_SIZE = 1024 * 1024
+DEFAULT_UPLOAD_IO_WORKERS = 4
+
+# Disk writes, hashing and finalisation of uploads run here instead of on the
+# event loop; the worker count bounds how many uploads hit the disk at once.
+_upload_executor: ThreadPoolExecutor | None = None
 
 ALLOWED_MIME_TYPES = {
     "audio/mpeg": ".mp3",
@@ -108,30 +118,52 @@ def validate_image_signature(header: bytes, mime_type: str) -> bool:
     return False
 
 
-def _try_get_wav_duration_ms(path: Path) -> Optional[int]:
-    try:
-        with wave.open(str(path), "rb") as wav_file:
-            frame_rate = wav_file.getframerate()
-            if frame_rate <= 0:
-                return None
-            frames = wav_file.getnframes()
-            return int((frames / frame_rate) * 1000)
-    except (wave.Error, EOFError):
-        return None
-
-
-async def stream_upload_to_disk(
-    upload: UploadFile,
-    dst_path: Path,
-    max_bytes: int,
-    expected_mime: str,
-    expected_ext: str,
-    signature_validator: Callable[[bytes, str], bool] | None = None,
-    invalid_signature_error_code: str = "invalid_signature",
-    invalid_signature_error_message: str = "Audio signature does not match MIME type",
-    payload_too_large_error_message: str = "Audio file exceeds upload size limit",
-) -> dict[str, Optional[int] | str]:
-    suffix = Path(upload.filename or "").suffix.lower()
+def probe_audio_duration_ms(path: Path, mime_type: str) -> Optional[int]:
+    """Duration of a stored audio file, read from its container headers."""
+    return probe_duration_ms(path, mime_type)
+
+
+def configure_upload_executor(max_workers: int) -> None:
+    global _upload_executor
+    shutdown_upload_executor()
+    _upload_executor = ThreadPoolExecutor(
+        max_workers=max(1, max_workers), thread_name_prefix="upload-io"
+    )
+
+
+def shutdown_upload_executor() -> None:
+    global _upload_executor
+    if _upload_executor is not None:
+        _upload_executor.shutdown(wait=True)
+        _upload_executor = None
+
+
+def _get_upload_executor() -> ThreadPoolExecutor:
+    if _upload_executor is None:
+        configure_upload_executor(DEFAULT_UPLOAD_IO_WORKERS)
+    assert _upload_executor is not None
+    return _upload_executor
+
+
+async def run_upload_io(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_upload_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+class UploadSource(Protocol):
+    """What ``stream_upload`` reads: an ``UploadFile`` or a resumable upload."""
+
+    filename: str | None
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+def validate_upload_extension(
+    filename: str | None, expected_mime: str, expected_ext: str
+) -> None:
+    suffix = Path(filename or "").suffix.lower()
     allowed = ALLOWED_EXTENSIONS_BY_MIME.get(expected_mime, {expected_ext.lower()})
     if suffix not in allowed:
         raise HTTPException(
@@ -142,6 +174,27 @@ async def stream_upload_to_disk(
             },
         )
 
+
+def _hash_and_write(handle: UploadSink, digest: Any, chunk: bytes) -> None:
+    digest.update(chunk)
+    handle.write(chunk)
+
+
+async def stream_upload(
+    upload: UploadSource,
+    sink: UploadSink,
+    max_bytes: int,
+    expected_mime: str,
+    expected_ext: str,
+    signature_validator: Callable[[bytes, str], bool] | None = None,
+    invalid_signature_error_code: str = "invalid_signature",
+    invalid_signature_error_message: str = "Audio signature does not match MIME type",
+    payload_too_large_error_message: str = "Audio file exceeds upload size limit",
+    chunk_observer: Callable[[bytes], None] | None = None,
+) -> dict[str, int | str]:
+    """Validate ``upload`` and stream it into ``sink``, hashing on the way."""
+    validate_upload_extension(upload.filename, expected_mime, expected_ext)
+
     header = await upload.read(512)
     signature_check = signature_validator or has_valid_signature
     if not header or not signature_check(header, expected_mime):
@@ -153,14 +206,14 @@ async def stream_upload_to_disk(
             },
         )
 
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = dst_path.with_name(f"{dst_path.name}.{os.urandom(6).hex()}.tmp")
     size = 0
     digest = hashlib.sha256()
+    media_kind = expected_mime.split("/", 1)[0]
 
     try:
-        with tmp_path.open("wb") as handle:
-            size += len(header)
+        chunk = header
+        while chunk:
+            size += len(chunk)
             if size > max_bytes:
                 raise HTTPException(
                     status_code=413,
@@ -169,36 +222,19 @@ async def stream_upload_to_disk(
                         "message": payload_too_large_error_message,
                     },
                 )
-            digest.update(header)
-            handle.write(header)
-
-            while True:
-                to_read = min(CHUNK_SIZE, max(1, max_bytes - size + 1))
-                chunk = await upload.read(to_read)
-                if not chunk:
-                    break
-                size += len(chunk)
-                if size > max_bytes:
-                    raise HTTPException(
-                        status_code=413,
-                        detail={
-                            "code": "payload_too_large",
-                            "message": payload_too_large_error_message,
-                        },
-                    )
-                digest.update(chunk)
-                handle.write(chunk)
-
-        os.replace(tmp_path, dst_path)
+            await run_upload_io(_hash_and_write, sink, digest, chunk)
+            UPLOAD_BYTES.inc(len(chunk), kind=media_kind)
+            if chunk_observer is not None:
+                chunk_observer(chunk)
+            to_read = min(CHUNK_SIZE, max(1, max_bytes - size + 1))
+            chunk = await upload.read(to_read)
+
+        await run_upload_io(sink.commit)
     except Exception:
-        tmp_path.unlink(missing_ok=True)
+        await run_upload_io(sink.abort)
         raise
 
-    duration_ms = (
-        _try_get_wav_duration_ms(dst_path) if expected_mime in WAV_MIME_TYPES else None
-    )
     return {
         "sha256": digest.hexdigest(),
         "size": size,
-        "duration_ms": duration_ms,
     }
@@ -0,0 +1,165 @@
+from dataclasses import dataclass
+import hashlib
+from io import BytesIO
+import logging
+import os
+from pathlib import Path, PurePosixPath
+import tempfile
+from typing import Literal
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.models import EntryAsset, EntryAssetVariant
+from app.object_storage import MediaStorage
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional: install the "images" extra.
+    Image = None
+    ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+ImageVariant = Literal["thumb", "w640", "w1280"]
+
+# Bounding box (width, height) of each variant. An original that already fits
+# in a box gets no variant for it; download_asset then serves the original.
+IMAGE_VARIANTS: dict[str, tuple[int, int]] = {
+    "w1280": (1280, 1_000_000),
+    "w640": (640, 1_000_000),
+    "thumb": (320, 320),
+}
+VARIANT_MIME = "image/webp"
+_WEBP_QUALITY = 80
+
+
+@dataclass(frozen=True)
+class RenderedVariant:
+    name: str
+    width: int
+    height: int
+    size: int
+    sha256: str
+
+
+def variants_supported() -> bool:
+    return Image is not None
+
+
+def variant_path(original_path: str, name: str) -> str:
+    """``images/<entry>/<asset>.png`` -> ``images/<entry>/<asset>.<name>.webp``."""
+    return str(PurePosixPath(original_path).with_suffix(f".{name}.webp"))
+
+
+def render_variants(source: Path, outputs: dict[str, Path]) -> list[RenderedVariant]:
+    """Write the WebP variants of ``source`` listed in ``outputs``.
+
+    The source is decoded once (JPEGs at a reduced DCT scale when possible)
+    and each variant is resampled from the previous, larger one.
+    """
+    names = [name for name in IMAGE_VARIANTS if name in outputs]
+    if not names:
+        return []
+
+    rendered: list[RenderedVariant] = []
+    with Image.open(source) as image:
+        widest = max(IMAGE_VARIANTS[name][0] for name in names)
+        image.draft(None, (widest, widest))
+        working = ImageOps.exif_transpose(image)
+        has_alpha = working.mode in {"RGBA", "LA"} or "transparency" in working.info
+        working = working.convert("RGBA" if has_alpha else "RGB")
+        original_size = working.size
+
+        for name in names:
+            box = IMAGE_VARIANTS[name]
+            if original_size[0] <= box[0] and original_size[1] <= box[1]:
+                continue
+            working.thumbnail(box, Image.Resampling.LANCZOS, reducing_gap=3.0)
+            buffer = BytesIO()
+            working.save(buffer, "WEBP", quality=_WEBP_QUALITY, method=4)
+            payload = buffer.getvalue()
+
+            dst = outputs[name]
+            tmp = dst.with_name(f"{dst.name}.{os.urandom(6).hex()}.tmp")
+            tmp.write_bytes(payload)
+            os.replace(tmp, dst)
+            rendered.append(
+                RenderedVariant(
+                    name=name,
+                    width=working.width,
+                    height=working.height,
+                    size=len(payload),
+                    sha256=hashlib.sha256(payload).hexdigest(),
+                )
+            )
+    return rendered
+
+
+def generate_asset_variants(
+    db: Session, storage: MediaStorage, asset: EntryAsset
+) -> list[EntryAssetVariant]:
+    """Render and record the variants of one image asset (idempotent).
+
+    Rows are added to ``db`` for the caller to commit. Images Pillow cannot
+    decode get no variants; the original keeps being served.
+    """
+    if not variants_supported() or asset.asset_type != "image":
+        return []
+
+    paths = {name: variant_path(asset.path, name) for name in IMAGE_VARIANTS}
+    # Assets sharing a content-addressed original share its variant files.
+    shared = {
+        variant.name: variant
+        for variant in db.execute(
+            select(EntryAssetVariant).where(
+                EntryAssetVariant.path.in_(list(paths.values())),
+                EntryAssetVariant.asset_id != asset.id,
+            )
+        ).scalars()
+    }
+    if shared and all(storage.exists(v.path) for v in shared.values()):
+        return [
+            db.merge(
+                EntryAssetVariant(
+                    asset_id=asset.id,
+                    name=variant.name,
+                    path=variant.path,
+                    mime=variant.mime,
+                    size=variant.size,
+                    sha256=variant.sha256,
+                    width=variant.width,
+                    height=variant.height,
+                )
+            )
+            for variant in shared.values()
+        ]
+
+    with tempfile.TemporaryDirectory(prefix="echo-variants-") as scratch:
+        outputs = {name: Path(scratch) / name for name in paths}
+        try:
+            with storage.local_file(asset.path) as source:
+                rendered = render_variants(source, outputs)
+        except (OSError, ValueError, Image.DecompressionBombError):
+            logger.warning(
+                "image variants failed", extra={"asset_id": asset.id}, exc_info=True
+            )
+            return []
+        for item in rendered:
+            storage.store_file(paths[item.name], outputs[item.name], VARIANT_MIME)
+
+    return [
+        db.merge(
+            EntryAssetVariant(
+                asset_id=asset.id,
+                name=item.name,
+                path=paths[item.name],
+                mime=VARIANT_MIME,
+                size=item.size,
+                sha256=item.sha256,
+                width=item.width,
+                height=item.height,
+            )
+        )
+        for item in rendered
+    ]
@@ -0,0 +1,121 @@
+"""Resumable audio uploads.
+
+A client opens an upload session with the final length, sends the bytes in
+``PATCH`` requests at the offset the server reports, and finalizes it by
+passing ``upload_id`` to ``POST /entries`` or ``POST /entries/{id}/audio``.
+Each ``PATCH`` is stored as its own object under ``uploads/<id>/`` (so the
+session survives restarts and works on every storage backend); bytes
+received before a connection drop are kept. Finalizing replays the chunks
+through ``app.storage.stream_upload``, which checks the signature, hashes
+and writes the media file exactly as for a single-request upload.
+"""
+
+from collections.abc import Iterator
+from datetime import timedelta
+import logging
+import uuid
+
+from fastapi import HTTPException
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app.jobs import utcnow
+from app.models import UploadSession
+from app.object_storage import MediaStorage
+from app.storage import run_upload_io
+
+logger = logging.getLogger("app.uploads")
+
+UPLOADS_DIR = "uploads"
+
+
+def chunk_key(upload_id: str, offset: int) -> str:
+    # The random suffix keeps a losing concurrent PATCH from overwriting the
+    # chunk that was recorded at the same offset.
+    return f"{UPLOADS_DIR}/{upload_id}/{offset:012d}-{uuid.uuid4().hex[:8]}"
+
+
+def upload_expiry(ttl_hours: int):
+    return utcnow() + timedelta(hours=ttl_hours)
+
+
+def get_user_upload(db: Session, upload_id: str, user_id: str) -> UploadSession:
+    upload = db.scalar(
+        select(UploadSession).where(
+            UploadSession.id == upload_id,
+            UploadSession.user_id == user_id,
+            UploadSession.expires_at > utcnow(),
+        )
+    )
+    if upload is None:
+        raise HTTPException(
+            status_code=404,
+            detail={"code": "upload_not_found", "message": "Upload not found"},
+        )
+    return upload
+
+
+def ensure_upload_complete(upload: UploadSession) -> None:
+    if upload.offset != upload.length:
+        raise HTTPException(
+            status_code=409,
+            detail={
+                "code": "upload_incomplete",
+                "message": f"Upload has {upload.offset} of {upload.length} bytes",
+            },
+        )
+
+
+def delete_upload_chunks(storage: MediaStorage, chunks: list[str]) -> None:
+    for key in chunks:
+        storage.delete(key)
+
+
+def purge_expired_uploads(db: Session, storage: MediaStorage) -> int:
+    """Drop expired sessions and their chunks; returns how many were removed."""
+    expired = (
+        db.execute(select(UploadSession).where(UploadSession.expires_at <= utcnow()))
+        .scalars()
+        .all()
+    )
+    if not expired:
+        return 0
+    db.execute(
+        delete(UploadSession).where(
+            UploadSession.id.in_([upload.id for upload in expired])
+        )
+    )
+    db.commit()
+    for upload in expired:
+        delete_upload_chunks(storage, upload.chunks)
+    logger.info("expired uploads purged", extra={"count": len(expired)})
+    return len(expired)
+
+
+class StoredUploadReader:
+    """Reads the chunks of a complete session back as one file.
+
+    Satisfies ``app.storage.UploadSource``; storage reads run on the upload
+    I/O executor.
+    """
+
+    def __init__(self, storage: MediaStorage, upload: UploadSession):
+        self.filename: str | None = upload.filename
+        self._pieces = self._iter_pieces(storage, list(upload.chunks))
+        self._buffer = b""
+
+    @staticmethod
+    def _iter_pieces(storage: MediaStorage, chunks: list[str]) -> Iterator[bytes]:
+        for key in chunks:
+            yield from storage.iter_bytes(key)
+
+    async def read(self, size: int = -1) -> bytes:
+        while size < 0 or len(self._buffer) < size:
+            piece = await run_upload_io(next, self._pieces, None)
+            if piece is None:
+                break
+            self._buffer += piece
+        if size < 0:
+            size = len(self._buffer)
+        data, self._buffer = self._buffer[:size], self._buffer[size:]
+        return data
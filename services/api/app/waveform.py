@@ -0,0 +1,283 @@
+"""Waveform peaks for audio scrubbers.
+
+A peaks file holds one (min, max) int8 pair per bucket over the whole
+recording, all channels together, behind an 8-byte header::
+
+    b"EPK1" | uint32 LE bucket count | min0 max0 min1 max1 ...
+
+WAV and AIFF PCM are decoded here in blocks; other formats are decoded by
+ffmpeg when the binary is available and otherwise get no peaks.
+"""
+
+from array import array
+from collections.abc import Iterator
+from dataclasses import dataclass
+import logging
+from pathlib import Path
+import shutil
+import struct
+import subprocess
+import sys
+from typing import BinaryIO
+
+from app.binary_io import file_size, iter_chunks, read_at
+
+logger = logging.getLogger(__name__)
+
+PEAKS_MAGIC = b"EPK1"
+PEAKS_MIME = "application/octet-stream"
+_HEADER = struct.Struct("<4sI")
+
+_READ_FRAMES = 64 * 1024
+# ffmpeg output: mono signed 16-bit, enough resolution for a few k buckets.
+_FFMPEG_SAMPLE_RATE = 8000
+_FFMPEG_TIMEOUT_SECONDS = 300
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+@dataclass(frozen=True)
+class _PcmLayout:
+    data_offset: int
+    frames: int
+    channels: int
+    sample_width: int
+    byteorder: str
+    is_float: bool = False
+    # 8-bit WAV samples are unsigned.
+    unsigned: bool = False
+
+
+def peaks_path(audio_sha256: str) -> str:
+    """Sidecar location under DATA_DIR, shared by entries with the same audio."""
+    return f"audio/peaks/{audio_sha256}.bin"
+
+
+def _wav_layout(f: BinaryIO) -> _PcmLayout | None:
+    header = read_at(f, 0, 12)
+    if header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+    size = file_size(f)
+    fmt = None
+    for chunk_id, data, chunk_size in iter_chunks(f, 12, size, "little"):
+        if chunk_id == b"fmt ":
+            fmt = read_at(f, data, min(chunk_size, 26))
+        elif chunk_id == b"data":
+            if fmt is None or len(fmt) < 16:
+                return None
+            tag, channels, _, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+            if tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+                tag = struct.unpack("<H", fmt[24:26])[0]
+            width = (bits + 7) // 8
+            if tag == _WAVE_FORMAT_IEEE_FLOAT:
+                if width not in (4, 8):
+                    return None
+            elif tag != _WAVE_FORMAT_PCM or width not in (1, 2, 3, 4):
+                return None
+            if not channels or block_align != channels * width:
+                return None
+            if chunk_size in (0, 0xFFFFFFFF) or data + chunk_size > size:
+                chunk_size = size - data
+            return _PcmLayout(
+                data_offset=data,
+                frames=chunk_size // block_align,
+                channels=channels,
+                sample_width=width,
+                byteorder="little",
+                is_float=tag == _WAVE_FORMAT_IEEE_FLOAT,
+                unsigned=width == 1,
+            )
+    return None
+
+
+def _aiff_layout(f: BinaryIO) -> _PcmLayout | None:
+    header = read_at(f, 0, 12)
+    if header[:4] != b"FORM" or header[8:12] not in (b"AIFF", b"AIFC"):
+        return None
+    size = file_size(f)
+    comm = None
+    for chunk_id, data, _ in iter_chunks(f, 12, size, "big"):
+        if chunk_id == b"COMM":
+            comm = read_at(f, data, 22)
+        elif chunk_id == b"SSND" and comm is not None:
+            channels, frames, bits = struct.unpack(">hIh", comm[:8])
+            compression = comm[18:22] if header[8:12] == b"AIFC" else b"NONE"
+            if compression not in (b"NONE", b"sowt"):
+                return None
+            width = (bits + 7) // 8
+            if channels <= 0 or width not in (1, 2, 3, 4):
+                return None
+            offset = struct.unpack(">I", read_at(f, data, 4))[0]
+            data_offset = data + 8 + offset
+            available = max(0, size - data_offset) // (channels * width)
+            return _PcmLayout(
+                data_offset=data_offset,
+                frames=min(frames, available),
+                channels=channels,
+                sample_width=width,
+                byteorder="little" if compression == b"sowt" else "big",
+            )
+    return None
+
+
+_PCM_LAYOUTS = {
+    "audio/wav": _wav_layout,
+    "audio/x-wav": _wav_layout,
+    "audio/aiff": _aiff_layout,
+}
+
+_UNSIGNED_TO_SIGNED = bytes((value - 128) & 0xFF for value in range(256))
+
+
+def _to_int16(raw: bytes, layout: _PcmLayout) -> array:
+    """Decode interleaved samples to signed 16-bit, keeping the top bits."""
+    width = layout.sample_width
+    if layout.is_float:
+        values = array("f" if width == 4 else "d", raw)
+        if layout.byteorder != sys.byteorder:
+            values.byteswap()
+        return array("h", (int(max(-1.0, min(1.0, v)) * 32767) for v in values))
+    if width == 1:
+        if layout.unsigned:
+            raw = raw.translate(_UNSIGNED_TO_SIGNED)
+        # An int8 sample is already the top byte of an int16 one.
+        widened = bytearray(len(raw) * 2)
+        widened[1 if sys.byteorder == "little" else 0 :: 2] = raw
+        return array("h", bytes(widened))
+    if width == 2:
+        samples = array("h", raw)
+        if layout.byteorder != sys.byteorder:
+            samples.byteswap()
+        return samples
+    # 24- and 32-bit: keep the two most significant bytes of each sample.
+    high, low = (width - 1, width - 2) if layout.byteorder == "little" else (0, 1)
+    narrowed = bytearray(len(raw) // width * 2)
+    if sys.byteorder == "little":
+        narrowed[0::2], narrowed[1::2] = raw[low::width], raw[high::width]
+    else:
+        narrowed[0::2], narrowed[1::2] = raw[high::width], raw[low::width]
+    return array("h", bytes(narrowed))
+
+
+def _pcm_blocks(f: BinaryIO, layout: _PcmLayout) -> Iterator[array]:
+    block_bytes = layout.channels * layout.sample_width
+    remaining = layout.frames * block_bytes
+    f.seek(layout.data_offset)
+    while remaining > 0:
+        raw = f.read(min(remaining, _READ_FRAMES * block_bytes))
+        raw = raw[: len(raw) - len(raw) % block_bytes]
+        if not raw:
+            return
+        remaining -= len(raw)
+        yield _to_int16(raw, layout)
+
+
+def _ffmpeg_samples(path: Path, ffmpeg: str) -> array | None:
+    binary = shutil.which(ffmpeg) if ffmpeg else None
+    if binary is None:
+        return None
+    command = [
+        binary,
+        "-nostdin",
+        "-v",
+        "error",
+        "-i",
+        str(path),
+        "-vn",
+        "-ac",
+        "1",
+        "-ar",
+        str(_FFMPEG_SAMPLE_RATE),
+        "-f",
+        "s16le",
+        "-",
+    ]
+    try:
+        result = subprocess.run(
+            command, capture_output=True, timeout=_FFMPEG_TIMEOUT_SECONDS, check=False
+        )
+    except (OSError, subprocess.TimeoutExpired) as exc:
+        logger.warning(
+            "ffmpeg decode failed", extra={"path": str(path), "error": str(exc)}
+        )
+        return None
+    if result.returncode != 0:
+        logger.warning(
+            "ffmpeg decode failed",
+            extra={
+                "path": str(path),
+                "error": result.stderr.decode(errors="replace")[-500:],
+            },
+        )
+        return None
+    raw = result.stdout[: len(result.stdout) & ~1]
+    samples = array("h", raw)
+    if sys.byteorder != "little":
+        samples.byteswap()
+    return samples
+
+
+def _bucket_peaks(
+    blocks: Iterator[array], channels: int, frames: int, buckets: int
+) -> bytes:
+    buckets = min(buckets, frames)
+    out = bytearray()
+    bucket = 0
+    bucket_end = frames // buckets * channels
+    low = high = None
+    position = 0
+    for samples in blocks:
+        start = 0
+        while start < len(samples) and bucket < buckets:
+            stop = min(len(samples), bucket_end - position)
+            part = samples[start:stop]
+            part_low, part_high = min(part), max(part)
+            low = part_low if low is None else min(low, part_low)
+            high = part_high if high is None else max(high, part_high)
+            start = stop
+            if position + start >= bucket_end:
+                out += struct.pack("<bb", low >> 8, high >> 8)
+                bucket += 1
+                bucket_end = (bucket + 1) * frames // buckets * channels
+                low = high = None
+        position += len(samples)
+        if bucket >= buckets:
+            break
+    if low is not None:
+        # Data ended before the declared length: keep the partial bucket.
+        out += struct.pack("<bb", low >> 8, high >> 8)
+    return _HEADER.pack(PEAKS_MAGIC, len(out) // 2) + bytes(out)
+
+
+def compute_peaks(
+    path: Path, mime_type: str, *, buckets: int, ffmpeg: str = ""
+) -> bytes | None:
+    """Peaks file for the audio at ``path``, or ``None`` if it can't be decoded."""
+    layout_parser = _PCM_LAYOUTS.get(mime_type)
+    if layout_parser is not None:
+        with path.open("rb") as f:
+            try:
+                layout = layout_parser(f)
+            except (ValueError, struct.error):
+                layout = None
+            if layout is not None:
+                if layout.frames == 0:
+                    return None
+                return _bucket_peaks(
+                    _pcm_blocks(f, layout), layout.channels, layout.frames, buckets
+                )
+
+    samples = _ffmpeg_samples(path, ffmpeg)
+    if not samples:
+        return None
+    return _bucket_peaks(iter((samples,)), 1, len(samples), buckets)
+
+
+def decode_peaks(payload: bytes) -> list[tuple[int, int]]:
+    magic, count = _HEADER.unpack_from(payload)
+    if magic != PEAKS_MAGIC:
+        raise ValueError("not a peaks file")
+    pairs = struct.unpack_from(f"<{count * 2}b", payload, _HEADER.size)
+    return list(zip(pairs[0::2], pairs[1::2], strict=True))
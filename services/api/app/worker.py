@@ -0,0 +1,55 @@
+"""Standalone job worker: ``python -m app.worker [--once]``.
+
+Runs the same handlers as the API's in-process runner against the shared
+database and DATA_DIR; start it when JOB_RUNNER_IN_PROCESS is disabled.
+"""
+
+import argparse
+import logging
+import signal
+
+from app.db import SessionLocal
+from app.jobs import JobQueueConfig, JobRunner, run_pending_jobs
+from app.middleware.request_id import configure_json_logging
+import app.processing  # noqa: F401  (registers the job kinds)
+from app.settings import settings
+
+logger = logging.getLogger("app.worker")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run Echo background jobs.")
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Run the jobs that are currently due, then exit.",
+    )
+    args = parser.parse_args(argv)
+
+    configure_json_logging(queue_size=settings.log_queue_size)
+    config = JobQueueConfig.from_settings(settings)
+    if args.once:
+        count = run_pending_jobs(SessionLocal, config)
+        logger.info("jobs drained", extra={"count": count})
+        return 0
+
+    runner = JobRunner(SessionLocal, config)
+
+    def _request_stop(signum: int, _frame: object) -> None:
+        logger.info("worker stopping", extra={"signal": signum})
+        runner.request_stop()
+
+    signal.signal(signal.SIGTERM, _request_stop)
+    signal.signal(signal.SIGINT, _request_stop)
+
+    logger.info(
+        "worker started",
+        extra={"worker_id": runner.worker_id, "concurrency": config.concurrency},
+    )
+    runner.start()
+    runner.join()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
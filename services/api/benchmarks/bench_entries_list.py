@@ -0,0 +1,192 @@
+"""Benchmark GET /api/v1/entries for a page of 200 entries x 8 image assets.
+
+Usage (from services/api):
+
+    python benchmarks/bench_entries_list.py [--iterations 30]
+
+Seeds a throw-away SQLite database, then reports request latency for the
+full endpoint and the time spent serializing the page, next to the previous
+per-item ``model_validate`` + ``model_copy`` + ``url_for`` serializer.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+
+ENTRIES = 200
+ASSETS_PER_ENTRY = 8
+
+
+def _report(label: str, samples: list[float]) -> None:
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<34} median={statistics.median(ordered) * 1000:8.2f} ms"
+        f"  p95={p95 * 1000:8.2f} ms"
+    )
+
+
+def _time(fn, iterations: int) -> list[float]:
+    fn()  # warm-up
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    data_dir = Path(tempfile.mkdtemp(prefix="echo-bench-"))
+    os.environ["DATA_DIR"] = str(data_dir)
+    os.environ.setdefault("JWT_SECRET_KEY", "bench-access-secret")
+    os.environ.setdefault("JWT_REFRESH_SECRET_KEY", "bench-refresh-secret")
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+    from alembic import command
+    from alembic.config import Config
+    from fastapi.testclient import TestClient
+    from sqlalchemy import select
+    from sqlalchemy.orm import selectinload
+    from starlette.requests import Request
+
+    import app.db
+    import app.main
+    from app.models import Entry, EntryAsset, Question, User
+    from app.schemas import EntryAssetOut, EntryOut
+    from app.security import create_access_token, hash_password
+
+    api_dir = Path(__file__).resolve().parents[1]
+    command.upgrade(Config(str(api_dir / "alembic.ini")), "head")
+
+    user_id = str(uuid.uuid4())
+    with app.db.SessionLocal() as db:
+        db.add(
+            User(
+                id=user_id, email="bench@example.com", password_hash=hash_password("x")
+            )
+        )
+        db.add(Question(id=1, text="bench", category="bench", is_active=True))
+        for _ in range(ENTRIES):
+            entry_id = str(uuid.uuid4())
+            db.add(
+                Entry(
+                    id=entry_id,
+                    user_id=user_id,
+                    question_id=1,
+                    audio_path=f"audio/{entry_id}.mp3",
+                    audio_mime="audio/mpeg",
+                    audio_size=1024,
+                    audio_sha256="0" * 64,
+                    text_content="bench " * 20,
+                )
+            )
+            for _ in range(ASSETS_PER_ENTRY):
+                asset_id = str(uuid.uuid4())
+                db.add(
+                    EntryAsset(
+                        id=asset_id,
+                        entry_id=entry_id,
+                        user_id=user_id,
+                        asset_type="image",
+                        path=f"images/{entry_id}/{asset_id}.jpg",
+                        mime="image/jpeg",
+                        size=2048,
+                        sha256="1" * 64,
+                        width=1920,
+                        height=1080,
+                    )
+                )
+        db.commit()
+
+    client = TestClient(app.main.app)
+    headers = {"Authorization": f"Bearer {create_access_token(user_id)}"}
+
+    def list_page() -> None:
+        response = client.get("/api/v1/entries?limit=200", headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == ENTRIES
+
+    with app.db.SessionLocal() as db:
+        entries = list(
+            db.execute(
+                select(Entry)
+                .options(selectinload(Entry.assets).selectinload(EntryAsset.variants))
+                .where(Entry.user_id == user_id)
+            )
+            .scalars()
+            .all()
+        )
+    request = Request(
+        {
+            "type": "http",
+            "app": app.main.app,
+            "router": app.main.app.router,
+            "scheme": "http",
+            "server": ("testserver", 80),
+            "path": "/api/v1/entries",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [(b"host", b"testserver")],
+        }
+    )
+
+    def validated(model, obj, **overrides):
+        # Field-by-field validation from attributes, as before model_construct;
+        # relationships (assets, variants) are passed already converted.
+        data = {
+            name: overrides[name] if name in overrides else getattr(obj, name)
+            for name in model.model_fields
+            if name in overrides or hasattr(obj, name)
+        }
+        return model.model_validate(data)
+
+    def legacy_serialize() -> None:
+        for entry in entries:
+            assets = [
+                validated(
+                    EntryAssetOut,
+                    asset,
+                    download_url=str(
+                        request.url_for("download_asset", asset_id=asset.id)
+                    ),
+                    variants={
+                        variant.name: str(
+                            request.url_for("download_asset", asset_id=asset.id)
+                        )
+                        + f"?variant={variant.name}"
+                        for variant in asset.variants
+                    },
+                )
+                for asset in entry.assets
+                if asset.asset_type == "image"
+            ]
+            validated(
+                EntryOut,
+                entry,
+                assets=assets,
+                audio_url=str(request.url_for("get_entry_audio", entry_id=entry.id)),
+            )
+
+    def bulk_serialize() -> None:
+        app.main._serialize_entries(request, entries)
+
+    print(f"{ENTRIES} entries x {ASSETS_PER_ENTRY} assets, {args.iterations} runs")
+    _report("GET /api/v1/entries?limit=200", _time(list_page, args.iterations))
+    _report("serialize page (previous)", _time(legacy_serialize, args.iterations))
+    _report("serialize page (bulk)", _time(bulk_serialize, args.iterations))
+
+
+if __name__ == "__main__":
+    main()
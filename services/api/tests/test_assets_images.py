@@ -1,9 +1,11 @@
+import hashlib
 from io import BytesIO
 from pathlib import Path
 
 from alembic import command
 from alembic.config import Config
 from fastapi.testclient import TestClient
+import pytest
 
 API_PREFIX = "/api/v1"
 VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00payload"
@@ -16,6 +18,10 @@ PNG_1X1_BYTES = (
     b"\xf6\x178U"
     b"\x00\x00\x00\x00IEND\xaeB`\x82"
 )
+WEBP_VP8X_BYTES = (
+    b"RIFF\x16\x00\x00\x00WEBPVP8X\x0a\x00\x00\x00"
+    b"\x10\x00\x00\x00\x7f\x02\x00\xdf\x01\x00"
+)
 
 
 def _build_client(tmp_path, monkeypatch, *, max_images_per_entry: int = 8):
@@ -131,6 +137,21 @@ def test_image_asset_upload_list_and_download(tmp_path, monkeypatch):
     assert downloaded.content == PNG_1X1_BYTES
 
 
+def test_image_asset_upload_reads_webp_dimensions_from_stream(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+
+    upload = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("photo.webp", BytesIO(WEBP_VP8X_BYTES), "image/webp")},
+        headers=headers,
+    )
+    assert upload.status_code == 200
+    assert upload.json()["width"] == 640
+    assert upload.json()["height"] == 480
+
+
 def test_image_asset_validation_rejects_bad_mime_and_signature(tmp_path, monkeypatch):
     client = _build_client(tmp_path, monkeypatch)
     headers = _auth_headers(client, "user_a@example.com", "password-a")
@@ -235,6 +256,86 @@ def test_image_asset_max_per_entry_limit(tmp_path, monkeypatch):
     }
 
 
+def test_image_assets_batch_upload_reports_each_file(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch, max_images_per_entry=3)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+
+    response = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets:batch",
+        files=[
+            ("files", ("one.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+            ("files", ("fake.png", BytesIO(b"not-a-png-at-all"), "image/png")),
+            ("files", ("two.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert [(item["filename"], item["status"]) for item in items] == [
+        ("one.png", 200),
+        ("fake.png", 422),
+        ("two.png", 200),
+    ]
+    assert items[1]["asset"] is None
+    assert items[1]["error"]["code"] == "invalid_image_signature"
+    assert items[0]["asset"]["width"] == 1
+    for item in (items[0], items[2]):
+        assert (tmp_path / item["asset"]["path"]).exists()
+
+    listed = client.get(f"{API_PREFIX}/entries/{entry_id}/assets", headers=headers)
+    assert {asset["id"] for asset in listed.json()} == {
+        items[0]["asset"]["id"],
+        items[2]["asset"]["id"],
+    }
+
+    over_quota = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets:batch",
+        files=[
+            ("files", ("three.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+            ("files", ("four.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+        ],
+        headers=headers,
+    )
+    assert over_quota.status_code == 422
+    assert over_quota.json()["error"]["code"] == "too_many_assets"
+    listed = client.get(f"{API_PREFIX}/entries/{entry_id}/assets", headers=headers)
+    assert len(listed.json()) == 2
+
+
+def test_entry_with_image_can_be_updated_and_given_audio(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+    asset = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    ).json()
+
+    updated = client.patch(
+        f"{API_PREFIX}/entries/{entry_id}",
+        json={"text_content": "edited"},
+        headers=headers,
+    )
+    assert updated.status_code == 200
+    assert updated.json()["text_content"] == "edited"
+    assert [item["id"] for item in updated.json()["assets"]] == [asset["id"]]
+    assert updated.json()["assets"][0]["variants"] == {}
+
+    with_audio = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/audio",
+        files={"audio_file": ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")},
+        headers=headers,
+    )
+    assert with_audio.status_code == 200
+    assert with_audio.json()["audio_url"].endswith(
+        f"{API_PREFIX}/entries/{entry_id}/audio"
+    )
+    assert [item["id"] for item in with_audio.json()["assets"]] == [asset["id"]]
+    assert with_audio.json()["assets"][0]["download_url"] == asset["download_url"]
+
+
 def test_get_entry_includes_audio_url_when_audio_is_present(tmp_path, monkeypatch):
     client = _build_client(tmp_path, monkeypatch)
     headers = _auth_headers(client, "user_a@example.com", "password-a")
@@ -321,3 +422,237 @@ def test_download_asset_rejects_non_image_asset_type(tmp_path, monkeypatch):
             "message": "Asset is not an image",
         }
     }
+
+
+def test_asset_download_supports_etag_and_range(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+
+    uploaded = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    ).json()
+    url = f"{API_PREFIX}/assets/{uploaded['id']}"
+
+    full = client.get(url, headers=headers)
+    assert full.status_code == 200
+    assert full.headers["etag"] == f'"{uploaded["sha256"]}"'
+    assert full.headers["accept-ranges"] == "bytes"
+    assert "immutable" in full.headers["cache-control"]
+
+    partial = client.get(url, headers={**headers, "Range": "bytes=0-7"})
+    assert partial.status_code == 206
+    assert partial.content == PNG_1X1_BYTES[:8]
+    assert partial.headers["content-range"] == f"bytes 0-7/{len(PNG_1X1_BYTES)}"
+
+    stale_if_range = client.get(
+        url, headers={**headers, "Range": "bytes=0-7", "If-Range": '"other"'}
+    )
+    assert stale_if_range.status_code == 200
+    assert stale_if_range.content == PNG_1X1_BYTES
+
+    # The 304 is decided from stored metadata, before any file access.
+    (tmp_path / uploaded["path"]).unlink()
+    not_modified = client.get(
+        url, headers={**headers, "If-None-Match": f'W/"x", {full.headers["etag"]}'}
+    )
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+    assert not_modified.headers["etag"] == full.headers["etag"]
+
+    other_user = _auth_headers(client, "user_b@example.com", "password-b")
+    forbidden = client.get(
+        url, headers={**other_user, "If-None-Match": full.headers["etag"]}
+    )
+    assert forbidden.status_code == 403
+
+
+def test_entry_audio_supports_etag_and_range(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    entry_id = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")},
+        headers=headers,
+    ).json()["id"]
+    url = f"{API_PREFIX}/entries/{entry_id}/audio"
+
+    full = client.get(url, headers=headers)
+    etag = full.headers["etag"]
+    assert etag == f'"{hashlib.sha256(VALID_MP3_BYTES).hexdigest()}"'
+    assert full.headers["cache-control"] == "private, no-cache"
+
+    tail = client.get(url, headers={**headers, "Range": "bytes=-7"})
+    assert tail.status_code == 206
+    assert tail.content == VALID_MP3_BYTES[-7:]
+
+    unsatisfiable = client.get(url, headers={**headers, "Range": "bytes=9999-"})
+    assert unsatisfiable.status_code == 416
+
+    assert (
+        client.get(url, headers={**headers, "If-None-Match": etag}).status_code == 304
+    )
+
+    import app.db
+    from app.models import Entry
+
+    # Legacy rows carry the all-zero placeholder digest: never a strong ETag.
+    with app.db.SessionLocal() as db:
+        db.get(Entry, entry_id).audio_sha256 = "0" * 64
+        db.commit()
+    legacy = client.get(url, headers={**headers, "If-None-Match": f'"{"0" * 64}"'})
+    assert legacy.status_code == 200
+    assert legacy.headers["etag"] != f'"{"0" * 64}"'
+
+
+def test_media_offload_returns_internal_redirect_headers(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+    uploaded = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    ).json()
+
+    import app.main
+
+    monkeypatch.setattr(app.main.settings, "media_offload", "x-accel-redirect")
+    accel = client.get(f"{API_PREFIX}/assets/{uploaded['id']}", headers=headers)
+    assert accel.status_code == 200
+    assert accel.content == b""
+    assert accel.headers["x-accel-redirect"] == (
+        f"/_protected_media/{uploaded['path']}"
+    )
+    assert accel.headers["content-type"] == "image/png"
+    assert accel.headers["etag"] == f'"{uploaded["sha256"]}"'
+
+    monkeypatch.setattr(app.main.settings, "media_offload", "x-sendfile")
+    sendfile = client.get(f"{API_PREFIX}/assets/{uploaded['id']}", headers=headers)
+    assert sendfile.headers["x-sendfile"] == str(tmp_path / uploaded["path"])
+
+    # Authorization still happens in the API before any redirect is issued.
+    other_user = _auth_headers(client, "user_b@example.com", "password-b")
+    forbidden = client.get(f"{API_PREFIX}/assets/{uploaded['id']}", headers=other_user)
+    assert forbidden.status_code == 403
+    assert "x-sendfile" not in forbidden.headers
+
+
+def test_signed_media_urls_are_served_without_bearer_token(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    entry_id = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")},
+        headers=headers,
+    ).json()["id"]
+    client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    )
+
+    import app.main
+
+    monkeypatch.setattr(app.main.settings, "media_signed_urls", True)
+    entry = client.get(f"{API_PREFIX}/entries/{entry_id}", headers=headers).json()
+    asset_url = entry["assets"][0]["download_url"]
+    assert "/api/v1/media/" in asset_url
+    # URLs signed within the same TTL window are identical.
+    again = client.get(f"{API_PREFIX}/entries/{entry_id}", headers=headers).json()
+    assert again["assets"][0]["download_url"] == asset_url
+
+    image = client.get(asset_url)
+    assert image.status_code == 200
+    assert image.content == PNG_1X1_BYTES
+    assert image.headers["content-type"] == "image/png"
+    assert image.headers["etag"] == f'"{hashlib.sha256(PNG_1X1_BYTES).hexdigest()}"'
+    assert image.headers["cache-control"].startswith("public, max-age=")
+
+    audio = client.get(entry["audio_url"])
+    assert audio.status_code == 200
+    assert audio.content == VALID_MP3_BYTES
+
+    payload, signature = asset_url.rsplit("/", 1)[1].split(".")
+    tampered = client.get(f"{API_PREFIX}/media/{payload}.{signature[::-1]}")
+    assert tampered.status_code == 403
+    assert tampered.json()["error"]["code"] == "invalid_media_token"
+
+    monkeypatch.setattr(app.main.time, "time", lambda: 4_000_000_000)
+    expired = client.get(asset_url)
+    assert expired.status_code == 403
+    assert expired.json()["error"]["code"] == "media_token_expired"
+
+    monkeypatch.setattr(app.main.settings, "media_signed_urls", False)
+    assert client.get(asset_url).status_code == 404
+
+
+def test_image_variants_are_generated_after_upload(tmp_path, monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    entry_id = _create_text_entry(client, headers)
+
+    source = BytesIO()
+    Image.new("RGB", (1000, 750), (200, 40, 40)).save(source, "JPEG")
+    original = source.getvalue()
+    uploaded = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/assets",
+        files={"file": ("photo.jpg", BytesIO(original), "image/jpeg")},
+        headers=headers,
+    ).json()
+
+    assert uploaded["processing_status"] == "pending"
+
+    import app.db
+    import app.jobs
+
+    # Variants are rendered by the job queue; run it in the test thread.
+    app.jobs.run_pending_jobs(
+        app.db.SessionLocal, app.jobs.JobQueueConfig(data_dir=tmp_path)
+    )
+
+    asset = client.get(f"{API_PREFIX}/entries/{entry_id}", headers=headers).json()[
+        "assets"
+    ][0]
+    assert asset["processing_status"] == "ready"
+    assert set(asset["variants"]) == {"thumb", "w640"}
+    assert asset["variants"]["thumb"].endswith(
+        f"/assets/{uploaded['id']}?variant=thumb"
+    )
+
+    thumb = client.get(asset["variants"]["thumb"], headers=headers)
+    assert thumb.status_code == 200
+    assert thumb.headers["content-type"] == "image/webp"
+    assert "immutable" in thumb.headers["cache-control"]
+    assert len(thumb.content) < len(original)
+    assert Image.open(BytesIO(thumb.content)).size == (320, 240)
+    assert (tmp_path / "images" / entry_id / f"{uploaded['id']}.thumb.webp").exists()
+
+    # The original already fits in w1280: the original is served, revalidated.
+    fallback = client.get(
+        f"{API_PREFIX}/assets/{uploaded['id']}",
+        params={"variant": "w1280"},
+        headers=headers,
+    )
+    assert fallback.status_code == 200
+    assert fallback.content == original
+    assert fallback.headers["cache-control"] == "private, no-cache"
+
+    unknown = client.get(
+        f"{API_PREFIX}/assets/{uploaded['id']}",
+        params={"variant": "huge"},
+        headers=headers,
+    )
+    assert unknown.status_code == 422
@@ -0,0 +1,170 @@
+from io import BytesIO
+import math
+import struct
+import wave
+
+import pytest
+
+from app.audio_probe import probe_duration_ms
+
+# MPEG-1 Layer III, 128 kbit/s, 44.1 kHz, joint stereo: 417-byte frames.
+_MP3_FRAME_HEADER = b"\xff\xfb\x90\x40"
+_MP3_FRAME_LENGTH = 417
+
+
+def _id3v2(payload_size: int) -> bytes:
+    size = bytes((payload_size >> shift) & 0x7F for shift in (21, 14, 7, 0))
+    return b"ID3\x04\x00\x00" + size + b"\x00" * payload_size
+
+
+def _mp3_frame(body: bytes = b"") -> bytes:
+    frame = _MP3_FRAME_HEADER + body
+    return frame + b"\x00" * (_MP3_FRAME_LENGTH - len(frame))
+
+
+def _ebml(element_id: int, payload: bytes, *, unknown_size: bool = False) -> bytes:
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    if unknown_size:
+        return id_bytes + b"\x01\xff\xff\xff\xff\xff\xff\xff" + payload
+    return id_bytes + (0x10000000 | len(payload)).to_bytes(4, "big") + payload
+
+
+def _ogg_page(granule: int, payload: bytes, *, header_type: int = 0) -> bytes:
+    return (
+        b"OggS\x00"
+        + bytes([header_type])
+        + struct.pack("<qII", granule, 0x1234, 0)
+        + b"\x00\x00\x00\x00"
+        + bytes([1, len(payload)])
+        + payload
+    )
+
+
+def _box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", len(payload) + 8) + kind + payload
+
+
+def _extended(value: float) -> bytes:
+    mantissa, exponent = math.frexp(value)
+    return struct.pack(">HQ", exponent - 1 + 16383, int(mantissa * 2**64))
+
+
+@pytest.fixture
+def write(tmp_path):
+    def _write(name: str, payload: bytes):
+        path = tmp_path / name
+        path.write_bytes(payload)
+        return path
+
+    return _write
+
+
+def test_mp3_cbr_duration_is_summed_from_frame_headers(write):
+    # 100 frames * 1152 samples / 44100 Hz, behind an ID3v2 tag and ID3v1 trailer.
+    payload = _id3v2(2000) + _mp3_frame() * 100 + b"TAG" + b"\x00" * 125
+    assert probe_duration_ms(write("a.mp3", payload), "audio/mpeg") == 2612
+
+
+def test_mp3_xing_frame_count_is_used_without_scanning(write):
+    xing = b"\x00" * 32 + b"Xing" + struct.pack(">II", 0x01, 1000)
+    payload = _mp3_frame(xing) + _mp3_frame() * 3
+    assert probe_duration_ms(write("a.mp3", payload), "audio/mpeg") == 26122
+
+
+def test_mp3_vbri_frame_count_is_used(write):
+    vbri = b"\x00" * 32 + b"VBRI" + struct.pack(">HHHII", 1, 0, 75, 0, 500)
+    payload = _mp3_frame(vbri) + _mp3_frame()
+    assert probe_duration_ms(write("a.mp3", payload), "audio/mpeg") == 13061
+
+
+def test_adts_aac_duration(write):
+    # Sampling index 4 (44.1 kHz), 20-byte frames of 1024 samples each.
+    header = bytes([0xFF, 0xF1, 0x50, 0x80, 0x02, 0x9F, 0xFC])
+    payload = (header + b"\x00" * 13) * 431
+    assert probe_duration_ms(write("a.aac", payload), "audio/aac") == 10007
+
+
+def test_mp4_duration_from_mvhd_after_mdat(write):
+    mvhd = _box(b"mvhd", b"\x00" * 12 + struct.pack(">II", 600, 4500) + b"\x00" * 80)
+    payload = (
+        _box(b"ftyp", b"M4A \x00\x00\x00\x00")
+        + _box(b"mdat", b"\x00" * 50_000)
+        + _box(b"moov", mvhd)
+    )
+    assert probe_duration_ms(write("a.m4a", payload), "audio/mp4") == 7500
+
+
+@pytest.mark.parametrize(
+    ("identification", "granule", "expected"),
+    [
+        (b"\x01vorbis" + struct.pack("<IBI", 0, 2, 44100), 44100 * 3, 3000),
+        (b"OpusHead" + struct.pack("<BBHI", 1, 2, 312, 48000), 96312, 2000),
+    ],
+)
+def test_ogg_duration_from_last_granule(write, identification, granule, expected):
+    payload = (
+        _ogg_page(0, identification, header_type=0x02)
+        + _ogg_page(1000, b"\x00" * 200)
+        + _ogg_page(granule, b"\x00" * 200, header_type=0x04)
+    )
+    assert probe_duration_ms(write("a.ogg", payload), "audio/ogg") == expected
+
+
+def test_webm_duration_element(write):
+    info = _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")) + _ebml(
+        0x4489, struct.pack(">d", 4500.0)
+    )
+    payload = _ebml(0x1A45DFA3, _ebml(0x4282, b"webm")) + _ebml(
+        0x18538067, _ebml(0x1549A966, info), unknown_size=True
+    )
+    assert probe_duration_ms(write("a.webm", payload), "audio/webm") == 4500
+
+
+def test_webm_without_duration_uses_last_cluster(write):
+    # MediaRecorder style: unknown-size segment and clusters, no Duration.
+    def cluster(timecode: int, block_offsets: list[int]) -> bytes:
+        blocks = b"".join(
+            _ebml(0xA3, b"\x81" + struct.pack(">h", offset) + b"\x80" + b"\x00" * 40)
+            for offset in block_offsets
+        )
+        return _ebml(
+            0x1F43B675,
+            _ebml(0xE7, timecode.to_bytes(2, "big")) + blocks,
+            unknown_size=True,
+        )
+
+    payload = _ebml(0x1A45DFA3, _ebml(0x4282, b"webm")) + _ebml(
+        0x18538067,
+        _ebml(0x1549A966, _ebml(0x2AD7B1, (1_000_000).to_bytes(3, "big")))
+        + cluster(0, [0, 20, 40])
+        + cluster(1000, [0, 20, 460]),
+        unknown_size=True,
+    )
+    assert probe_duration_ms(write("a.webm", payload), "audio/webm") == 1460
+
+
+def test_aiff_duration_from_comm(write):
+    comm = struct.pack(">hIh", 1, 22050, 16) + _extended(44100.0)
+    chunks = b"AIFF" + b"COMM" + struct.pack(">I", len(comm)) + comm
+    chunks += b"SSND" + struct.pack(">I", 8 + 100) + b"\x00" * 108
+    payload = b"FORM" + struct.pack(">I", len(chunks)) + chunks
+    assert probe_duration_ms(write("a.aiff", payload), "audio/aiff") == 500
+
+
+def test_wav_duration_from_chunks(write):
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(2)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(16000)
+        wav_file.writeframes(b"\x00\x00\x00\x00" * 24000)
+    assert probe_duration_ms(write("a.wav", buffer.getvalue()), "audio/wav") == 1500
+
+
+def test_unparseable_files_have_no_duration(write):
+    assert (
+        probe_duration_ms(write("a.mp3", b"ID3" + b"\x00" * 20), "audio/mpeg") is None
+    )
+    assert probe_duration_ms(write("a.ogg", b"OggS\x00"), "audio/ogg") is None
+    assert probe_duration_ms(write("a.webm", b"\x1a\x45\xdf\xa3"), "audio/webm") is None
+    assert probe_duration_ms(write("a.bin", b"data"), "audio/unknown") is None
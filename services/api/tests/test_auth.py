@@ -110,3 +110,94 @@ def test_refresh_fails_with_access_token(tmp_path, monkeypatch):
     )
 
     assert response.status_code == 401
+
+
+def test_current_user_is_cached_and_invalidated_on_deactivation(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    login = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": "admin@example.com", "password": "admin-password"},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    import app.db
+    from app.models import User
+    from app.security import user_cache
+
+    before = user_cache.stats()
+    for _ in range(3):
+        assert client.get(f"{API_PREFIX}/entries", headers=headers).status_code == 200
+    after = user_cache.stats()
+    assert after["misses"] - before["misses"] == 1
+    assert after["hits"] - before["hits"] == 2
+
+    with app.db.SessionLocal() as db:
+        user = db.query(User).filter(User.email == "admin@example.com").one()
+        user.is_active = False
+        db.commit()
+
+    response = client.get(f"{API_PREFIX}/entries", headers=headers)
+    assert response.status_code == 401
+    assert response.json()["error"]["code"] == "invalid_user"
+
+
+def test_user_cached_again_before_commit_is_invalidated_on_commit(
+    tmp_path, monkeypatch
+):
+    client = _build_client(tmp_path, monkeypatch)
+    login = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": "admin@example.com", "password": "admin-password"},
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    import app.db
+    from app.models import User
+
+    with app.db.SessionLocal() as db:
+        user = db.query(User).filter(User.email == "admin@example.com").one()
+        user.is_active = False
+        db.flush()
+        # Another request reads the still-committed active row and caches it.
+        assert client.get(f"{API_PREFIX}/entries", headers=headers).status_code == 200
+        db.commit()
+
+    response = client.get(f"{API_PREFIX}/entries", headers=headers)
+    assert response.status_code == 401
+
+    monkeypatch.setattr("app.routes.metrics.settings.metrics_enabled", True)
+    metrics = client.get("/metrics").text
+    assert "# TYPE echo_auth_user_cache_hits_total counter" in metrics
+    assert "echo_auth_user_cache_invalidations_total " in metrics
+
+
+def test_user_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    from app.security import AuthenticatedUser, UserCache
+
+    now = [1000.0]
+    monkeypatch.setattr("app.security.time.monotonic", lambda: now[0])
+
+    cache = UserCache(max_entries=2, ttl_seconds=10)
+    users = [
+        AuthenticatedUser(id=f"u{i}", email=f"u{i}@x", is_active=True) for i in range(3)
+    ]
+    cache.put(users[0])
+    cache.put(users[1])
+    assert cache.get("u0") == users[0]
+    cache.put(users[2])
+    assert cache.get("u1") is None
+    assert cache.get("u0") == users[0]
+
+    now[0] += 11
+    assert cache.get("u0") is None
+    assert cache.stats() == {
+        "size": 1,
+        "hits": 2,
+        "misses": 2,
+        "evictions": 1,
+        "invalidations": 0,
+    }
+
+    disabled = UserCache(max_entries=2, ttl_seconds=0)
+    disabled.put(users[0])
+    assert disabled.get("u0") is None
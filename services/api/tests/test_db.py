@@ -0,0 +1,44 @@
+def test_engine_applies_sqlite_pragma_profile(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("SQLITE_BUSY_TIMEOUT_MS", "1234")
+    monkeypatch.setenv("SQLITE_CACHE_SIZE", "-2000")
+
+    import app.db
+    import app.settings
+
+    monkeypatch.setattr(app.db, "settings", app.settings.Settings())
+    engine = app.db.create_db_engine(f"sqlite:///{tmp_path / 'echo.db'}")
+    try:
+        effective = app.db.log_sqlite_pragmas(engine)
+        with engine.connect() as connection:
+            # Pragmas are per connection: a second pooled connection gets them too.
+            with engine.connect() as other:
+                assert other.exec_driver_sql("PRAGMA busy_timeout").scalar() == 1234
+            assert connection.exec_driver_sql("PRAGMA synchronous").scalar() == 1
+    finally:
+        engine.dispose()
+
+    assert effective == {
+        "busy_timeout": 1234,
+        "journal_mode": "wal",
+        "synchronous": 1,
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -2000,
+        "temp_store": 2,
+    }
+
+
+def test_database_url_defaults_to_sqlite_file_under_data_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+
+    import app.settings
+
+    assert app.settings.Settings().sqlalchemy_database_url == (
+        f"sqlite:///{tmp_path / 'echo.db'}"
+    )
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql+psycopg://echo:secret@db/echo")
+    assert app.settings.Settings().sqlalchemy_database_url == (
+        "postgresql+psycopg://echo:secret@db/echo"
+    )
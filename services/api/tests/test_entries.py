@@ -12,6 +12,15 @@ VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00payload"
 VALID_M4A_BYTES = b"\x00\x00\x00\x18ftypM4A \x00\x00\x00\x00"
 VALID_WEBM_BYTES = b"\x1a\x45\xdf\xa3\x9f\x42\x86\x81\x01"
 VALID_3GPP_BYTES = b"\x00\x00\x00\x14ftyp3gp5\x00\x00\x00\x00"
+PNG_1X1_BYTES = (
+    b"\x89PNG\r\n\x1a\n"
+    b"\x00\x00\x00\rIHDR"
+    b"\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00"
+    b"\x90wS\xde"
+    b"\x00\x00\x00\x0cIDATx\x9cc```\x00\x00\x00\x04\x00\x01"
+    b"\xf6\x178U"
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"
+)
 
 
 def _build_client(tmp_path, monkeypatch):
@@ -315,6 +324,56 @@ def test_create_entry_text_and_audio_ok(tmp_path, monkeypatch):
     assert response.json()["audio_size"] == len(VALID_MP3_BYTES)
 
 
+def test_create_entry_with_audio_and_images_in_one_request(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+
+    response = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id), "text": "photos"},
+        files=[
+            ("audio_file", ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")),
+            ("image_files", ("one.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+            ("image_files", ("two.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["audio_size"] == len(VALID_MP3_BYTES)
+    assert [asset["mime"] for asset in body["assets"]] == ["image/png", "image/png"]
+    for asset in body["assets"]:
+        assert (tmp_path / asset["path"]).exists()
+
+
+def test_create_entry_with_a_bad_image_stores_nothing(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+
+    response = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files=[
+            ("audio_file", ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")),
+            ("image_files", ("one.png", BytesIO(PNG_1X1_BYTES), "image/png")),
+            ("image_files", ("fake.png", BytesIO(b"not-a-png"), "image/png")),
+        ],
+        headers=headers,
+    )
+    assert response.status_code == 422
+    assert response.json()["error"]["code"] == "invalid_image_signature"
+
+    listed = client.get(f"{API_PREFIX}/entries", headers=headers)
+    assert listed.json()["items"] == []
+    assert not [path for path in tmp_path.rglob("*") if path.suffix in {".mp3", ".png"}]
+
+
 def test_create_entry_rejects_empty(tmp_path, monkeypatch):
     client = _build_client(tmp_path, monkeypatch)
     headers = _auth_headers(client)
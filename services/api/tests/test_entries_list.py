@@ -2,11 +2,14 @@ from datetime import datetime, timezone
 from io import BytesIO
 from pathlib import Path
 
-from sqlalchemy import update
+from sqlalchemy import event, select, update
+from sqlalchemy.dialects.postgresql import psycopg as postgresql_psycopg
 
 from alembic import command
 from alembic.config import Config
+from fastapi import HTTPException
 from fastapi.testclient import TestClient
+import pytest
 
 API_PREFIX = "/api/v1"
 
@@ -210,3 +213,157 @@ def test_entries_list_acl_isolated_by_user(tmp_path, monkeypatch):
     ids_b = {item["id"] for item in list_b.json()["items"]}
     assert ids_a == {entry_a1, entry_a2}
     assert ids_b == {entry_b1}
+
+
+def test_cursor_pagination_walks_all_sorts_without_gaps(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+
+    created_ids = [_create_entry(client, headers)["id"] for _ in range(5)]
+
+    import app.db
+    from app.models import Entry
+
+    # Two rows share a timestamp written by the application while the others
+    # keep the server default, so cursors must cope with mixed precisions.
+    with app.db.SessionLocal() as db:
+        db.execute(
+            update(Entry)
+            .where(Entry.id.in_(created_ids[:2]))
+            .values(created_at=datetime(2024, 3, 1, tzinfo=timezone.utc))
+        )
+        db.commit()
+
+    for sort in ("created_at_desc", "created_at_asc", "id_asc", "id_desc"):
+        expected = [
+            item["id"]
+            for item in client.get(
+                f"{API_PREFIX}/entries?sort={sort}&limit=200", headers=headers
+            ).json()["items"]
+        ]
+
+        seen: list[str] = []
+        params = {"sort": sort, "limit": "2"}
+        page = client.get(f"{API_PREFIX}/entries", params=params, headers=headers)
+        page = page.json()
+        seen.extend(item["id"] for item in page["items"])
+        while page["next_cursor"] is not None:
+            page = client.get(
+                f"{API_PREFIX}/entries",
+                params={**params, "cursor": page["next_cursor"]},
+                headers=headers,
+            ).json()
+            assert page["next_offset"] is None
+            seen.extend(item["id"] for item in page["items"])
+
+        assert seen == expected
+        assert sorted(seen) == sorted(created_ids)
+
+
+def test_cursor_validation(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+
+    for _ in range(2):
+        _create_entry(client, headers)
+    cursor = client.get(f"{API_PREFIX}/entries?limit=1", headers=headers).json()[
+        "next_cursor"
+    ]
+    assert cursor
+
+    malformed = client.get(f"{API_PREFIX}/entries?cursor=%%%", headers=headers)
+    assert malformed.status_code == 422
+    assert malformed.json()["error"]["code"] == "invalid_cursor"
+
+    other_sort = client.get(
+        f"{API_PREFIX}/entries",
+        params={"sort": "id_asc", "cursor": cursor},
+        headers=headers,
+    )
+    assert other_sort.status_code == 422
+    assert other_sort.json()["error"]["code"] == "invalid_cursor"
+
+    with_offset = client.get(
+        f"{API_PREFIX}/entries",
+        params={"offset": "1", "cursor": cursor},
+        headers=headers,
+    )
+    assert with_offset.status_code == 422
+    assert with_offset.json()["error"]["code"] == "cursor_with_offset"
+
+
+def test_cursor_compares_typed_created_at_on_postgresql():
+    import app.main
+    from app.models import Entry
+
+    # psycopg returns timestamptz values as aware datetimes.
+    created_at = datetime(2024, 3, 1, 9, 30, 0, 123456, tzinfo=timezone.utc)
+    for sort, operator in (("created_at_desc", "<"), ("created_at_asc", ">")):
+        cursor = app.main._encode_entries_cursor(sort, created_at, "entry-2")
+        key, entry_id = app.main._decode_entries_cursor(cursor, sort, "postgresql")
+        assert (key, entry_id) == (created_at, "entry-2")
+
+        query = select(
+            Entry, app.main._entry_created_at_key("postgresql").label("created_at_key")
+        ).where(app.main._entries_after_cursor(sort, key, entry_id, "postgresql"))
+        compiled = query.compile(dialect=postgresql_psycopg.dialect())
+        sql = " ".join(str(compiled).split())
+        assert f"(entries.created_at, entries.id) {operator} (" in sql
+        assert "s::TIMESTAMP WITH TIME ZONE, " in sql
+        assert created_at in compiled.params.values()
+
+    naive = app.main._encode_entries_cursor(
+        "created_at_desc", "2024-03-01 09:30:00", "entry-2"
+    )
+    with pytest.raises(HTTPException) as excinfo:
+        app.main._decode_entries_cursor(naive, "created_at_desc", "postgresql")
+    assert excinfo.value.detail["code"] == "invalid_cursor"
+
+
+def test_batch_get_returns_owned_entries_and_per_id_errors(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers_a = _auth_headers(client, "user_a@example.com", "password-a")
+    headers_b = _auth_headers(client, "user_b@example.com", "password-b")
+    owned = [_create_entry(client, headers_a)["id"] for _ in range(5)]
+    foreign = _create_entry(client, headers_b)["id"]
+
+    import app.db
+
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(app.db.engine, "before_cursor_execute", _record)
+    try:
+        response = client.post(
+            f"{API_PREFIX}/entries:batchGet",
+            json={"ids": [owned[3], "missing", foreign, *owned, owned[3]]},
+            headers=headers_a,
+        )
+    finally:
+        event.remove(app.db.engine, "before_cursor_execute", _record)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [owned[3], *owned[:3], owned[4]]
+    assert body["items"][0]["audio_url"].endswith(f"/entries/{owned[3]}/audio")
+    assert body["errors"] == [
+        {
+            "id": "missing",
+            "status": 404,
+            "code": "not_found",
+            "message": "Entry not found",
+        },
+        {"id": foreign, "status": 403, "code": "forbidden", "message": "Not allowed"},
+    ]
+    # One IN query for the entries and one per eager-loaded relationship.
+    entry_queries = [s for s in statements if "FROM entries" in s]
+    assert len(entry_queries) == 1
+
+    too_many = client.post(
+        f"{API_PREFIX}/entries:batchGet",
+        json={"ids": [str(index) for index in range(101)]},
+        headers=headers_a,
+    )
+    assert too_many.status_code == 422
@@ -0,0 +1,189 @@
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+API_PREFIX = "/api/v1"
+
+
+def _build_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("APP_ENV", "development")
+
+    import app.db
+    import app.main
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option(
+        "sqlalchemy.url", f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}"
+    )
+    command.upgrade(alembic_cfg, "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        db.add(
+            User(
+                email="user_a@example.com",
+                password_hash=hash_password("password-a"),
+                is_active=True,
+            )
+        )
+        db.add(
+            User(
+                email="user_b@example.com",
+                password_hash=hash_password("password-b"),
+                is_active=True,
+            )
+        )
+        db.commit()
+
+    return TestClient(app.main.app)
+
+
+def _auth_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post(
+        f"{API_PREFIX}/auth/login", json={"email": email, "password": password}
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _create_entry(client: TestClient, headers: dict[str, str], text: str) -> str:
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    response = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id), "text_content": text},
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def _search(client: TestClient, headers: dict[str, str], **params):
+    return client.get(f"{API_PREFIX}/entries/search", params=params, headers=headers)
+
+
+def test_search_ranks_matches_and_follows_entry_changes(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers_a = _auth_headers(client, "user_a@example.com", "password-a")
+    headers_b = _auth_headers(client, "user_b@example.com", "password-b")
+
+    once = _create_entry(
+        client, headers_a, "Balade en forêt avec mamie, puis goûter au village."
+    )
+    twice = _create_entry(client, headers_a, "La forêt, encore la forêt : forêt !")
+    unrelated = _create_entry(client, headers_a, "Journée de travail sans surprise.")
+    _create_entry(client, headers_b, "Ma forêt à moi.")
+
+    # Accents are folded and the last word is matched as a prefix.
+    response = _search(client, headers_a, q="Foret")
+    assert response.status_code == 200
+    body = response.json()
+    assert [item["id"] for item in body["items"]] == [twice, once]
+    assert body["next_cursor"] is None
+    assert "<mark>forêt</mark>" in body["items"][1]["snippet"]
+    assert body["items"][0]["rank"] <= body["items"][1]["rank"]
+
+    assert [
+        item["id"]
+        for item in _search(client, headers_a, q="mamie vill").json()["items"]
+    ] == [once]
+    # FTS5 syntax is searched as text, not interpreted.
+    assert _search(client, headers_a, q='forêt" OR "travail').status_code == 200
+
+    updated = client.patch(
+        f"{API_PREFIX}/entries/{unrelated}",
+        json={"text_content": "Pique-nique en forêt"},
+        headers=headers_a,
+    )
+    assert updated.status_code == 200
+    deleted = client.delete(f"{API_PREFIX}/entries/{twice}", headers=headers_a)
+    assert deleted.status_code == 200
+
+    ids = {item["id"] for item in _search(client, headers_a, q="forêt").json()["items"]}
+    assert ids == {once, unrelated}
+    assert _search(client, headers_a, q="travail").json()["items"] == []
+
+    # The index is keyed by entry id: renumbered rowids (VACUUM, table
+    # rebuild) do not desynchronize it.
+    import app.db
+    from sqlalchemy import text
+
+    with app.db.engine.begin() as connection:
+        connection.execute(text("UPDATE entries SET rowid = rowid + 1000"))
+    assert [
+        item["id"] for item in _search(client, headers_a, q="mamie").json()["items"]
+    ] == [once]
+    client.delete(f"{API_PREFIX}/entries/{once}", headers=headers_a)
+    assert [
+        item["id"] for item in _search(client, headers_a, q="forêt").json()["items"]
+    ] == [unrelated]
+
+
+def test_search_paginates_with_a_keyset_cursor(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    headers_b = _auth_headers(client, "user_b@example.com", "password-b")
+    created = {
+        _create_entry(client, headers, "jardin " * (index + 1) + "du souvenir")
+        for index in range(5)
+    }
+    _create_entry(client, headers_b, "Le jardin de quelqu'un d'autre")
+
+    seen: list[str] = []
+    cursor = None
+    first_cursor = None
+    while True:
+        params = {"q": "jardin", "limit": 2}
+        if cursor is not None:
+            params["cursor"] = cursor
+        page = _search(client, headers, **params).json()
+        seen.extend(item["id"] for item in page["items"])
+        cursor = page["next_cursor"]
+        first_cursor = first_cursor or cursor
+        if cursor is None:
+            break
+    # On an unchanged index, pages list every hit once, in rank order.
+    unpaged = _search(client, headers, q="jardin", limit=100).json()["items"]
+    assert seen == [item["id"] for item in unpaged]
+    assert set(seen) == created
+
+    reused = _search(client, headers, q="souvenir", cursor=first_cursor)
+    assert reused.status_code == 422
+    assert reused.json()["error"]["code"] == "invalid_cursor"
+
+    no_words = _search(client, headers, q="!!!")
+    assert no_words.status_code == 422
+    assert no_words.json()["error"]["code"] == "invalid_query"
+
+
+def test_search_snippets_escape_entry_text(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    _create_entry(client, headers, '<img src=x onerror="alert(1)"> forêt & co')
+
+    (item,) = _search(client, headers, q="foret").json()["items"]
+    assert item["snippet"] == (
+        "&lt;img src=x onerror=&quot;alert(1)&quot;&gt; <mark>forêt</mark> &amp; co"
+    )
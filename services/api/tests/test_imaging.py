@@ -0,0 +1,112 @@
+import pytest
+
+from app.imaging import ImageDimensionProbe
+
+
+def _png(width: int, height: int) -> bytes:
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        b"\x00\x00\x00\rIHDR"
+        + width.to_bytes(4, "big")
+        + height.to_bytes(4, "big")
+        + b"\x08\x02\x00\x00\x00\x90wS\xde"
+        + b"\x00\x00\x00\x00IEND\xaeB`\x82"
+    )
+
+
+def _jpeg_segment(marker: int, payload: bytes) -> bytes:
+    return bytes([0xFF, marker]) + (len(payload) + 2).to_bytes(2, "big") + payload
+
+
+def _jpeg(width: int, height: int, *, sof_marker: int = 0xC0) -> bytes:
+    frame = b"\x08" + height.to_bytes(2, "big") + width.to_bytes(2, "big") + b"\x01"
+    return (
+        b"\xff\xd8"
+        + _jpeg_segment(0xE0, b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00")
+        + _jpeg_segment(0xE1, b"Exif\x00\x00" + b"\x00" * 60_000)
+        + b"\xff"  # fill byte
+        + _jpeg_segment(0xDB, b"\x00" * 65)
+        + _jpeg_segment(0xC4, b"\x00" * 20)
+        + _jpeg_segment(sof_marker, frame + b"\x01\x11\x00")
+        + _jpeg_segment(0xDA, b"\x01\x01\x00\x00\x3f\x00")
+        + b"\x12\x34" * 1000
+        + b"\xff\xd9"
+    )
+
+
+def _webp(chunk: bytes) -> bytes:
+    return b"RIFF" + (len(chunk) + 4).to_bytes(4, "little") + b"WEBP" + chunk
+
+
+def _webp_vp8(width: int, height: int) -> bytes:
+    data = (
+        b"\x00\x00\x00\x9d\x01\x2a"
+        + width.to_bytes(2, "little")
+        + height.to_bytes(2, "little")
+        + b"\x00" * 16
+    )
+    return _webp(b"VP8 " + len(data).to_bytes(4, "little") + data)
+
+
+def _webp_vp8l(width: int, height: int) -> bytes:
+    bits = (width - 1) | ((height - 1) << 14)
+    data = b"\x2f" + bits.to_bytes(4, "little") + b"\x00" * 16
+    return _webp(b"VP8L" + len(data).to_bytes(4, "little") + data)
+
+
+def _webp_vp8x(width: int, height: int) -> bytes:
+    data = (
+        b"\x10\x00\x00\x00"
+        + (width - 1).to_bytes(3, "little")
+        + (height - 1).to_bytes(3, "little")
+    )
+    return _webp(b"VP8X" + len(data).to_bytes(4, "little") + data + b"ALPH")
+
+
+def _probe(mime: str, data: bytes, chunk_size: int) -> tuple[int | None, int | None]:
+    probe = ImageDimensionProbe(mime)
+    for start in range(0, len(data), chunk_size):
+        probe.feed(data[start : start + chunk_size])
+    return probe.dimensions
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 512, 4096, 1024 * 1024])
+@pytest.mark.parametrize(
+    ("mime", "data", "expected"),
+    [
+        ("image/png", _png(640, 480), (640, 480)),
+        ("image/jpeg", _jpeg(400, 300), (400, 300)),
+        ("image/jpg", _jpeg(1920, 1080, sof_marker=0xC2), (1920, 1080)),
+        ("image/webp", _webp_vp8(320, 200), (320, 200)),
+        ("image/webp", _webp_vp8l(1000, 16383), (1000, 16383)),
+        ("image/webp", _webp_vp8x(4000, 3000), (4000, 3000)),
+    ],
+)
+def test_probe_reads_dimensions_across_chunk_boundaries(
+    mime, data, expected, chunk_size
+):
+    assert _probe(mime, data, chunk_size) == expected
+
+
+def test_probe_stops_consuming_once_dimensions_are_known():
+    probe = ImageDimensionProbe("image/jpeg")
+    probe.feed(_jpeg(10, 20)[:-2002])
+    assert probe.done
+    assert probe.dimensions == (10, 20)
+    probe.feed(b"\x00" * 1024)
+    assert probe.dimensions == (10, 20)
+    assert probe._pending == b""
+
+
+@pytest.mark.parametrize(
+    ("mime", "data"),
+    [
+        ("image/png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 32),
+        ("image/jpeg", b"\xff\xd8" + _jpeg_segment(0xDA, b"\x00" * 6) + b"\x00" * 64),
+        ("image/jpeg", b"\xff\xd8\x00\x00" + b"\x00" * 64),
+        ("image/webp", _webp(b"ABCD" + b"\x00" * 32)),
+        ("image/gif", b"GIF89a" + b"\x00" * 32),
+    ],
+)
+def test_probe_returns_none_for_unparseable_headers(mime, data):
+    assert _probe(mime, data, 5) == (None, None)
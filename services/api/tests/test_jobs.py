@@ -0,0 +1,253 @@
+from datetime import timedelta
+from io import BytesIO
+from pathlib import Path
+import wave
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+API_PREFIX = "/api/v1"
+
+
+def _build_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("APP_ENV", "development")
+
+    import app.db
+    import app.main
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(api_dir / "alembic"))
+    alembic_cfg.set_main_option(
+        "sqlalchemy.url", f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}"
+    )
+    command.upgrade(alembic_cfg, "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        for email, password in (
+            ("user_a@example.com", "password-a"),
+            ("user_b@example.com", "password-b"),
+        ):
+            db.add(
+                User(
+                    email=email,
+                    password_hash=hash_password(password),
+                    is_active=True,
+                )
+            )
+        db.commit()
+
+    return TestClient(app.main.app)
+
+
+def _auth_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _wav_bytes(frames: int = 8000, rate: int = 8000) -> bytes:
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(rate)
+        wav_file.writeframes(b"\x00\x00" * frames)
+    return buffer.getvalue()
+
+
+def _run_jobs(tmp_path, **kwargs) -> int:
+    import app.db
+    import app.jobs
+
+    return app.jobs.run_pending_jobs(
+        app.db.SessionLocal, app.jobs.JobQueueConfig(data_dir=tmp_path), **kwargs
+    )
+
+
+def test_audio_upload_is_probed_by_a_background_job(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+
+    created = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.wav", BytesIO(_wav_bytes()), "audio/wav")},
+        headers=headers,
+    )
+    assert created.status_code == 200
+    entry_id = created.json()["id"]
+    assert created.json()["processing_status"] == "pending"
+
+    jobs = client.get(f"{API_PREFIX}/jobs", headers=headers).json()
+    assert jobs["counts"] == {"queued": 1}
+    assert jobs["items"][0]["kind"] == "entry.audio"
+    assert jobs["items"][0]["payload"]["entry_id"] == entry_id
+
+    assert _run_jobs(tmp_path) == 1
+
+    entry = client.get(f"{API_PREFIX}/entries/{entry_id}", headers=headers).json()
+    assert entry["processing_status"] == "ready"
+    job = client.get(
+        f"{API_PREFIX}/jobs/{jobs['items'][0]['id']}", headers=headers
+    ).json()
+    assert job["status"] == "succeeded"
+    assert job["attempts"] == 1
+
+    import app.db
+    from app.models import Entry
+
+    with app.db.SessionLocal() as db:
+        assert db.get(Entry, entry_id).audio_duration_ms == 1000
+
+    # Jobs are only visible to the owner of the media they process.
+    other = _auth_headers(client, "user_b@example.com", "password-b")
+    assert client.get(f"{API_PREFIX}/jobs", headers=other).json()["items"] == []
+    assert (
+        client.get(f"{API_PREFIX}/jobs/{job['id']}", headers=other).status_code == 404
+    )
+
+
+def test_failing_job_is_retried_with_backoff_then_marked_failed(tmp_path, monkeypatch):
+    _build_client(tmp_path, monkeypatch)
+
+    import app.db
+    import app.jobs
+    from app.models import Job
+
+    calls = []
+
+    def flaky(db, data_dir, payload):
+        calls.append(payload)
+        raise RuntimeError("transient")
+
+    failures = []
+    monkeypatch.setitem(
+        app.jobs.JOB_KINDS,
+        "test.flaky",
+        app.jobs.JobKind(
+            run=flaky, on_failure=lambda db, payload: failures.append(payload)
+        ),
+    )
+    with app.db.SessionLocal() as db:
+        job = app.jobs.enqueue_job(db, "test.flaky", {"n": 1}, max_attempts=2)
+        db.commit()
+        job_id = job.id
+
+    now = app.jobs.utcnow()
+    assert _run_jobs(tmp_path, now=now) == 1
+    with app.db.SessionLocal() as db:
+        job = db.get(Job, job_id)
+        assert job.status == "queued"
+        assert job.attempts == 1
+        assert job.last_error == "RuntimeError: transient"
+
+    # Not due yet: the first retry waits retry_base_seconds.
+    assert _run_jobs(tmp_path, now=now + timedelta(seconds=1)) == 0
+    assert _run_jobs(tmp_path, now=now + timedelta(seconds=6)) == 1
+    with app.db.SessionLocal() as db:
+        job = db.get(Job, job_id)
+        assert job.status == "failed"
+        assert job.attempts == 2
+        assert job.finished_at is not None
+    assert len(calls) == 2
+    assert failures == [{"n": 1}]
+
+
+def test_expired_lease_makes_running_job_claimable_again(tmp_path, monkeypatch):
+    _build_client(tmp_path, monkeypatch)
+
+    import app.db
+    import app.jobs
+
+    monkeypatch.setitem(
+        app.jobs.JOB_KINDS, "test.noop", app.jobs.JobKind(run=lambda *args: None)
+    )
+    config = app.jobs.JobQueueConfig(data_dir=tmp_path, lease_seconds=60)
+    with app.db.SessionLocal() as db:
+        job = app.jobs.enqueue_job(db, "test.noop", {})
+        db.commit()
+        job_id = job.id
+
+    now = app.jobs.utcnow()
+    with app.db.SessionLocal() as db:
+        assert app.jobs.claim_next_job(db, "crashed-worker", config, now) == job_id
+        assert app.jobs.claim_next_job(db, "other", config, now) is None
+        later = now + timedelta(seconds=61)
+        assert app.jobs.claim_next_job(db, "other", config, later) == job_id
+
+    assert app.jobs.run_job(app.db.SessionLocal, job_id, config) == "succeeded"
+
+
+def test_audio_job_writes_waveform_peaks_served_by_entry(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    created = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.wav", BytesIO(_wav_bytes()), "audio/wav")},
+        headers=headers,
+    )
+    entry_id = created.json()["id"]
+    peaks_url = f"{API_PREFIX}/entries/{entry_id}/audio/peaks"
+
+    pending = client.get(peaks_url, headers=headers)
+    assert pending.status_code == 404
+    assert pending.json()["error"]["code"] == "peaks_unavailable"
+
+    _run_jobs(tmp_path)
+
+    peaks = client.get(peaks_url, headers=headers)
+    assert peaks.status_code == 200
+    assert peaks.headers["content-type"] == "application/octet-stream"
+    assert peaks.content[:4] == b"EPK1"
+    # Default WAVEFORM_PEAKS_BUCKETS of silent (0, 0) pairs behind the header.
+    assert len(peaks.content) == 8 + 2 * 2048
+    assert set(peaks.content[8:]) == {0}
+
+    as_json = client.get(peaks_url, params={"format": "json"}, headers=headers)
+    assert as_json.json()["buckets"] == 2048
+    assert as_json.headers["etag"] != peaks.headers["etag"]
+
+    revalidated = client.get(
+        peaks_url, headers={**headers, "If-None-Match": peaks.headers["etag"]}
+    )
+    assert revalidated.status_code == 304
+
+    other = _auth_headers(client, "user_b@example.com", "password-b")
+    assert client.get(peaks_url, headers=other).status_code == 403
+
+    peaks_files = list((tmp_path / "audio" / "peaks").iterdir())
+    assert len(peaks_files) == 1
+    deleted = client.delete(f"{API_PREFIX}/entries/{entry_id}/audio", headers=headers)
+    assert deleted.status_code == 200
+    assert not peaks_files[0].exists()
@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+from io import BytesIO
+from pathlib import Path
+from types import SimpleNamespace
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+import pytest
+from sqlalchemy import update
+
+API_PREFIX = "/api/v1"
+
+VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00payload"
+PNG_1X1_BYTES = (
+    b"\x89PNG\r\n\x1a\n"
+    b"\x00\x00\x00\rIHDR"
+    b"\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00"
+    b"\x90wS\xde"
+    b"\x00\x00\x00\x0cIDATx\x9cc```\x00\x00\x00\x04\x00\x01"
+    b"\xf6\x178U"
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+def _alembic_config(data_dir: Path) -> Config:
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("sqlalchemy.url", f"sqlite:///{data_dir / 'echo.db'}")
+    return alembic_cfg
+
+
+def _build_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("APP_ENV", "development")
+
+    import app.db
+    import app.main
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    command.upgrade(_alembic_config(tmp_path), "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        db.add(
+            User(
+                email="user_a@example.com",
+                password_hash=hash_password("password-a"),
+                is_active=True,
+            )
+        )
+        db.commit()
+
+    return TestClient(app.main.app)
+
+
+def _auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": "user_a@example.com", "password": "password-a"},
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _create_entry(client: TestClient, headers: dict[str, str], **files) -> str:
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    response = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id), "text_content": "souvenir"},
+        files=files or None,
+        headers=headers,
+    )
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+def test_lifeline_counts_follow_entries_and_media(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+
+    assert client.get(f"{API_PREFIX}/lifeline", headers=headers).json() == {
+        "granularity": "year",
+        "buckets": [],
+        "max_entry_count": 0,
+    }
+
+    with_audio = _create_entry(
+        client,
+        headers,
+        audio_file=("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg"),
+    )
+    text_only = _create_entry(client, headers)
+    image = client.post(
+        f"{API_PREFIX}/entries/{text_only}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    )
+    assert image.status_code == 200
+
+    (bucket,) = client.get(f"{API_PREFIX}/lifeline", headers=headers).json()["buckets"]
+    assert bucket["year"] == datetime.now(timezone.utc).year
+    assert bucket["month"] is None
+    assert (bucket["entry_count"], bucket["media_count"]) == (2, 2)
+    assert bucket["density"] == 1.0
+
+    assert (
+        client.delete(f"{API_PREFIX}/entries/{with_audio}/audio", headers=headers)
+    ).status_code == 200
+    assert (
+        client.delete(f"{API_PREFIX}/entries/{text_only}", headers=headers)
+    ).status_code == 200
+    (bucket,) = client.get(
+        f"{API_PREFIX}/lifeline?granularity=month", headers=headers
+    ).json()["buckets"]
+    assert bucket["month"] == datetime.now(timezone.utc).month
+    assert (bucket["entry_count"], bucket["media_count"]) == (1, 0)
+
+
+def test_lifeline_migration_backfills_existing_entries(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+    dates = [
+        datetime(1994, 3, 1, tzinfo=timezone.utc),
+        datetime(1994, 3, 20, tzinfo=timezone.utc),
+        datetime(1994, 7, 4, tzinfo=timezone.utc),
+        datetime(2010, 12, 31, tzinfo=timezone.utc),
+    ]
+    entry_ids = [
+        _create_entry(
+            client,
+            headers,
+            audio_file=("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg"),
+        )
+        for _ in dates
+    ]
+
+    import app.db
+    from app.models import Entry
+
+    with app.db.SessionLocal() as db:
+        for entry_id, created_at in zip(entry_ids, dates, strict=True):
+            db.execute(
+                update(Entry).where(Entry.id == entry_id).values(created_at=created_at)
+            )
+        db.commit()
+    command.downgrade(_alembic_config(tmp_path), "0013_entries_fts")
+    command.upgrade(_alembic_config(tmp_path), "head")
+
+    yearly = client.get(f"{API_PREFIX}/lifeline", headers=headers).json()
+    assert yearly["max_entry_count"] == 3
+    assert [
+        (
+            bucket["year"],
+            bucket["entry_count"],
+            bucket["media_count"],
+            bucket["density"],
+        )
+        for bucket in yearly["buckets"]
+    ] == [(1994, 3, 3, 1.0), (2010, 1, 1, 0.3333)]
+
+    monthly = client.get(
+        f"{API_PREFIX}/lifeline?granularity=month", headers=headers
+    ).json()
+    assert [
+        (bucket["year"], bucket["month"], bucket["entry_count"])
+        for bucket in monthly["buckets"]
+    ] == [(1994, 3, 2), (1994, 7, 1), (2010, 12, 1)]
+    assert monthly["buckets"][0]["density"] == 1.0
+
+
+def test_lifeline_rejects_databases_without_upsert():
+    from app.lifeline import adjust_lifeline
+
+    class _Session:
+        def get_bind(self):
+            return SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+
+    with pytest.raises(RuntimeError, match="'mysql'"):
+        adjust_lifeline(
+            _Session(), "user-1", datetime(2024, 3, 1, tzinfo=timezone.utc), entries=1
+        )
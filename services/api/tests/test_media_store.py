@@ -0,0 +1,252 @@
+from io import BytesIO
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+API_PREFIX = "/api/v1"
+VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00payload"
+PNG_1X1_BYTES = (
+    b"\x89PNG\r\n\x1a\n"
+    b"\x00\x00\x00\rIHDR"
+    b"\x00\x00\x00\x01\x00\x00\x00\x01\x08\x02\x00\x00\x00"
+    b"\x90wS\xde"
+    b"\x00\x00\x00\x0cIDATx\x9cc```\x00\x00\x00\x04\x00\x01"
+    b"\xf6\x178U"
+    b"\x00\x00\x00\x00IEND\xaeB`\x82"
+)
+
+
+def _build_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("APP_ENV", "development")
+
+    import app.db
+    import app.main
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(api_dir / "alembic"))
+    alembic_cfg.set_main_option(
+        "sqlalchemy.url", f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}"
+    )
+    command.upgrade(alembic_cfg, "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        for email, password in (
+            ("user_a@example.com", "password-a"),
+            ("user_b@example.com", "password-b"),
+        ):
+            db.add(
+                User(
+                    email=email,
+                    password_hash=hash_password(password),
+                    is_active=True,
+                )
+            )
+        db.commit()
+
+    return TestClient(app.main.app)
+
+
+def _auth_headers(client: TestClient, email: str, password: str) -> dict[str, str]:
+    response = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": email, "password": password},
+    )
+    assert response.status_code == 200
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+def _create_entry_with_media(client: TestClient, headers: dict[str, str]) -> dict:
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+    entry = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")},
+        headers=headers,
+    ).json()
+    asset = client.post(
+        f"{API_PREFIX}/entries/{entry['id']}/assets",
+        files={"file": ("pixel.png", BytesIO(PNG_1X1_BYTES), "image/png")},
+        headers=headers,
+    ).json()
+    return {"entry": entry, "asset": asset}
+
+
+def _stored_files(tmp_path: Path, directory: str) -> list[Path]:
+    return sorted(path for path in (tmp_path / directory).rglob("*") if path.is_file())
+
+
+def test_content_addressed_uploads_share_blobs_until_last_reference(
+    tmp_path, monkeypatch
+):
+    client = _build_client(tmp_path, monkeypatch)
+
+    import app.main
+
+    monkeypatch.setattr(app.main.settings, "media_storage_layout", "content_addressed")
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+
+    first = _create_entry_with_media(client, headers)
+    second = _create_entry_with_media(client, headers)
+    asset_sha256 = first["asset"]["sha256"]
+    assert first["asset"]["path"] == (
+        f"blobs/{asset_sha256[:2]}/{asset_sha256[2:4]}/{asset_sha256}"
+    )
+    assert second["asset"]["path"] == first["asset"]["path"]
+    # One blob for the audio and one for the image, nothing left in staging.
+    assert len(_stored_files(tmp_path, "blobs")) == 2
+    assert _stored_files(tmp_path, "audio") == []
+
+    deleted = client.delete(
+        f"{API_PREFIX}/entries/{first['entry']['id']}", headers=headers
+    )
+    assert deleted.status_code == 200
+    assert len(_stored_files(tmp_path, "blobs")) == 2
+    downloaded = client.get(
+        f"{API_PREFIX}/assets/{second['asset']['id']}", headers=headers
+    )
+    assert downloaded.content == PNG_1X1_BYTES
+
+    client.delete(f"{API_PREFIX}/entries/{second['entry']['id']}", headers=headers)
+    assert _stored_files(tmp_path, "blobs") == []
+
+
+def test_migration_moves_per_entry_files_into_blobs(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    first = _create_entry_with_media(client, headers)
+    second = _create_entry_with_media(client, headers)
+    assert first["asset"]["path"].startswith("images/")
+    assert len(_stored_files(tmp_path, "images")) == 2
+
+    import app.db
+    from app.media_store import migrate_to_blobs
+    from app.object_storage import LocalMediaStorage
+
+    storage = LocalMediaStorage(tmp_path)
+    with app.db.SessionLocal() as db:
+        assert migrate_to_blobs(db, storage, dry_run=True)["deduplicated"] == 2
+        assert len(_stored_files(tmp_path, "images")) == 2
+
+        stats = migrate_to_blobs(db, storage)
+    assert stats["migrated"] == 4
+    assert stats["deduplicated"] == 2
+    assert _stored_files(tmp_path, "images") == []
+    assert _stored_files(tmp_path, "audio") == []
+    assert len(_stored_files(tmp_path, "blobs")) == 2
+
+    for created in (first, second):
+        entry = client.get(
+            f"{API_PREFIX}/entries/{created['entry']['id']}", headers=headers
+        ).json()
+        assert entry["assets"][0]["path"].startswith("blobs/")
+        audio = client.get(
+            f"{API_PREFIX}/entries/{created['entry']['id']}/audio", headers=headers
+        )
+        assert audio.content == VALID_MP3_BYTES
+
+    with app.db.SessionLocal() as db:
+        assert migrate_to_blobs(db, storage)["migrated"] == 0
+
+
+def test_concurrent_release_does_not_lose_a_blob_being_reused(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+
+    import app.db
+    import app.main
+    from app.media_store import (
+        blob_path,
+        commit_blob,
+        release_media,
+        settle_blobs,
+        staging_key,
+    )
+    from app.models import Entry, EntryAsset
+    from app.object_storage import LocalMediaStorage
+
+    monkeypatch.setattr(app.main.settings, "media_storage_layout", "content_addressed")
+    headers = _auth_headers(client, "user_a@example.com", "password-a")
+    first = _create_entry_with_media(client, headers)
+    second = _create_entry_with_media(client, headers)
+    sha256 = first["asset"]["sha256"]
+    blob = blob_path(sha256)
+    storage = LocalMediaStorage(tmp_path)
+
+    def stage_same_image() -> str:
+        key = staging_key()
+        (tmp_path / key).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / key).write_bytes(PNG_1X1_BYTES)
+        return key
+
+    def new_asset(entry_id: str) -> EntryAsset:
+        return EntryAsset(
+            entry_id=entry_id,
+            user_id=first["entry"]["user_id"],
+            asset_type="image",
+            path=blob,
+            mime="image/png",
+            size=len(PNG_1X1_BYTES),
+            sha256=sha256,
+        )
+
+    def drop_entry_assets(db, entry_id: str) -> None:
+        entry = db.get(Entry, entry_id)
+        entry.assets.clear()
+        db.commit()
+
+    # The last reference is released before the new row commits: the held
+    # copy brings the blob back once it does.
+    with app.db.SessionLocal() as db:
+        held_asset = new_asset(second["entry"]["id"])
+        held_asset.id = "held-asset"
+        assert commit_blob(storage, stage_same_image(), sha256, held_asset.id) == blob
+        drop_entry_assets(db, first["entry"]["id"])
+        drop_entry_assets(db, second["entry"]["id"])
+        release_media(db, storage, [blob])
+        assert not storage.exists(blob)
+        db.add(held_asset)
+        db.commit()
+        settle_blobs(storage, [(blob, held_asset.id)])
+    assert (tmp_path / blob).read_bytes() == PNG_1X1_BYTES
+    assert _stored_files(tmp_path, "blobs/incoming") == []
+
+    # The new row commits between the reference count and the deletion:
+    # release_media counts again and puts the blob back.
+    real_move = storage.move
+
+    def move_then_commit(src: str, dst: str) -> None:
+        real_move(src, dst)
+        if src == blob:
+            with app.db.SessionLocal() as other:
+                other.add(new_asset(first["entry"]["id"]))
+                other.commit()
+
+    with app.db.SessionLocal() as db:
+        drop_entry_assets(db, second["entry"]["id"])
+        monkeypatch.setattr(storage, "move", move_then_commit)
+        release_media(db, storage, [blob])
+    assert (tmp_path / blob).read_bytes() == PNG_1X1_BYTES
+    assert _stored_files(tmp_path, "blobs/trash") == []
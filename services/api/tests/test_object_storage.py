@@ -0,0 +1,261 @@
+from io import BytesIO
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+import pytest
+
+pytest.importorskip("boto3")
+from botocore.exceptions import ClientError
+
+from app.object_storage import S3MediaStorage, S3StorageConfig
+
+API_PREFIX = "/api/v1"
+VALID_MP3_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00payload"
+MiB = 1024 * 1024
+
+
+class _Body:
+    def __init__(self, payload: bytes):
+        self._stream = BytesIO(payload)
+
+    def read(self) -> bytes:
+        return self._stream.read()
+
+    def iter_chunks(self, chunk_size: int):
+        while chunk := self._stream.read(chunk_size):
+            yield chunk
+
+    def close(self) -> None:
+        pass
+
+
+class InMemoryS3:
+    """The subset of the boto3 S3 client used by S3MediaStorage."""
+
+    def __init__(self):
+        self.objects: dict[tuple[str, str], tuple[bytes, str | None]] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.calls: list[str] = []
+
+    def _missing(self, operation: str) -> ClientError:
+        return ClientError({"Error": {"Code": "NoSuchKey"}}, operation)
+
+    def put_object(self, Bucket, Key, Body, ContentType=None):
+        self.calls.append("put_object")
+        self.objects[(Bucket, Key)] = (bytes(Body), ContentType)
+
+    def get_object(self, Bucket, Key, Range=None):
+        if (Bucket, Key) not in self.objects:
+            raise self._missing("GetObject")
+        payload = self.objects[(Bucket, Key)][0]
+        if Range is not None:
+            start, _, end = Range.removeprefix("bytes=").partition("-")
+            payload = payload[int(start) : int(end) + 1 if end else None]
+        return {"Body": _Body(payload)}
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {"ContentLength": len(self.objects[(Bucket, Key)][0])}
+
+    def delete_object(self, Bucket, Key):
+        self.objects.pop((Bucket, Key), None)
+
+    def copy_object(self, Bucket, Key, CopySource):
+        source = (CopySource["Bucket"], CopySource["Key"])
+        if source not in self.objects:
+            raise self._missing("CopyObject")
+        self.objects[(Bucket, Key)] = self.objects[source]
+
+    def create_multipart_upload(self, Bucket, Key, ContentType=None):
+        self.calls.append("create_multipart_upload")
+        upload_id = f"upload-{len(self.uploads)}"
+        self.uploads[upload_id] = {}
+        return {"UploadId": upload_id}
+
+    def upload_part(self, Bucket, Key, UploadId, PartNumber, Body):
+        self.calls.append("upload_part")
+        self.uploads[UploadId][PartNumber] = Body
+        return {"ETag": f'"part-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket, Key, UploadId, MultipartUpload):
+        parts = self.uploads.pop(UploadId)
+        numbers = [part["PartNumber"] for part in MultipartUpload["Parts"]]
+        assert numbers == sorted(parts)
+        self.objects[(Bucket, Key)] = (b"".join(parts[n] for n in numbers), None)
+
+    def abort_multipart_upload(self, Bucket, Key, UploadId):
+        self.calls.append("abort_multipart_upload")
+        self.uploads.pop(UploadId)
+
+    def generate_presigned_url(self, operation, Params, ExpiresIn):
+        return f"https://s3.test/{Params['Bucket']}/{Params['Key']}?e={ExpiresIn}"
+
+
+def _storage(client: InMemoryS3, **overrides) -> S3MediaStorage:
+    config = S3StorageConfig(
+        bucket="media", key_prefix="echo/", multipart_part_size=5 * MiB, **overrides
+    )
+    return S3MediaStorage(config, client=client, presign_client=client)
+
+
+def test_uploads_stream_as_multipart_parts_and_read_back_by_range():
+    client = InMemoryS3()
+    storage = _storage(client)
+    payload = bytes(range(256)) * (12 * MiB // 256)
+
+    sink = storage.open_upload("audio/a.mp3", "audio/mpeg")
+    for offset in range(0, len(payload), MiB):
+        sink.write(payload[offset : offset + MiB])
+    sink.commit()
+
+    assert client.calls.count("upload_part") == 3
+    assert "put_object" not in client.calls
+    assert storage.size("audio/a.mp3") == len(payload)
+    assert ("media", "echo/audio/a.mp3") in client.objects
+    assert (
+        b"".join(storage.iter_bytes("audio/a.mp3", 10, 4 * MiB))
+        == (payload[10 : 4 * MiB + 1])
+    )
+
+    storage.put_bytes("audio/peaks/x.bin", b"EPK1", "application/octet-stream")
+    storage.move("audio/peaks/x.bin", "audio/peaks/y.bin")
+    assert storage.read_bytes("audio/peaks/y.bin") == b"EPK1"
+    assert not storage.exists("audio/peaks/x.bin")
+    with pytest.raises(FileNotFoundError):
+        storage.read_bytes("audio/peaks/x.bin")
+
+
+def test_small_uploads_use_one_put_and_aborts_discard_parts():
+    client = InMemoryS3()
+    storage = _storage(client)
+
+    sink = storage.open_upload("images/a.png", "image/png")
+    sink.write(b"\x89PNG")
+    sink.commit()
+    assert client.calls == ["put_object"]
+    assert client.objects[("media", "echo/images/a.png")] == (b"\x89PNG", "image/png")
+
+    sink = storage.open_upload("images/b.png", "image/png")
+    sink.write(b"\x00" * 6 * MiB)
+    sink.abort()
+    assert "abort_multipart_upload" in client.calls
+    assert client.uploads == {}
+    assert not storage.exists("images/b.png")
+
+
+def test_presigned_urls_use_the_public_endpoint():
+    storage = S3MediaStorage(
+        S3StorageConfig(
+            bucket="media",
+            endpoint_url="http://minio:9000",
+            public_endpoint_url="http://localhost:9000",
+            access_key_id="key",
+            secret_access_key="secret",
+        ),
+        client=InMemoryS3(),
+    )
+    url = storage.presigned_get_url(
+        "audio/a.mp3", content_type="audio/mpeg", expires_in=60
+    )
+    assert url.startswith("http://localhost:9000/media/audio/a.mp3?")
+    assert "X-Amz-Signature=" in url
+    assert "response-content-type=audio%2Fmpeg" in url
+
+
+def _build_client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("APP_ENV", "development")
+
+    import app.db
+    import app.main
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option("script_location", str(api_dir / "alembic"))
+    alembic_cfg.set_main_option(
+        "sqlalchemy.url", f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}"
+    )
+    command.upgrade(alembic_cfg, "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        db.add(
+            User(
+                email="user_a@example.com",
+                password_hash=hash_password("password-a"),
+                is_active=True,
+            )
+        )
+        db.commit()
+
+    return TestClient(app.main.app)
+
+
+def test_api_keeps_media_in_the_bucket(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+
+    import app.db
+    import app.jobs
+    import app.main
+
+    s3 = InMemoryS3()
+    storage = _storage(s3)
+    monkeypatch.setattr(app.main, "media_storage_from_settings", lambda _: storage)
+    token = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": "user_a@example.com", "password": "password-a"},
+    ).json()["access_token"]
+    headers = {"Authorization": f"Bearer {token}"}
+    question_id = client.get(f"{API_PREFIX}/questions/today", headers=headers).json()[
+        "id"
+    ]
+
+    created = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(question_id)},
+        files={"audio_file": ("voice.mp3", BytesIO(VALID_MP3_BYTES), "audio/mpeg")},
+        headers=headers,
+    ).json()
+    key = f"echo/audio/{created['id']}.mp3"
+    assert s3.objects[("media", key)] == (VALID_MP3_BYTES, "audio/mpeg")
+    assert not (tmp_path / "audio" / f"{created['id']}.mp3").exists()
+
+    audio_url = f"{API_PREFIX}/entries/{created['id']}/audio"
+    redirected = client.get(audio_url, headers=headers, follow_redirects=False)
+    assert redirected.status_code == 307
+    assert redirected.headers["location"] == f"https://s3.test/media/{key}?e=300"
+
+    monkeypatch.setattr(app.main.settings, "s3_delivery", "proxy")
+    ranged = client.get(audio_url, headers={**headers, "Range": "bytes=3-8"})
+    assert ranged.status_code == 206
+    assert ranged.headers["content-range"] == f"bytes 3-8/{len(VALID_MP3_BYTES)}"
+    assert ranged.content == VALID_MP3_BYTES[3:9]
+    assert client.get(audio_url, headers=headers).content == VALID_MP3_BYTES
+
+    # Jobs read and write through the same storage.
+    config = app.jobs.JobQueueConfig(data_dir=tmp_path, storage=storage)
+    assert app.jobs.run_pending_jobs(app.db.SessionLocal, config) == 1
+
+    deleted = client.delete(f"{API_PREFIX}/entries/{created['id']}", headers=headers)
+    assert deleted.status_code == 200
+    assert ("media", key) not in s3.objects
@@ -16,10 +16,12 @@ def _build_client(tmp_path: Path, monkeypatch) -> TestClient:
 
     import app.db
     import app.main
+    import app.routes.metrics
     import app.routes.system
     import app.settings
 
     importlib.reload(app.settings)
+    importlib.reload(app.routes.metrics)
     importlib.reload(app.routes.system)
 
     if hasattr(app.db, "create_engine"):
@@ -91,3 +93,171 @@ def test_readyz_fails_if_audio_dir_becomes_file(tmp_path, monkeypatch):
     body = r.json()
     assert body["status"] == "fail"
     assert body["checks"]["audio_dir"]["ok"] is False
+
+
+def test_metrics_reports_route_templates_and_pool(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    client = _build_client(tmp_path, monkeypatch)
+
+    import app.metrics
+
+    entry_route = f"{API_PREFIX}/entries/{{entry_id}}"
+    health_route = f"{API_PREFIX}/health"
+    before = app.metrics.HTTP_REQUESTS.value(
+        method="GET", route=health_route, status="200"
+    )
+    observed = app.metrics.HTTP_REQUEST_DURATION.count(method="GET", route=entry_route)
+
+    assert client.get(f"{API_PREFIX}/health").status_code == 200
+    client.get(f"{API_PREFIX}/entries/some-raw-id")
+    client.get("/no/such/path")
+
+    r = client.get("/metrics")
+    assert r.status_code == 200, r.text
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = r.text
+
+    assert (
+        app.metrics.HTTP_REQUESTS.value(method="GET", route=health_route, status="200")
+        == before + 1
+    )
+    assert (
+        app.metrics.HTTP_REQUEST_DURATION.count(method="GET", route=entry_route)
+        == observed + 1
+    )
+    assert "some-raw-id" not in body
+    assert "/no/such/path" not in body
+    assert 'route="<unmatched>",status="404"' in body
+    assert (
+        f'echo_http_request_duration_seconds_bucket{{method="GET",'
+        f'route="{entry_route}",le="+Inf"}}' in body
+    )
+    # The /metrics request itself is in flight while rendering.
+    assert 'echo_http_requests_in_flight{method="GET"} 1' in body
+    assert "# TYPE echo_upload_bytes_total counter" in body
+    # Scrapes read the engine's pool without opening a session.
+    assert "echo_db_sessions_open 0" in body
+    assert re.search(r"^echo_db_pool_checked_out \d+$", body, re.MULTILINE)
+
+
+def test_metrics_are_disabled_by_default(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+
+    r = client.get("/metrics")
+    assert r.status_code == 404
+
+
+def test_metrics_bearer_token(tmp_path, monkeypatch):
+    monkeypatch.setenv("METRICS_ENABLED", "true")
+    monkeypatch.setenv("METRICS_BEARER_TOKEN", "scrape-secret")
+    client = _build_client(tmp_path, monkeypatch)
+
+    missing = client.get("/metrics")
+    assert missing.status_code == 401
+    assert missing.headers["www-authenticate"] == "Bearer"
+    wrong = client.get("/metrics", headers={"Authorization": "Bearer nope"})
+    assert wrong.status_code == 401
+
+    r = client.get("/metrics", headers={"Authorization": "Bearer scrape-secret"})
+    assert r.status_code == 200
+    assert "# TYPE echo_http_requests_total counter" in r.text
+
+
+def test_json_logging_goes_through_bounded_queue(monkeypatch, capsys):
+    import json
+    import logging
+    import queue
+
+    import app.metrics
+    from app.middleware import request_id
+
+    base = logging.getLogger("app")
+    monkeypatch.setattr(base, "handlers", [])
+    request_id.configure_json_logging(queue_size=10)
+    (handler,) = base.handlers
+    assert isinstance(handler, request_id.DroppingQueueHandler)
+
+    logging.getLogger("app.test").info("hello %s", "world", extra={"n": 3})
+    request_id.stop_json_logging()
+    assert base.handlers == []
+
+    line = json.loads(capsys.readouterr().err.strip().splitlines()[-1])
+    assert line["msg"] == "hello world"
+    assert line["logger"] == "app.test"
+    assert line["n"] == 3
+    assert "request_id" in line
+
+    # A full queue drops the record instead of blocking the caller.
+    full = request_id.DroppingQueueHandler(queue.Queue(maxsize=1))
+    dropped = app.metrics.LOG_RECORDS_DROPPED.value()
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "x", None, None)
+    full.handle(record)
+    full.handle(record)
+    assert full.queue.qsize() == 1
+    assert app.metrics.LOG_RECORDS_DROPPED.value() == dropped + 1
+
+
+def test_access_log_sampling_keeps_errors():
+    from app.middleware.request_id import RequestIdMiddleware
+
+    middleware = RequestIdMiddleware(app=None, access_log_sample_rate=0.0)
+    assert middleware._should_log(200) is False
+    assert middleware._should_log(404) is True
+    assert middleware._should_log(500) is True
+    assert RequestIdMiddleware(app=None)._should_log(200) is True
+
+
+def test_server_timing_reports_request_queries(tmp_path, monkeypatch):
+    import logging
+
+    client = _build_client(tmp_path, monkeypatch)
+
+    r = client.get(f"{API_PREFIX}/readyz")
+    assert r.status_code == 200, r.text
+    timing = re.match(
+        r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=[\d.]+$',
+        r.headers["Server-Timing"],
+    )
+    assert timing is not None, r.headers["Server-Timing"]
+    assert int(timing.group(2)) >= 1
+
+    r = client.get(f"{API_PREFIX}/health")
+    assert r.headers["Server-Timing"].startswith('db;dur=0.0;desc="0 queries"')
+
+    import app.query_stats
+    from app.middleware.request_id import RequestIdLogFilter
+
+    records: list[logging.LogRecord] = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    handler.addFilter(RequestIdLogFilter())
+    sql_logger = logging.getLogger("app.sql")
+    # Alembic's fileConfig (migration tests) disables existing loggers.
+    monkeypatch.setattr(sql_logger, "disabled", False)
+    sql_logger.addHandler(handler)
+    monkeypatch.setattr(app.query_stats.settings, "slow_query_ms", 1e-9)
+    try:
+        r = client.get(f"{API_PREFIX}/readyz", headers={"X-Request-Id": "slow-1"})
+        assert r.status_code == 200
+    finally:
+        sql_logger.removeHandler(handler)
+
+    slow = [record for record in records if record.getMessage() == "slow query"]
+    assert slow
+    assert slow[0].statement == "SELECT 1"
+    assert slow[0].request_id == "slow-1"
+    assert slow[0].params is None or slow[0].params == []
+
+
+def test_parameter_shape_hides_values():
+    from app.query_stats import parameter_shape
+
+    assert parameter_shape({"email": "a@b.c", "n": 3}, False) == {
+        "email": "str",
+        "n": "int",
+    }
+    assert parameter_shape(("secret", None), False) == ["str", "NoneType"]
+    assert parameter_shape([{"id": 1}, {"id": 2}], True) == {
+        "rows": 2,
+        "row": {"id": "int"},
+    }
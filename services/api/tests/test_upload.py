@@ -203,3 +203,41 @@ def test_upload_accepts_audio_mp4_extension(tmp_path, monkeypatch):
 
     assert response.status_code == 200
     assert response.json()["audio_mime"] == "audio/mp4"
+
+
+def test_upload_disk_io_runs_in_bounded_worker_pool(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+
+    import threading
+
+    import app.storage
+
+    app.storage.configure_upload_executor(2)
+    writer_threads: list[str] = []
+    original = app.storage._hash_and_write
+
+    def recording_hash_and_write(handle, digest, chunk):
+        writer_threads.append(threading.current_thread().name)
+        original(handle, digest, chunk)
+
+    monkeypatch.setattr(app.storage, "_hash_and_write", recording_hash_and_write)
+
+    response = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(_question_id(client, headers))},
+        files={
+            "audio_file": (
+                "voice.mp3",
+                GeneratedMP3Stream(total_size=3 * 1024 * 1024),
+                "audio/mpeg",
+            )
+        },
+        headers=headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["audio_size"] == 3 * 1024 * 1024
+
+    assert len(writer_threads) > 1
+    assert all(name.startswith("upload-io") for name in writer_threads)
+    assert app.storage._get_upload_executor()._max_workers == 2
@@ -0,0 +1,241 @@
+from io import BytesIO
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+
+API_PREFIX = "/api/v1"
+
+AUDIO_BYTES = b"ID3\x04\x00\x00\x00\x00\x00\x00" + bytes(range(256)) * 40
+
+
+def _build_client(tmp_path, monkeypatch, *, max_upload_size_mb: int = 25):
+    monkeypatch.setenv("DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("JWT_SECRET_KEY", "test-access-secret")
+    monkeypatch.setenv("JWT_REFRESH_SECRET_KEY", "test-refresh-secret")
+    monkeypatch.setenv("ADMIN_EMAIL", "admin@example.com")
+    monkeypatch.setenv("ADMIN_PASSWORD", "admin-password")
+    monkeypatch.setenv("APP_ENV", "development")
+    monkeypatch.setenv("MAX_UPLOAD_SIZE_MB", str(max_upload_size_mb))
+
+    import app.db
+    import app.main
+    import app.routes.uploads
+    import app.settings
+
+    app.settings.settings = app.settings.Settings()
+    app.db.settings = app.settings.settings
+    app.main.settings = app.settings.settings
+    app.routes.uploads.settings = app.settings.settings
+
+    app.db.engine.dispose()
+    app.db.engine = app.db.create_engine(
+        f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}",
+        connect_args={"check_same_thread": False},
+    )
+    app.db.SessionLocal.configure(bind=app.db.engine)
+    app.main.engine = app.db.engine
+
+    api_dir = Path(__file__).resolve().parents[1]
+    alembic_cfg = Config(str(api_dir / "alembic.ini"))
+    alembic_cfg.set_main_option(
+        "sqlalchemy.url", f"sqlite:///{app.settings.settings.data_dir / 'echo.db'}"
+    )
+    command.upgrade(alembic_cfg, "head")
+
+    from app.models import User
+    from app.security import hash_password
+
+    with app.db.SessionLocal() as db:
+        if db.query(User).count() == 0:
+            db.add(
+                User(
+                    email="admin@example.com",
+                    password_hash=hash_password("admin-password"),
+                    is_active=True,
+                )
+            )
+            db.commit()
+
+    return TestClient(app.main.app)
+
+
+def _auth_headers(client: TestClient) -> dict[str, str]:
+    response = client.post(
+        f"{API_PREFIX}/auth/login",
+        json={"email": "admin@example.com", "password": "admin-password"},
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _question_id(client: TestClient, headers: dict[str, str]) -> int:
+    question = client.get(f"{API_PREFIX}/questions/today", headers=headers)
+    assert question.status_code == 200
+    return int(question.json()["id"])
+
+
+def _create_upload(client, headers, payload: bytes, filename: str = "memo.mp3"):
+    response = client.post(
+        f"{API_PREFIX}/uploads",
+        json={
+            "filename": filename,
+            "content_type": "audio/mpeg",
+            "length": len(payload),
+        },
+        headers=headers,
+    )
+    assert response.status_code == 201
+    assert response.headers["Upload-Offset"] == "0"
+    return response.json()["id"]
+
+
+def _patch(client, headers, upload_id: str, offset: int, chunk: bytes):
+    return client.patch(
+        f"{API_PREFIX}/uploads/{upload_id}",
+        content=chunk,
+        headers={
+            **headers,
+            "Upload-Offset": str(offset),
+            "Content-Type": "application/offset+octet-stream",
+        },
+    )
+
+
+def test_resumable_upload_is_finalized_into_an_entry(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+    upload_id = _create_upload(client, headers, AUDIO_BYTES)
+
+    first = _patch(client, headers, upload_id, 0, AUDIO_BYTES[:4000])
+    assert first.status_code == 204
+    assert first.headers["Upload-Offset"] == "4000"
+
+    # A client that lost the response asks where to resume.
+    head = client.head(f"{API_PREFIX}/uploads/{upload_id}", headers=headers)
+    assert head.status_code == 200
+    assert head.headers["Upload-Offset"] == "4000"
+    assert head.headers["Upload-Length"] == str(len(AUDIO_BYTES))
+
+    stale = _patch(client, headers, upload_id, 0, AUDIO_BYTES[:4000])
+    assert stale.status_code == 409
+    assert stale.json()["error"]["code"] == "offset_mismatch"
+    assert stale.headers["Upload-Offset"] == "4000"
+
+    early = client.post(
+        f"{API_PREFIX}/entries",
+        data={
+            "question_id": str(_question_id(client, headers)),
+            "upload_id": upload_id,
+        },
+        headers=headers,
+    )
+    assert early.status_code == 409
+    assert early.json()["error"]["code"] == "upload_incomplete"
+
+    rest = _patch(client, headers, upload_id, 4000, AUDIO_BYTES[4000:])
+    assert rest.status_code == 204
+    assert rest.headers["Upload-Offset"] == str(len(AUDIO_BYTES))
+
+    created = client.post(
+        f"{API_PREFIX}/entries",
+        data={
+            "question_id": str(_question_id(client, headers)),
+            "upload_id": upload_id,
+        },
+        headers=headers,
+    )
+    assert created.status_code == 200
+    entry = created.json()
+    assert entry["audio_size"] == len(AUDIO_BYTES)
+    assert entry["audio_mime"] == "audio/mpeg"
+
+    audio = client.get(f"{API_PREFIX}/entries/{entry['id']}/audio", headers=headers)
+    assert audio.status_code == 200
+    assert audio.content == AUDIO_BYTES
+
+    gone = client.get(f"{API_PREFIX}/uploads/{upload_id}", headers=headers)
+    assert gone.status_code == 404
+    assert gone.json()["error"]["code"] == "upload_not_found"
+    assert not [path for path in (tmp_path / "uploads").rglob("*") if path.is_file()]
+
+
+def test_resumable_upload_enforces_limits_and_signature(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch, max_upload_size_mb=1)
+    headers = _auth_headers(client)
+
+    too_large = client.post(
+        f"{API_PREFIX}/uploads",
+        json={
+            "filename": "memo.mp3",
+            "content_type": "audio/mpeg",
+            "length": 1024 * 1024 + 1,
+        },
+        headers=headers,
+    )
+    assert too_large.status_code == 413
+    assert too_large.json()["error"]["code"] == "payload_too_large"
+
+    wrong_extension = client.post(
+        f"{API_PREFIX}/uploads",
+        json={"filename": "memo.wav", "content_type": "audio/mpeg", "length": 10},
+        headers=headers,
+    )
+    assert wrong_extension.status_code == 422
+    assert wrong_extension.json()["error"]["code"] == "invalid_extension"
+
+    upload_id = _create_upload(client, headers, AUDIO_BYTES)
+    past_end = _patch(client, headers, upload_id, 0, AUDIO_BYTES + b"extra")
+    assert past_end.status_code == 413
+    assert past_end.json()["error"]["code"] == "payload_too_large"
+
+    not_audio = _patch(client, headers, upload_id, 0, b"\x00" * len(AUDIO_BYTES))
+    assert not_audio.status_code == 422
+    assert not_audio.json()["error"]["code"] == "invalid_signature"
+
+    status = client.get(f"{API_PREFIX}/uploads/{upload_id}", headers=headers)
+    assert status.json()["offset"] == 0
+
+    deleted = client.delete(f"{API_PREFIX}/uploads/{upload_id}", headers=headers)
+    assert deleted.status_code == 200
+    assert (
+        client.get(f"{API_PREFIX}/uploads/{upload_id}", headers=headers).status_code
+        == 404
+    )
+
+
+def test_entry_audio_can_be_replaced_from_a_resumable_upload(tmp_path, monkeypatch):
+    client = _build_client(tmp_path, monkeypatch)
+    headers = _auth_headers(client)
+    created = client.post(
+        f"{API_PREFIX}/entries",
+        data={"question_id": str(_question_id(client, headers)), "text": "hello"},
+        headers=headers,
+    )
+    entry_id = created.json()["id"]
+
+    upload_id = _create_upload(client, headers, AUDIO_BYTES)
+    assert _patch(client, headers, upload_id, 0, AUDIO_BYTES).status_code == 204
+
+    both = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/audio",
+        data={"upload_id": upload_id},
+        files={"audio_file": ("memo.mp3", BytesIO(AUDIO_BYTES), "audio/mpeg")},
+        headers=headers,
+    )
+    assert both.status_code == 400
+    assert both.json()["error"]["code"] == "audio_source_conflict"
+
+    replaced = client.post(
+        f"{API_PREFIX}/entries/{entry_id}/audio",
+        data={"upload_id": upload_id},
+        headers=headers,
+    )
+    assert replaced.status_code == 200
+    assert replaced.json()["audio_size"] == len(AUDIO_BYTES)
+    assert (
+        client.get(f"{API_PREFIX}/uploads/{upload_id}", headers=headers).status_code
+        == 404
+    )
@@ -0,0 +1,84 @@
+from io import BytesIO
+import struct
+import wave
+
+import pytest
+
+from app.waveform import compute_peaks, decode_peaks
+
+
+def _wav(samples: list[int], *, channels: int = 1, width: int = 2) -> bytes:
+    fmt = {1: "B", 2: "h", 3: None, 4: "i"}[width]
+    if fmt is None:
+        frames = b"".join(s.to_bytes(3, "little", signed=True) for s in samples)
+    else:
+        frames = struct.pack(f"<{len(samples)}{fmt}", *samples)
+    buffer = BytesIO()
+    with wave.open(buffer, "wb") as wav_file:
+        wav_file.setnchannels(channels)
+        wav_file.setsampwidth(width)
+        wav_file.setframerate(8000)
+        wav_file.writeframes(frames)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def write(tmp_path):
+    def _write(name: str, payload: bytes):
+        path = tmp_path / name
+        path.write_bytes(payload)
+        return path
+
+    return _write
+
+
+def test_wav_peaks_are_min_max_per_bucket(write):
+    samples = [0, 32767, -32768, 256] * 4 + [-512, 512] * 4
+    path = write("a.wav", _wav(samples))
+    peaks = compute_peaks(path, "audio/wav", buckets=3)
+    assert peaks[:4] == b"EPK1"
+    assert decode_peaks(peaks) == [(-128, 127), (-128, 127), (-2, 2)]
+
+
+def test_peaks_cover_all_channels_and_sample_widths(write):
+    # Stereo 24-bit: the right channel carries the signal.
+    samples = [0, 0x400000, 0, -0x400000] * 10
+    path = write("a.wav", _wav(samples, channels=2, width=3))
+    assert decode_peaks(compute_peaks(path, "audio/wav", buckets=2)) == [
+        (-64, 64),
+        (-64, 64),
+    ]
+
+    # 8-bit WAV is unsigned around 128.
+    path = write("b.wav", _wav([128, 255, 0, 128], width=1))
+    assert decode_peaks(compute_peaks(path, "audio/wav", buckets=1)) == [(-128, 127)]
+
+
+def test_short_audio_gets_one_bucket_per_frame(write):
+    path = write("a.wav", _wav([1024, -1024, 2048]))
+    assert decode_peaks(compute_peaks(path, "audio/wav", buckets=2048)) == [
+        (4, 4),
+        (-4, -4),
+        (8, 8),
+    ]
+
+
+def test_aiff_big_endian_pcm(write):
+    comm = struct.pack(">hIh", 1, 4, 16) + b"\x40\x0b\xfa" + b"\x00" * 7
+    ssnd = struct.pack(">II", 0, 0) + struct.pack(">4h", 0, 16384, -16384, 0)
+    chunks = b"AIFF" + b"COMM" + struct.pack(">I", len(comm)) + comm
+    chunks += b"SSND" + struct.pack(">I", len(ssnd)) + ssnd
+    path = write("a.aiff", b"FORM" + struct.pack(">I", len(chunks)) + chunks)
+    assert decode_peaks(compute_peaks(path, "audio/aiff", buckets=2)) == [
+        (0, 64),
+        (-64, 0),
+    ]
+
+
+def test_compressed_audio_without_ffmpeg_has_no_peaks(write):
+    path = write("a.mp3", b"ID3" + b"\x00" * 64)
+    assert compute_peaks(path, "audio/mpeg", buckets=16, ffmpeg="") is None
+    assert (
+        compute_peaks(path, "audio/mpeg", buckets=16, ffmpeg="missing-ffmpeg-binary")
+        is None
+    )